@@ -3,7 +3,7 @@ from .models import APIKey, APILog
 
 @admin.register(APIKey)
 class APIKeyAdmin(admin.ModelAdmin):
-    list_display = ['name', 'key', 'is_active', 'created_at', 'expires_at']
+    list_display = ['name', 'key', 'owner', 'is_active', 'created_at', 'expires_at']
     list_filter = ['is_active', 'created_at']
     search_fields = ['name']
     readonly_fields = ['created_at']
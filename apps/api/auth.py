@@ -0,0 +1,158 @@
+import hashlib
+import math
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from django.http import JsonResponse
+from django.utils import timezone
+from .models import APIKey
+
+# Serializes bucket updates in a process whose cache isn't Redis. The default
+# LocMemCache is private to the process, so this makes those updates atomic.
+_bucket_lock = threading.Lock()
+
+# Refill and take tokens in one step on the Redis server. The bucket is a hash
+# of available tokens and last update time, expired once it would be full.
+# KEYS[1] bucket; ARGV rate, burst, now, tokens. Returns {allowed, available}.
+TOKEN_BUCKET_SCRIPT = """
+local rate, burst, now, tokens = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'available', 'updated')
+local available = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+available = math.min(burst, available + math.max(now - updated, 0) * rate)
+local allowed = 0
+if available >= tokens then
+    available = available - tokens
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'available', tostring(available), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - available) / rate * 1000) + 1000)
+return {allowed, tostring(available)}
+"""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _digest(raw_key):
+    return hashlib.sha256(raw_key.encode()).hexdigest()
+
+
+def key_from_request(request):
+    """
+    The API key sent as an `X-API-Key` header or `Authorization: Api-Key <key>`, or None
+    """
+    raw_key = request.META.get('HTTP_X_API_KEY')
+    if raw_key:
+        return raw_key.strip()
+    scheme, _, credentials = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    if scheme.lower() == 'api-key' and credentials.strip():
+        return credentials.strip()
+    return None
+
+
+def _key_cache_key(raw_key):
+    return f'api-key:{_digest(raw_key)}'
+
+
+def _cache_lifetime(api_key):
+    # An active key is cached for API_KEY_CACHE_SECONDS, but never past its expiry
+    lifetime = _setting('API_KEY_CACHE_SECONDS', 10)
+    if api_key is not None and api_key.expires_at is not None:
+        lifetime = min(lifetime, (api_key.expires_at - timezone.now()).total_seconds())
+    return lifetime
+
+
+def lookup_api_key(raw_key):
+    """
+    The active, unexpired APIKey for a raw key (with its owner loaded), or
+    None. A key whose owner has been deactivated is not valid either.
+
+    Lookups (including misses, so a client retrying a bad key doesn't reach
+    the database on every request) are kept in the default cache for
+    API_KEY_CACHE_SECONDS. Saving or deleting a key, or saving its owner,
+    drops the entry, which every process sees at once when the cache is
+    shared (REDIS_CACHE_URL).
+    """
+    cache_key = _key_cache_key(raw_key)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        api_key, = cached
+    else:
+        api_key = APIKey.objects.select_related('owner').filter(key=raw_key, is_active=True).first()
+        lifetime = _cache_lifetime(api_key)
+        if lifetime > 0:
+            cache.set(cache_key, (api_key,), timeout=lifetime)
+
+    if api_key is not None and api_key.expires_at is not None and api_key.expires_at <= timezone.now():
+        return None
+    if api_key is not None and api_key.owner is not None and not api_key.owner.is_active:
+        return None
+    return api_key
+
+
+def invalidate_api_key(raw_key):
+    cache.delete(_key_cache_key(raw_key))
+
+
+def consume_tokens(identity, tokens=1):
+    """
+    Take `tokens` from the identity's token bucket, kept in the cache backend
+    so every process draws from the same bucket when that backend is shared.
+
+    Buckets hold up to API_RATE_LIMIT_BURST tokens and refill at
+    API_RATE_LIMIT_PER_SECOND. Updates are atomic, so concurrent requests
+    can't overdraw a bucket: on Redis the whole update runs as one script,
+    and with the per-process default cache it runs under a process lock.
+
+    Returns (allowed, retry_after_seconds).
+    """
+    rate = _setting('API_RATE_LIMIT_PER_SECOND', 1.0)
+    burst = _setting('API_RATE_LIMIT_BURST', 60)
+    if rate <= 0:
+        return True, 0
+
+    cache_key = f'api-ratelimit:{identity}'
+    now = time.time()
+    backend = caches['default']
+    if isinstance(backend, RedisCache):
+        allowed, available = _consume_on_redis(backend, cache_key, rate, burst, now, tokens)
+    else:
+        with _bucket_lock:
+            available, updated = cache.get(cache_key, (burst, now))
+            available = min(burst, available + max(now - updated, 0) * rate)
+            allowed = available >= tokens
+            if allowed:
+                available -= tokens
+            # Kept until the bucket would be full again, after which a missing entry means full
+            cache.set(cache_key, (available, now), timeout=math.ceil((burst - available) / rate) + 1)
+    return allowed, 0 if allowed else math.ceil((tokens - available) / rate)
+
+
+def _consume_on_redis(backend, cache_key, rate, burst, now, tokens):
+    key = backend.make_and_validate_key(cache_key)
+    client = backend._cache.get_client(key, write=True)
+    allowed, available = client.register_script(TOKEN_BUCKET_SCRIPT)(keys=[key], args=[rate, burst, now, tokens])
+    return bool(allowed), float(available)
+
+
+def rate_limit_identity(request):
+    """
+    Whose bucket a request draws from: its API key, else its signed-in user,
+    else its address
+    """
+    api_key = getattr(request, 'api_key', None)
+    if api_key is not None:
+        return f'key:{api_key.pk}'
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f"ip:{request.META.get('REMOTE_ADDR')}"
+
+
+def rate_limited_response(retry_after):
+    response = JsonResponse({'error': 'Rate limit exceeded', 'retry_after': retry_after}, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
@@ -0,0 +1,197 @@
+import atexit
+import logging
+import math
+import os
+import threading
+import time
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+QUEUE_WAIT_BUCKETS = (0.01, 0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600)
+
+# name: (type, help, label names, histogram buckets)
+METRICS = {
+    'dqw_rule_runs_total': (
+        'counter', 'Rule executions by final status', ('status',), None),
+    'dqw_rule_run_duration_seconds': (
+        'histogram', 'Rule execution wall-clock time by rule type', ('rule_type',), DURATION_BUCKETS),
+    'dqw_dataset_load_bytes_total': (
+        'counter', 'Dataset file bytes read by rule executions', (), None),
+    'dqw_celery_queue_wait_seconds': (
+        'histogram', 'Time Celery tasks spent queued before a worker started them', ('task',), QUEUE_WAIT_BUCKETS),
+    'dqw_incidents_created_total': (
+        'counter', 'Incidents opened, by severity', ('severity',), None),
+    'dqw_http_request_duration_seconds': (
+        'histogram', 'Request latency by view', ('view', 'method'), DURATION_BUCKETS),
+    'dqw_http_db_queries_total': (
+        'counter', 'Database queries issued while serving requests, by view', ('view',), None),
+}
+
+
+def _flush_interval():
+    return getattr(settings, 'METRICS_FLUSH_INTERVAL', 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_labels(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _format_bound(bound):
+    return '+Inf' if math.isinf(bound) else repr(float(bound))
+
+
+class MetricsBuffer:
+    """
+    Process-local metric deltas, flushed into MetricSeries rows.
+
+    Recording only touches a dict under a lock, so instrumented code never
+    waits on the database. A background thread adds the deltas to the shared
+    rows every METRICS_FLUSH_INTERVAL seconds (0 disables it; the /metrics
+    view always flushes its own process first), which is what lets one
+    scrape report the totals of every web and worker process.
+    """
+
+    def __init__(self):
+        self._deltas = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        # Forked workers (gunicorn, celery prefork) each need their own flusher.
+        # A forked child starts with no deltas; the parent still owns its own.
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._deltas = {}
+            self._thread = None
+        if _flush_interval() and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name='metrics-flusher', daemon=True)
+            self._thread.start()
+
+    def _add(self, key, amount):
+        with self._lock:
+            self._ensure_thread()
+            self._deltas[key] = self._deltas.get(key, 0.0) + amount
+
+    def inc(self, name, amount=1, **labels):
+        _, _, label_names, _ = METRICS[name]
+        self._add((name, render_labels(label_names, [labels[label] for label in label_names])), amount)
+
+    def observe(self, name, value, **labels):
+        _, _, label_names, buckets = METRICS[name]
+        rendered = render_labels(label_names, [labels[label] for label in label_names])
+        prefix = f'{rendered},' if rendered else ''
+        with self._lock:
+            self._ensure_thread()
+            # Buckets are stored cumulatively, as they are exposed; every bucket
+            # gets a row, even at zero, so the series always has the full set
+            for bound in buckets + (math.inf,):
+                key = (f'{name}_bucket', f'{prefix}le="{_format_bound(bound)}"')
+                self._deltas[key] = self._deltas.get(key, 0.0) + (1 if value <= bound else 0)
+            for suffix, amount in (('_sum', value), ('_count', 1)):
+                key = (f'{name}{suffix}', rendered)
+                self._deltas[key] = self._deltas.get(key, 0.0) + amount
+
+    def _run(self):
+        while True:
+            interval = _flush_interval()
+            if not interval:
+                # Flushing was switched off; a later recording restarts the thread
+                return
+            time.sleep(interval)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Metrics flush failed: {str(e)}")
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """
+        Add the deltas recorded so far to the shared series. Safe to call from any thread.
+        """
+        from .models import MetricSeries
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+        unwritten = dict(deltas)
+        try:
+            for (name, labels), amount in deltas.items():
+                updated = MetricSeries.objects.filter(name=name, labels=labels).update(value=F('value') + amount)
+                if not updated:
+                    try:
+                        with transaction.atomic():
+                            MetricSeries.objects.create(name=name, labels=labels, value=amount)
+                    except IntegrityError:
+                        # Another process created the row first
+                        MetricSeries.objects.filter(name=name, labels=labels).update(value=F('value') + amount)
+                del unwritten[(name, labels)]
+        except Exception:
+            # Keep what wasn't written (e.g. the database was locked) for the next flush
+            with self._lock:
+                for key, amount in unwritten.items():
+                    self._deltas[key] = self._deltas.get(key, 0.0) + amount
+            raise
+        return len(deltas)
+
+
+_buffer = MetricsBuffer()
+
+
+def get_metrics_buffer():
+    return _buffer
+
+
+def inc(name, amount=1, **labels):
+    _buffer.inc(name, amount, **labels)
+
+
+def observe(name, value, **labels):
+    _buffer.observe(name, value, **labels)
+
+
+def _series_sort_key(series):
+    # Keep histogram buckets in ascending `le` order after the other labels
+    labels = series.labels
+    if series.name.endswith('_bucket') and 'le="' in labels:
+        head, _, bound = labels.rpartition('le="')
+        return (series.name, head, float(bound.rstrip('"').replace('+Inf', 'inf')))
+    return (series.name, labels, 0.0)
+
+
+def render_exposition():
+    """
+    Every stored series in the Prometheus text exposition format (0.0.4)
+    """
+    from .models import MetricSeries
+    series = sorted(MetricSeries.objects.all(), key=_series_sort_key)
+    lines = []
+    for name, (metric_type, help_text, _, _) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        names = (f'{name}_bucket', f'{name}_sum', f'{name}_count') if metric_type == 'histogram' else (name,)
+        for row in series:
+            if row.name in names:
+                labels = f'{{{row.labels}}}' if row.labels else ''
+                value = int(row.value) if row.value.is_integer() else row.value
+                lines.append(f'{row.name}{labels} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+@atexit.register
+def _flush_on_exit():
+    # Without a flusher (METRICS_FLUSH_INTERVAL = 0) deltas are only written by a scrape
+    if not _flush_interval():
+        return
+    try:
+        _buffer.flush()
+    except Exception as e:
+        logger.error(f"Failed to flush metrics on exit: {str(e)}")
@@ -0,0 +1,104 @@
+import logging
+import time
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse
+from . import metrics
+from .auth import consume_tokens, key_from_request, lookup_api_key, rate_limit_identity, rate_limited_response
+from .request_log import build_api_log, submit_api_log
+
+logger = logging.getLogger(__name__)
+
+# Other methods are labelled 'other', so clients can't grow the label set
+METRIC_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+class RequestMetricsMiddleware:
+    """
+    Record each request's latency and database query count against the view
+    that served it. Requests that match no URL are labelled 'unresolved', and
+    nonstandard methods 'other', so scanners can't grow the label set.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = [0]
+
+        def count_query(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_query):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        method = request.method if request.method in METRIC_METHODS else 'other'
+        metrics.observe('dqw_http_request_duration_seconds', elapsed, view=view, method=method)
+        metrics.inc('dqw_http_db_queries_total', queries[0], view=view)
+        return response
+
+
+class APIRequestLogMiddleware:
+    """
+    Time every /api/ request and record it as an APILog through the buffered
+    writer, so the request never waits on the insert
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith('/api/'):
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        response = self.get_response(request)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        try:
+            submit_api_log(build_api_log(request, response, elapsed_ms))
+        except Exception as e:
+            logger.warning(f"Failed to record API request {request.path}: {str(e)}")
+        return response
+
+
+class APIKeyAuthMiddleware:
+    """
+    Authenticate /api/ requests and apply the per-client rate limit.
+
+    A request sending an API key must send a valid one, and gets it as
+    request.api_key, with the key's owner (if any) as request.user. Such
+    requests carry no cookies to forge, so they skip the CSRF check that
+    session requests still get. Otherwise the session user must be signed
+    in, unless API_REQUIRE_AUTH is off. Every request takes one token from its client's
+    bucket and is refused with 429 once the bucket is empty.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith('/api/'):
+            return self.get_response(request)
+
+        request.api_key = None
+        raw_key = key_from_request(request)
+        if raw_key is not None:
+            request.api_key = lookup_api_key(raw_key)
+            if request.api_key is None:
+                return JsonResponse({'error': 'Invalid or expired API key'}, status=401)
+            if request.api_key.owner is not None:
+                request.user = request.api_key.owner
+            # Read by CsrfViewMiddleware.process_view, which runs after this
+            request._dont_enforce_csrf_checks = True
+        elif not request.user.is_authenticated and getattr(settings, 'API_REQUIRE_AUTH', True):
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+
+        allowed, retry_after = consume_tokens(rate_limit_identity(request))
+        if not allowed:
+            return rate_limited_response(retry_after)
+        return self.get_response(request)
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('labels', models.CharField(blank=True, help_text='Rendered label set, e.g. status="COMPLETED"', max_length=500)),
+                ('value', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['name', 'labels'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='metricseries',
+            constraint=models.UniqueConstraint(fields=('name', 'labels'), name='metricseries_name_labels_uniq'),
+        ),
+    ]
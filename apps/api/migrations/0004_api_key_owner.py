@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0003_api_log_created_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apikey',
+            name='owner',
+            field=models.ForeignKey(blank=True, help_text='User the key acts as; required for per-user endpoints such as uploads', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='api_keys', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
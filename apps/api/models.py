@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 # The API app might not need models as it's primarily for exposing data
 # But we can create some models for API keys or access logs if needed
@@ -6,6 +8,10 @@ from django.db import models
 class APIKey(models.Model):
     name = models.CharField(max_length=100)
     key = models.CharField(max_length=255, unique=True)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, blank=True, null=True, related_name='api_keys',
+        help_text='User the key acts as; required for per-user endpoints such as uploads',
+    )
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField(blank=True, null=True)
@@ -25,10 +31,29 @@ class APILog(models.Model):
     user_agent = models.TextField(blank=True)
     response_status = models.IntegerField()
     response_time = models.FloatField()  # in milliseconds
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)  # set at request time, not at flush time
 
     def __str__(self):
         return f"{self.method} {self.endpoint} - {self.response_status}"
 
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+
+class MetricSeries(models.Model):
+    """
+    Cumulative value of one Prometheus series (a metric name plus its
+    labels), summed over every web and worker process that flushed into it
+    """
+    name = models.CharField(max_length=100)
+    labels = models.CharField(max_length=500, blank=True, help_text='Rendered label set, e.g. status="COMPLETED"')
+    value = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}{{{self.labels}}} {self.value}"
+
+    class Meta:
+        ordering = ['name', 'labels']
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'labels'], name='metricseries_name_labels_uniq'),
+        ]
@@ -0,0 +1,209 @@
+import atexit
+import logging
+import math
+import os
+import threading
+from datetime import timedelta
+from itertools import groupby
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Avg, Count, Max, Q
+from django.utils import timezone
+from .models import APILog
+
+logger = logging.getLogger(__name__)
+
+# Percentiles reported per endpoint
+LATENCY_PERCENTILES = (50, 95, 99)
+
+# Longest user agent kept on a log row
+USER_AGENT_MAX_LENGTH = 500
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def build_api_log(request, response, response_time):
+    """
+    Capture one API request as an unsaved APILog.
+
+    The endpoint is the matched URL pattern (e.g. /api/uploads/<uuid:upload_id>/)
+    so requests for different objects aggregate together; unmatched paths are
+    logged as requested. The timestamp is fixed here, not at flush time.
+    """
+    match = getattr(request, 'resolver_match', None)
+    endpoint = f'/{match.route}' if match and match.route else request.path
+    api_key = getattr(request, 'api_key', None)
+    return APILog(
+        api_key_id=api_key.pk if api_key is not None else None,
+        endpoint=endpoint[:255],
+        method=request.method[:10],
+        ip_address=request.META.get('REMOTE_ADDR') or '0.0.0.0',
+        user_agent=request.META.get('HTTP_USER_AGENT', '')[:USER_AGENT_MAX_LENGTH],
+        response_status=response.status_code,
+        response_time=response_time,
+        created_at=timezone.now(),
+    )
+
+
+def write_api_logs(logs):
+    """
+    Insert APILog rows with bulk_create; a failed batch is dropped rather
+    than retried, since request logs are diagnostic
+    """
+    if not logs:
+        return 0
+    try:
+        APILog.objects.bulk_create(logs, batch_size=_setting('API_LOG_BATCH_SIZE', 200))
+    except Exception as e:
+        logger.error(f"Dropped {len(logs)} API log entries: {str(e)}")
+        return 0
+    return len(logs)
+
+
+class BufferedAPILogWriter:
+    """
+    Process-local APILog queue flushed by a background thread, so a request
+    only pays for appending to a list. The flusher wakes when the buffer
+    reaches API_LOG_BATCH_SIZE or every API_LOG_FLUSH_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        # One flusher per forked worker; a child starts with an empty buffer
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._buffer = []
+        self._thread = threading.Thread(target=self._run, name='api-log-writer', daemon=True)
+        self._thread.start()
+
+    def enqueue(self, log):
+        with self._lock:
+            self._ensure_thread()
+            self._buffer.append(log)
+            full = len(self._buffer) >= _setting('API_LOG_BATCH_SIZE', 200)
+        if full:
+            self._wakeup.set()
+
+    def _drain(self):
+        with self._lock:
+            logs, self._buffer = self._buffer, []
+        return logs
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(_setting('API_LOG_FLUSH_INTERVAL', 5.0))
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"API log flush failed: {str(e)}")
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """
+        Write out everything queued so far. Safe to call from any thread.
+        """
+        return write_api_logs(self._drain())
+
+
+_writer = BufferedAPILogWriter()
+
+
+def get_api_log_writer():
+    return _writer
+
+
+def submit_api_log(log):
+    """
+    Route an APILog according to API_LOG_WRITER: 'sync' saves it now,
+    'buffered' queues it and 'off' discards it
+    """
+    mode = _setting('API_LOG_WRITER', 'buffered')
+    if mode == 'sync':
+        write_api_logs([log])
+    elif mode == 'buffered':
+        _writer.enqueue(log)
+
+
+def _rank(percentile, count):
+    # Nearest-rank: the smallest value with at least `percentile`% of samples at or below it
+    return max(math.ceil(percentile / 100 * count), 1) - 1
+
+
+def endpoint_latency(since, endpoint=None, method=None):
+    """
+    Request count, error count and average, max and percentile response
+    times (ms) for each endpoint and method logged since `since`.
+
+    Percentiles are read off a single scan of the response times in sorted
+    order, keeping only the current endpoint's position in memory.
+    """
+    logs = APILog.objects.filter(created_at__gte=since)
+    if endpoint:
+        logs = logs.filter(endpoint=endpoint)
+    if method:
+        logs = logs.filter(method=method.upper())
+
+    summaries = {
+        (row['endpoint'], row['method']): {
+            'endpoint': row['endpoint'],
+            'method': row['method'],
+            'requests': row['requests'],
+            'errors': row['errors'],
+            'avg_ms': round(row['avg_ms'], 3),
+            'max_ms': round(row['max_ms'], 3),
+        }
+        for row in logs.values('endpoint', 'method').annotate(
+            requests=Count('id'),
+            errors=Count('id', filter=Q(response_status__gte=500)),
+            avg_ms=Avg('response_time'),
+            max_ms=Max('response_time'),
+        ).order_by()
+    }
+
+    times = logs.order_by('endpoint', 'method', 'response_time').values_list('endpoint', 'method', 'response_time')
+    for key, group in groupby(times.iterator(chunk_size=2000), key=lambda row: row[:2]):
+        summary = summaries.get(key)
+        if summary is None:
+            # Logged between the two queries
+            continue
+        ranks = [(_rank(percentile, summary['requests']), percentile) for percentile in LATENCY_PERCENTILES]
+        for position, (_, _, response_time) in enumerate(group):
+            for rank, percentile in ranks:
+                if rank == position:
+                    summary[f'p{percentile}_ms'] = round(response_time, 3)
+    for summary in summaries.values():
+        # Rows written between the two queries can leave a high rank unreached
+        for percentile in LATENCY_PERCENTILES:
+            summary.setdefault(f'p{percentile}_ms', summary['max_ms'])
+    return list(summaries.values())
+
+
+def prune_api_logs(days=None):
+    """
+    Delete APILog rows older than API_LOG_RETENTION_DAYS; returns the number deleted
+    """
+    days = days if days is not None else _setting('API_LOG_RETENTION_DAYS', 30)
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = APILog.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+@atexit.register
+def _flush_on_exit():
+    # Best effort: don't lose the tail of the buffer on a clean shutdown
+    try:
+        _writer.flush()
+    except Exception as e:
+        logger.error(f"Failed to flush API log buffer on exit: {str(e)}")
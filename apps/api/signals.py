@@ -0,0 +1,47 @@
+import time
+from celery.signals import before_task_publish, task_prerun
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.incidents.models import Incident
+from . import metrics
+from .auth import invalidate_api_key
+from .models import APIKey
+
+# Message header carrying the wall-clock time a task was queued
+PUBLISHED_AT_HEADER = 'dqw_published_at'
+
+
+@receiver(post_save, sender=Incident)
+def count_created_incident(sender, instance, created, **kwargs):
+    if created:
+        metrics.inc('dqw_incidents_created_total', severity=instance.severity)
+
+
+@receiver(post_save, sender=APIKey)
+@receiver(post_delete, sender=APIKey)
+def drop_cached_api_key(sender, instance, **kwargs):
+    invalidate_api_key(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def drop_cached_owner_keys(sender, instance, update_fields=None, **kwargs):
+    # Cached keys carry their owner, so a deactivated owner must not linger;
+    # logins only save last_login and are skipped
+    if update_fields is not None and 'is_active' not in update_fields:
+        return
+    for raw_key in APIKey.objects.filter(owner=instance).values_list('key', flat=True):
+        invalidate_api_key(raw_key)
+
+
+@before_task_publish.connect
+def stamp_task_publish_time(headers=None, **kwargs):
+    if headers is not None:
+        headers[PUBLISHED_AT_HEADER] = time.time()
+
+
+@task_prerun.connect
+def record_task_queue_wait(task=None, **kwargs):
+    published_at = getattr(task.request, PUBLISHED_AT_HEADER, None) if task is not None else None
+    if published_at is not None:
+        metrics.observe('dqw_celery_queue_wait_seconds', max(time.time() - float(published_at), 0.0), task=task.name)
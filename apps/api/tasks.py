@@ -0,0 +1,10 @@
+from celery import shared_task
+
+
+@shared_task
+def prune_api_logs_task():
+    """
+    Delete API request logs older than API_LOG_RETENTION_DAYS.
+    """
+    from .request_log import prune_api_logs
+    return f"Deleted {prune_api_logs()} API log entries"
@@ -1,3 +1,516 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+from django.conf import settings
+from django.db import OperationalError
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from apps.api import metrics
+from apps.api.metrics import get_metrics_buffer
+from apps.api.auth import consume_tokens, lookup_api_key
+from apps.api.models import APIKey, APILog, MetricSeries
+from apps.api.request_log import BufferedAPILogWriter, get_api_log_writer, prune_api_logs
+from apps.api.signals import record_task_queue_wait, stamp_task_publish_time
+from apps.datasets import uploads
+from apps.datasets.models import Dataset, DatasetUpload
+from apps.rules.models import Rule
+from apps.incidents.models import Incident
 
-# Create your tests here.
+User = get_user_model()
+
+
+class IncidentListApiTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='siem', password='testpass123')
+        self.dataset = Dataset.objects.create(name='orders', source_type='CSV', owner=self.user)
+        self.other_dataset = Dataset.objects.create(name='customers', source_type='CSV', owner=self.user)
+        self.rule = Rule.objects.create(
+            name='order id present', dataset=self.dataset, rule_type='NOT_NULL',
+            dsl_expression='NOT_NULL(id)', owner=self.user
+        )
+        for i in range(5):
+            Incident.objects.create(
+                rule=self.rule, dataset=self.dataset if i < 4 else self.other_dataset,
+                title=f'Incident {i}', description='Null ids',
+                severity='HIGH' if i % 2 else 'LOW', status='RESOLVED' if i == 0 else 'OPEN'
+            )
+        self.url = reverse('api:incident_list')
+        self.client.force_login(self.user)
+    
+    def test_cursor_pages_cover_all_incidents(self):
+        """Test that following next_cursor returns every incident exactly once"""
+        seen = []
+        params = {'limit': 2}
+        while True:
+            data = self.client.get(self.url, params).json()
+            seen.extend(incident['id'] for incident in data['incidents'])
+            if not data['next_cursor']:
+                break
+            params['cursor'] = data['next_cursor']
+        self.assertEqual(sorted(seen), sorted(Incident.objects.values_list('id', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+    
+    def test_filters_and_sparse_fields(self):
+        """Test that status/severity/dataset filters combine and only the requested fields are returned"""
+        data = self.client.get(self.url, {
+            'status': 'open', 'severity': 'HIGH', 'dataset': self.dataset.id, 'fields': 'id,title,dataset'
+        }).json()
+        self.assertEqual([incident['title'] for incident in data['incidents']], ['Incident 3', 'Incident 1'])
+        self.assertEqual(set(data['incidents'][0]), {'id', 'title', 'dataset'})
+        self.assertEqual(data['incidents'][0]['dataset'], 'orders')
+    
+    def test_unknown_field_is_rejected(self):
+        """Test that an unknown field name returns 400"""
+        response = self.client.get(self.url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_ndjson_stream_returns_all_matches(self):
+        """Test that format=ndjson streams every matching incident regardless of limit"""
+        response = self.client.get(self.url, {'format': 'ndjson', 'limit': 1, 'fields': 'id,status'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(len(records), 5)
+        self.assertEqual(set(records[0]), {'id', 'status'})
+
+
+@override_settings(DATASET_INGESTION='sync')
+class ChunkedUploadApiTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        
+        self.user = User.objects.create_user(username='loader', password='testpass123')
+        self.client.force_login(self.user)
+        self.content = b'id,amount\n' + b''.join(f'{i},{i * 10}\n'.encode() for i in range(1, 301))
+    
+    def start(self, **extra):
+        response = self.client.post(
+            reverse('api:upload_create'),
+            json.dumps({'name': 'ledger', 'filename': 'ledger.csv', **extra}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()
+    
+    def send(self, upload, offset, chunk):
+        return self.client.post(upload['chunk_url'], chunk, content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset))
+    
+    def test_resumed_upload_creates_dataset_without_rereading(self):
+        """Test that chunks resume from the server offset and completion uses the running hash and row count"""
+        upload = self.start(total_size=len(self.content))
+        self.assertEqual(self.send(upload, 0, self.content[:1000]).json()['offset'], 1000)
+        
+        # A retried chunk at a stale offset is refused with the offset to resume from
+        stale = self.send(upload, 0, self.content[:1000])
+        self.assertEqual((stale.status_code, stale.json()['offset']), (409, 1000))
+        
+        # The next chunk lands in a process without the running hash
+        uploads._hashers.clear()
+        self.send(upload, 1000, self.content[1000:])
+        status = self.client.get(reverse('api:upload_detail', args=[upload['upload_id']])).json()
+        self.assertEqual((status['offset'], status['row_count']), (len(self.content), 300))
+        
+        sha256 = hashlib.sha256(self.content).hexdigest()
+        with patch('apps.datasets.ingestion.dataset_content_hash') as rehash:
+            response = self.client.post(upload['complete_url'], json.dumps({'sha256': sha256}), content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        rehash.assert_not_called()
+        
+        dataset = Dataset.objects.get(name='ledger')
+        self.assertEqual((dataset.row_count, dataset.profile_content_hash), (300, sha256))
+        with dataset.file.open('rb') as handle:
+            self.assertEqual(handle.read(), self.content)
+        self.assertEqual(self.client.get(response.json()['progress_url']).json()['status'], 'COMPLETED')
+    
+    def test_complete_rejects_hash_mismatch_and_short_upload(self):
+        """Test that completion checks the declared size and hash"""
+        upload = self.start(total_size=len(self.content))
+        self.send(upload, 0, self.content[:50])
+        short = self.client.post(upload['complete_url'], '{}', content_type='application/json')
+        self.assertEqual(short.status_code, 400)
+        
+        self.send(upload, 50, self.content[50:])
+        mismatch = self.client.post(upload['complete_url'], json.dumps({'sha256': '0' * 64}), content_type='application/json')
+        self.assertEqual(mismatch.status_code, 400)
+        self.assertFalse(Dataset.objects.filter(name='ledger').exists())
+    
+    def test_compressed_upload_is_stored_compressed_and_counted_on_ingestion(self):
+        """Test that a gzip upload keeps its compressed bytes and gets its row count from ingestion"""
+        content = gzip.compress(self.content)
+        upload = self.start(filename='ledger.csv.gz')
+        self.send(upload, 0, content[:100])
+        self.send(upload, 100, content[100:])
+        self.assertIsNone(self.client.get(reverse('api:upload_detail', args=[upload['upload_id']])).json()['row_count'])
+        
+        response = self.client.post(upload['complete_url'], '{}', content_type='application/json')
+        self.assertEqual(self.client.get(response.json()['progress_url']).json()['status'], 'COMPLETED')
+        dataset = Dataset.objects.get(name='ledger')
+        self.assertEqual(dataset.row_count, 300)
+        with dataset.file.open('rb') as handle:
+            self.assertEqual(handle.read(), content)
+    
+    def test_complete_rejects_mislabelled_compressed_upload(self):
+        """Test that completion checks a compressed upload's header against its suffix"""
+        upload = self.start(filename='ledger.csv.bz2')
+        self.send(upload, 0, self.content)
+        response = self.client.post(upload['complete_url'], '{}', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('not bz2 compressed', response.json()['error'])
+    
+    def test_api_key_uploads_as_its_owner(self):
+        """Test that an API key acts as its owner without a CSRF token, and a key without an owner can't upload"""
+        client = Client(enforce_csrf_checks=True)
+        APIKey.objects.create(name='loader', key='dqw-loader-key', owner=self.user)
+        APIKey.objects.create(name='shared', key='dqw-shared-key')
+        body = json.dumps({'name': 'ledger', 'filename': 'ledger.csv'})
+        
+        response = client.post(reverse('api:upload_create'), body, content_type='application/json', HTTP_X_API_KEY='dqw-loader-key')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(DatasetUpload.objects.get(pk=response.json()['upload_id']).owner, self.user)
+        
+        response = client.post(reverse('api:upload_create'), body, content_type='application/json', HTTP_X_API_KEY='dqw-shared-key')
+        self.assertEqual(response.status_code, 403)
+    
+    def test_session_uploads_need_a_csrf_token(self):
+        """Test that a session-authenticated upload is refused without a CSRF token"""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(
+            reverse('api:upload_create'), json.dumps({'name': 'ledger', 'filename': 'ledger.csv'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class PrometheusMetricsTest(TestCase):
+    def setUp(self):
+        # Drop deltas recorded by earlier tests
+        get_metrics_buffer().flush()
+        MetricSeries.objects.all().delete()
+        self.user = User.objects.create_user(username='scraper', password='testpass123')
+        self.client.force_login(self.user)
+        self.dataset = Dataset.objects.create(name='orders', source_type='CSV', owner=self.user)
+        self.rule = Rule.objects.create(
+            name='order id present', dataset=self.dataset, rule_type='NOT_NULL',
+            dsl_expression='NOT_NULL(id)', owner=self.user
+        )
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.content.decode().splitlines()
+
+    def test_request_latency_and_queries_are_recorded_per_view(self):
+        """Test that API requests show up as a latency histogram and query counter"""
+        self.client.get(reverse('api:incident_list'))
+        self.client.get(reverse('api:incident_list'))
+        lines = self.scrape()
+        
+        self.assertIn('# TYPE dqw_http_request_duration_seconds histogram', lines)
+        self.assertIn('dqw_http_request_duration_seconds_count{view="api:incident_list",method="GET"} 2', lines)
+        self.assertIn('dqw_http_request_duration_seconds_bucket{view="api:incident_list",method="GET",le="+Inf"} 2', lines)
+        queries = [line for line in lines if line.startswith('dqw_http_db_queries_total{view="api:incident_list"}')]
+        self.assertEqual(len(queries), 1)
+        self.assertGreater(float(queries[0].split()[-1]), 0)
+
+    def test_nonstandard_methods_share_one_label(self):
+        """Test that made-up request methods are recorded under a single 'other' label"""
+        for method in ('FOO', 'BAR'):
+            self.client.generic(method, reverse('api:incident_list'))
+        lines = self.scrape()
+        
+        self.assertIn('dqw_http_request_duration_seconds_count{view="api:incident_list",method="other"} 2', lines)
+        self.assertFalse([line for line in lines if 'method="FOO"' in line])
+
+    def test_histogram_buckets_are_cumulative_and_ordered(self):
+        """Test that buckets are emitted in ascending order with non-decreasing counts"""
+        for seconds in (0.002, 0.2, 4, 500):
+            metrics.observe('dqw_rule_run_duration_seconds', seconds, rule_type='NOT_NULL')
+        lines = [line for line in self.scrape() if line.startswith('dqw_rule_run_duration_seconds_bucket')]
+        
+        counts = [int(line.split()[-1]) for line in lines]
+        self.assertEqual(counts, sorted(counts))
+        self.assertTrue(lines[0].endswith('le="0.005"} 1'))
+        self.assertEqual(len(lines), len(metrics.DURATION_BUCKETS) + 1)
+        self.assertTrue(lines[-1].endswith('le="+Inf"} 4'))
+
+    def test_incidents_and_queue_wait_are_counted(self):
+        """Test that new incidents and Celery queue wait are recorded"""
+        incident = Incident.objects.create(
+            rule=self.rule, dataset=self.dataset, title='Null ids', description='Null ids', severity='HIGH'
+        )
+        incident.status = 'RESOLVED'
+        incident.save()
+        
+        headers = {}
+        stamp_task_publish_time(headers=headers)
+        task = SimpleNamespace(
+            name='apps.rules.tasks.execute_rule_task',
+            request=SimpleNamespace(dqw_published_at=headers['dqw_published_at'] - 3),
+        )
+        record_task_queue_wait(task=task)
+        lines = self.scrape()
+        
+        self.assertIn('dqw_incidents_created_total{severity="HIGH"} 1', lines)
+        self.assertIn('dqw_celery_queue_wait_seconds_count{task="apps.rules.tasks.execute_rule_task"} 1', lines)
+        self.assertIn('dqw_celery_queue_wait_seconds_bucket{task="apps.rules.tasks.execute_rule_task",le="1.0"} 0', lines)
+
+    def test_scrape_includes_deltas_flushed_by_other_processes(self):
+        """Test that series written by another process are part of the exposition"""
+        MetricSeries.objects.create(name='dqw_rule_runs_total', labels='status="FAILED"', value=7)
+        metrics.inc('dqw_rule_runs_total', status='FAILED')
+        
+        self.assertIn('dqw_rule_runs_total{status="FAILED"} 8', self.scrape())
+
+
+class APIRequestLogTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='latency', password='testpass123')
+        self.client.force_login(self.user)
+    
+    def test_api_requests_are_logged_by_url_pattern(self):
+        """Test that /api/ requests are logged under their URL pattern and other paths are not"""
+        self.client.get(reverse('api:upload_detail', args=['7c1d9d5e-0d3a-4f57-9c8e-3d7f6f6f0b11']), HTTP_USER_AGENT='probe/1.0')
+        self.client.get(reverse('api:incident_list'))
+        self.client.get(reverse('metrics'))
+        
+        logs = {log.endpoint: log for log in APILog.objects.all()}
+        self.assertEqual(set(logs), {'/api/uploads/<uuid:upload_id>/', '/api/incidents/'})
+        upload_log = logs['/api/uploads/<uuid:upload_id>/']
+        self.assertEqual(upload_log.response_status, 404)
+        self.assertEqual(upload_log.method, 'GET')
+        self.assertEqual(upload_log.user_agent, 'probe/1.0')
+        self.assertEqual(upload_log.ip_address, '127.0.0.1')
+        self.assertGreater(logs['/api/incidents/'].response_time, 0)
+    
+    @override_settings(API_LOG_WRITER='buffered')
+    @patch.object(BufferedAPILogWriter, '_ensure_thread')
+    def test_buffered_logs_are_written_on_flush(self, _):
+        """Test that buffered request logs are held back and bulk inserted on flush"""
+        self.addCleanup(get_api_log_writer()._drain)
+        self.client.get(reverse('api:incident_list'))
+        self.client.get(reverse('api:rule_run_stats'))
+        self.assertFalse(APILog.objects.exists())
+        
+        self.assertEqual(get_api_log_writer().flush(), 2)
+        self.assertEqual(APILog.objects.count(), 2)
+    
+    def test_latency_percentiles_per_endpoint(self):
+        """Test that the latency report gives nearest-rank percentiles per endpoint and method"""
+        now = timezone.now()
+        APILog.objects.bulk_create(
+            [
+                APILog(endpoint='/api/incidents/', method='GET', ip_address='10.0.0.1',
+                       response_status=500 if ms == 100 else 200, response_time=ms, created_at=now)
+                for ms in range(1, 101)
+            ] + [
+                APILog(endpoint='/api/rules/run/', method='POST', ip_address='10.0.0.1',
+                       response_status=200, response_time=ms, created_at=now)
+                for ms in (400, 500)
+            ] + [
+                APILog(endpoint='/api/rules/run/', method='POST', ip_address='10.0.0.1',
+                       response_status=200, response_time=9000, created_at=now - timedelta(days=2))
+            ]
+        )
+        
+        response = self.client.get(reverse('api:endpoint_latency'), {'sort': 'p50_ms'})
+        self.assertEqual(response.status_code, 200)
+        endpoints = response.json()['endpoints']
+        self.assertEqual([row['endpoint'] for row in endpoints], ['/api/rules/run/', '/api/incidents/'])
+        run, incidents = endpoints
+        self.assertEqual((run['requests'], run['p50_ms'], run['p99_ms'], run['max_ms']), (2, 400, 500, 500))
+        self.assertEqual(
+            (incidents['p50_ms'], incidents['p95_ms'], incidents['p99_ms'], incidents['errors']), (50, 95, 99, 1)
+        )
+        
+        filtered = self.client.get(reverse('api:endpoint_latency'), {'endpoint': '/api/incidents/'}).json()
+        self.assertEqual([row['endpoint'] for row in filtered['endpoints']], ['/api/incidents/'])
+        self.assertEqual(self.client.get(reverse('api:endpoint_latency'), {'sort': 'median'}).status_code, 400)
+    
+    def test_prune_removes_expired_logs(self):
+        """Test that logs past the retention window are deleted"""
+        APILog.objects.create(endpoint='/api/incidents/', method='GET', ip_address='10.0.0.1',
+                              response_status=200, response_time=5, created_at=timezone.now() - timedelta(days=40))
+        APILog.objects.create(endpoint='/api/incidents/', method='GET', ip_address='10.0.0.1',
+                              response_status=200, response_time=5)
+        
+        self.assertEqual(prune_api_logs(days=30), 1)
+        self.assertEqual(APILog.objects.count(), 1)
+
+
+@override_settings(API_RATE_LIMIT_PER_SECOND=1.0, API_RATE_LIMIT_BURST=3)
+class APIKeyAuthTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.api_key = APIKey.objects.create(name='ci', key='dqw-test-key')
+        self.url = reverse('api:rule_run_stats')
+    
+    def test_requests_need_a_valid_key_or_session(self):
+        """Test that anonymous and bad-key requests are refused and a valid key is accepted and logged"""
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.assertEqual(self.client.get(self.url, HTTP_X_API_KEY='wrong').status_code, 401)
+        self.assertEqual(self.client.get(self.url, HTTP_X_API_KEY='dqw-test-key').status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Api-Key dqw-test-key').status_code, 200)
+        self.assertEqual(APILog.objects.filter(api_key=self.api_key).count(), 2)
+        
+        self.client.force_login(User.objects.create_user(username='session', password='testpass123'))
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+    
+    def test_key_lookups_are_cached_and_invalidated(self):
+        """Test that a cached key skips the database and deactivating or expiring it takes effect"""
+        self.client.get(self.url, HTTP_X_API_KEY='dqw-test-key')
+        self.assertIsNotNone(lookup_api_key('dqw-test-key'))
+        with self.assertNumQueries(0):
+            self.assertEqual(lookup_api_key('dqw-test-key'), self.api_key)
+        
+        self.api_key.is_active = False
+        self.api_key.save()
+        self.assertEqual(self.client.get(self.url, HTTP_X_API_KEY='dqw-test-key').status_code, 401)
+        
+        self.api_key.is_active = True
+        self.api_key.expires_at = timezone.now() + timedelta(seconds=30)
+        self.api_key.save()
+        self.assertIsNotNone(lookup_api_key('dqw-test-key'))
+        with patch('apps.api.auth.timezone.now', return_value=timezone.now() + timedelta(minutes=1)):
+            self.assertIsNone(lookup_api_key('dqw-test-key'))
+    
+    def test_deactivating_the_owner_drops_cached_keys(self):
+        """Test that a cached key stops working as soon as its owner is deactivated"""
+        owner = User.objects.create_user(username='keyholder', password='testpass123')
+        APIKey.objects.create(name='owned', key='dqw-owned-key', owner=owner)
+        self.assertEqual(lookup_api_key('dqw-owned-key').owner, owner)
+        
+        owner.is_active = False
+        owner.save()
+        self.assertIsNone(lookup_api_key('dqw-owned-key'))
+    
+    def test_concurrent_requests_cannot_overdraw_a_bucket(self):
+        """Test that tokens taken from many threads at once never exceed the burst"""
+        now = time.time()
+        results = []
+        
+        def draw():
+            for _ in range(5):
+                results.append(consume_tokens('key:concurrent')[0])
+        
+        with patch('apps.api.auth.time.time', return_value=now):
+            threads = [threading.Thread(target=draw) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(results.count(True), 3)
+    
+    def test_token_bucket_limits_each_key(self):
+        """Test that a key is refused with 429 once its bucket is empty, without affecting other keys"""
+        statuses = [self.client.get(self.url, HTTP_X_API_KEY='dqw-test-key').status_code for _ in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        limited = self.client.get(self.url, HTTP_X_API_KEY='dqw-test-key')
+        self.assertEqual(limited['Retry-After'], '1')
+        
+        APIKey.objects.create(name='other', key='dqw-other-key')
+        self.assertEqual(self.client.get(self.url, HTTP_X_API_KEY='dqw-other-key').status_code, 200)
+        
+        with patch('apps.api.auth.time.time', return_value=time.time() + 2):
+            self.assertEqual(self.client.get(self.url, HTTP_X_API_KEY='dqw-test-key').status_code, 200)
+    
+    def test_session_posts_need_a_csrf_token(self):
+        """Test that a cross-site POST riding a session cookie is refused, while a key-authenticated one needs no token"""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(User.objects.create_user(username='victim', password='testpass123'))
+        response = client.post(reverse('api:run_rules'), json.dumps({'rule_ids': []}), content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        
+        response = client.post(
+            reverse('api:run_rules'), json.dumps({'rule_ids': []}),
+            content_type='application/json', HTTP_X_API_KEY='dqw-test-key'
+        )
+        self.assertEqual(response.status_code, 400)
+    
+    @patch('apps.rules.tasks.run_rule_batch_task.apply_async')
+    def test_rule_runs_cost_a_token_each(self, apply_async):
+        """Test that triggering rule runs draws one token per queued rule"""
+        response = self.client.post(
+            reverse('api:run_rules'), json.dumps({'rule_ids': [1, 2, 3]}),
+            content_type='application/json', HTTP_X_API_KEY='dqw-test-key'
+        )
+        self.assertEqual(response.status_code, 429)
+        apply_async.assert_not_called()
+
+
+class BackgroundFlushTest(TransactionTestCase):
+    """
+    The shipped buffered writers, flushed by their own background threads
+    """
+    
+    def setUp(self):
+        # Deltas recorded by earlier tests would otherwise land in this test's rows
+        buffer = get_metrics_buffer()
+        with buffer._lock:
+            buffer._deltas = {}
+        get_api_log_writer()._drain()
+
+    def wait_for(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if condition():
+                    return
+            except OperationalError:
+                # The in-memory test database locks the table while the flusher writes
+                pass
+            if time.monotonic() > deadline:
+                self.fail('Background flush did not happen in time')
+            time.sleep(0.05)
+    
+    @override_settings(API_LOG_WRITER='buffered', API_LOG_FLUSH_INTERVAL=0.05)
+    def test_api_logs_are_flushed_by_the_writer_thread(self):
+        """Test that buffered request logs reach the database without an explicit flush"""
+        user = User.objects.create_user(username='threaded', password='testpass123')
+        self.client.force_login(user)
+        self.client.get(reverse('api:incident_list'))
+        self.client.get(reverse('api:rule_run_stats'))
+        
+        self.wait_for(lambda: APILog.objects.count() == 2)
+        self.assertEqual(get_api_log_writer()._drain(), [])
+    
+    @override_settings(METRICS_FLUSH_INTERVAL=0.05)
+    def test_metrics_are_flushed_by_the_flusher_thread(self):
+        """Test that recorded metrics reach the shared series without a scrape"""
+        metrics.inc('dqw_rule_runs_total', 3, status='COMPLETED')
+        
+        self.wait_for(lambda: MetricSeries.objects.filter(
+            name='dqw_rule_runs_total', labels='status="COMPLETED"', value=3).exists())
+
+
+class ShippedRateLimitTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client.force_login(User.objects.create_user(username='burst', password='testpass123'))
+    
+    def test_default_bucket_refuses_requests_past_the_burst(self):
+        """Test that the shipped limit allows API_RATE_LIMIT_BURST requests at once and then returns 429"""
+        url = reverse('api:rule_run_stats')
+        now = time.time()
+        with patch('apps.api.auth.time.time', return_value=now):
+            statuses = [self.client.get(url).status_code for _ in range(settings.API_RATE_LIMIT_BURST + 1)]
+        
+        self.assertEqual(statuses[:-1], [200] * settings.API_RATE_LIMIT_BURST)
+        self.assertEqual(statuses[-1], 429)
@@ -1,5 +1,9 @@
 from django.urls import path
-from .views import DashboardStatsView, RunRulesView, IncidentListView, RuleRunStatsView, DatasetRuleRecommendationsView, DatasetQualityMetricsView
+from .views import (
+    DashboardStatsView, RunRulesView, IncidentListView, RuleRunStatsView, DatasetRuleRecommendationsView, DatasetQualityMetricsView,
+    SlowestRulesView, SlowestDatasetsView, EndpointLatencyView,
+    UploadCreateView, UploadDetailView, UploadChunkView, UploadCompleteView,
+)
 
 app_name = 'api'
 
@@ -8,6 +12,13 @@ urlpatterns = [
     path('rules/run/', RunRulesView.as_view(), name='run_rules'),
     path('incidents/', IncidentListView.as_view(), name='incident_list'),
     path('rule-runs/stats/', RuleRunStatsView.as_view(), name='rule_run_stats'),
+    path('rule-runs/slowest-rules/', SlowestRulesView.as_view(), name='slowest_rules'),
+    path('rule-runs/slowest-datasets/', SlowestDatasetsView.as_view(), name='slowest_datasets'),
+    path('logs/latency/', EndpointLatencyView.as_view(), name='endpoint_latency'),
     path('datasets/<int:dataset_id>/recommendations/', DatasetRuleRecommendationsView.as_view(), name='dataset_rule_recommendations'),
     path('datasets/<int:dataset_id>/quality-metrics/', DatasetQualityMetricsView.as_view(), name='dataset_quality_metrics'),
+    path('uploads/', UploadCreateView.as_view(), name='upload_create'),
+    path('uploads/<uuid:upload_id>/', UploadDetailView.as_view(), name='upload_detail'),
+    path('uploads/<uuid:upload_id>/chunks/', UploadChunkView.as_view(), name='upload_chunk'),
+    path('uploads/<uuid:upload_id>/complete/', UploadCompleteView.as_view(), name='upload_complete'),
 ]
\ No newline at end of file
@@ -1,19 +1,27 @@
-from django.http import JsonResponse
-from django.views.decorators.csrf import csrf_exempt
-from django.utils.decorators import method_decorator
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.views import View
-from django.db.models import Count, Sum
+from django.db.models import Avg, Count, Max, Q, Sum
 from django.utils import timezone
 from datetime import timedelta
 import json
-import pandas as pd
-from apps.datasets.models import Dataset
-from apps.rules.models import Rule, RuleRun
+from django.urls import reverse
+from apps.datasets.models import Dataset, DatasetUpload
+from apps.datasets.uploads import create_upload, append_chunk, complete_upload, UploadError, UploadOffsetMismatch
+from apps.audit.utils import log_dataset_upload
+from apps.rules.models import Rule, RuleRun, RuleRunMetrics
+from apps.rules.batches import request_rule_batches
 from apps.incidents.models import Incident
 from apps.datasets.utils import analyze_dataset_for_rules
+from apps.datasets.utils_profiling import stored_column_stats
+from apps.datasets.compression import read_csv
+from data_quality_watchtower.pagination import CursorPaginator
+from .metrics import get_metrics_buffer, render_exposition
+from .request_log import endpoint_latency
+from .auth import consume_tokens, rate_limit_identity, rate_limited_response
+from data_quality_watchtower.exports import EXPORT_FORMATS, streaming_export_response
 
 
-@method_decorator(csrf_exempt, name='dispatch')
 class DashboardStatsView(View):
     """
     API endpoint to return dashboard statistics as JSON
@@ -112,7 +120,6 @@ class DashboardStatsView(View):
         return quality_scores
 
 
-@method_decorator(csrf_exempt, name='dispatch')
 class RunRulesView(View):
     """
     API endpoint to trigger rule execution
@@ -126,20 +133,33 @@ class RunRulesView(View):
             if not rule_ids:
                 return JsonResponse({'error': 'No rule IDs provided'}, status=400)
             
-            # Trigger rule execution tasks
-            from apps.rules.tasks import run_single_rule_task
-            task_results = []
+            # Each queued execution costs a token on top of the request itself
+            allowed, retry_after = consume_tokens(
+                rate_limit_identity(request), min(len(rule_ids), settings.API_RATE_LIMIT_BURST)
+            )
+            if not allowed:
+                return rate_limited_response(retry_after)
             
-            for rule_id in rule_ids:
-                try:
-                    result = run_single_rule_task.delay(rule_id)
-                    task_results.append({'rule_id': rule_id, 'task_id': result.id})
-                except Exception as e:
-                    task_results.append({'rule_id': rule_id, 'error': str(e)})
+            # One batch task per dataset; requests overlapping a batch in flight join it
+            batches, errors = request_rule_batches(rule_ids)
+            task_results = [
+                {'rule_id': rule_id, 'task_id': str(batch.id)}
+                for batch, batch_rule_ids, _ in batches for rule_id in batch_rule_ids
+            ] + [{'rule_id': rule_id, 'error': error} for rule_id, error in errors.items()]
             
             return JsonResponse({
-                'message': f'Started execution for {len(task_results)} rules',
-                'results': task_results
+                'message': f'Started execution for {len(task_results) - len(errors)} rules',
+                'results': task_results,
+                'batches': [
+                    {
+                        'task_id': str(batch.id),
+                        'dataset_id': batch.dataset_id,
+                        'rule_ids': batch_rule_ids,
+                        'status': batch.status,
+                        'coalesced': coalesced,
+                    }
+                    for batch, batch_rule_ids, coalesced in batches
+                ],
             })
         except json.JSONDecodeError:
             return JsonResponse({'error': 'Invalid JSON data'}, status=400)
@@ -147,33 +167,110 @@ class RunRulesView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 
-@method_decorator(csrf_exempt, name='dispatch')
+# API field name -> ORM lookup, so only the requested columns (and joins) are queried
+INCIDENT_API_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'severity': 'severity',
+    'status': 'status',
+    'sla_status': 'sla_status',
+    'dataset': 'dataset__name',
+    'dataset_id': 'dataset_id',
+    'rule': 'rule__name',
+    'rule_id': 'rule_id',
+    'assigned_to': 'assigned_to__username',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+    'acknowledged_at': 'acknowledged_at',
+    'resolved_at': 'resolved_at',
+    'occurrence_count': 'occurrence_count',
+    'last_seen_at': 'last_seen_at',
+}
+
+INCIDENT_DEFAULT_FIELDS = [
+    'id', 'title', 'description', 'severity', 'status', 'dataset', 'rule', 'created_at', 'updated_at',
+]
+
+INCIDENT_PAGE_SIZE = 100
+INCIDENT_MAX_PAGE_SIZE = 1000
+
+
 class IncidentListView(View):
     """
     API endpoint to list incidents
+
+    Query parameters:
+        status, severity: Comma-separated values to filter on
+        dataset: Dataset ID
+        fields: Comma-separated subset of INCIDENT_API_FIELDS
+        limit: Page size (default 100, max 1000)
+        cursor: next_cursor/previous_cursor from a previous page
+        format: 'ndjson' (or 'csv') streams every matching incident instead of one page; ?gzip=1 compresses it
     """
     
+    def _parse_fields(self, request):
+        requested = request.GET.get('fields')
+        if not requested:
+            return INCIDENT_DEFAULT_FIELDS
+        fields = [field.strip() for field in requested.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in INCIDENT_API_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return fields
+    
+    def _filter(self, request, incidents):
+        status = request.GET.get('status')
+        if status:
+            incidents = incidents.filter(status__in=[value.strip().upper() for value in status.split(',')])
+        
+        severity = request.GET.get('severity')
+        if severity:
+            incidents = incidents.filter(severity__in=[value.strip().upper() for value in severity.split(',')])
+        
+        dataset_id = request.GET.get('dataset')
+        if dataset_id:
+            incidents = incidents.filter(dataset_id=int(dataset_id))
+        
+        return incidents
+    
     def get(self, request):
-        incidents = Incident.objects.select_related('rule', 'dataset').all()
-        
-        incident_data = []
-        for incident in incidents:
-            incident_data.append({
-                'id': incident.id,
-                'title': incident.title,
-                'description': incident.description,
-                'severity': incident.severity,
-                'status': incident.status,
-                'dataset': incident.dataset.name,
-                'rule': incident.rule.name,
-                'created_at': incident.created_at.isoformat(),
-                'updated_at': incident.updated_at.isoformat(),
-            })
+        try:
+            fields = self._parse_fields(request)
+            incidents = self._filter(request, Incident.objects.all())
+            limit = min(int(request.GET.get('limit', INCIDENT_PAGE_SIZE)), INCIDENT_MAX_PAGE_SIZE)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        if limit < 1:
+            return JsonResponse({'error': 'limit must be positive'}, status=400)
         
-        return JsonResponse({'incidents': incident_data})
+        # id and created_at are always fetched: they form the cursor
+        lookups = {'id', 'created_at'} | {INCIDENT_API_FIELDS[field] for field in fields}
+        rows = incidents.values(*lookups)
+        
+        def to_record(row):
+            record = {}
+            for field in fields:
+                value = row[INCIDENT_API_FIELDS[field]]
+                record[field] = value.isoformat() if hasattr(value, 'isoformat') else value
+            return record
+        
+        if request.GET.get('format') in EXPORT_FORMATS:
+            rows = rows.order_by('-created_at', '-id')
+            return streaming_export_response(
+                request, rows, 'incidents', fields,
+                lambda row: list(to_record(row).values()), to_record
+            )
+        
+        page = CursorPaginator(rows, limit, 'created_at').get_page(request.GET.get('cursor'))
+        
+        return JsonResponse({
+            'incidents': [to_record(row) for row in page],
+            'next_cursor': page.next_cursor,
+            'previous_cursor': page.previous_cursor,
+        })
 
 
-@method_decorator(csrf_exempt, name='dispatch')
 class RuleRunStatsView(View):
     """
     API endpoint to get rule run statistics
@@ -222,7 +319,133 @@ class RuleRunStatsView(View):
         return JsonResponse(payload)
 
 
-@method_decorator(csrf_exempt, name='dispatch')
+SLOWEST_DEFAULT_DAYS = 7
+SLOWEST_PAGE_SIZE = 10
+SLOWEST_MAX_PAGE_SIZE = 100
+SLOWEST_SORT_FIELDS = {'avg': 'avg_seconds', 'max': 'max_seconds', 'total': 'total_seconds'}
+
+
+class SlowestRunsMixin:
+    """
+    Rank rules or datasets by their recorded run time. Views set `fields`,
+    the response names of the RuleRunMetrics fields runs are grouped by,
+    and `key`, the response list's name.
+
+    Query parameters:
+        days: Only runs started in the last N days (default 7)
+        limit: Number of entries (default 10, max 100)
+        sort: 'avg' (default), 'max' or 'total' run seconds
+    """
+    fields = {}
+    key = None
+    
+    def get(self, request):
+        try:
+            days = int(request.GET.get('days', SLOWEST_DEFAULT_DAYS))
+            limit = min(int(request.GET.get('limit', SLOWEST_PAGE_SIZE)), SLOWEST_MAX_PAGE_SIZE)
+        except ValueError:
+            return JsonResponse({'error': 'days and limit must be integers'}, status=400)
+        sort = request.GET.get('sort', 'avg')
+        if days < 1 or limit < 1 or sort not in SLOWEST_SORT_FIELDS:
+            return JsonResponse({'error': f"days and limit must be positive and sort one of {', '.join(SLOWEST_SORT_FIELDS)}"}, status=400)
+        
+        stage_averages = {f'avg_{stage}_seconds': Avg(f'{stage}_seconds') for stage in RuleRunMetrics.STAGES}
+        rows = (
+            RuleRunMetrics.objects
+            .filter(rule_run__started_at__gte=timezone.now() - timedelta(days=days))
+            .values(*self.fields.values())
+            .annotate(
+                runs=Count('id'),
+                avg_seconds=Avg('total_seconds'),
+                max_seconds=Max('total_seconds'),
+                total_seconds=Sum('total_seconds'),
+                avg_rows_per_second=Avg('rows_per_second'),
+                bytes_read=Sum('bytes_read'),
+                peak_memory_bytes=Max('peak_memory_bytes'),
+                cached_runs=Count('id', filter=Q(cached=True)),
+                **stage_averages,
+            )
+            .order_by(f'-{SLOWEST_SORT_FIELDS[sort]}')[:limit]
+        )
+        
+        return JsonResponse({
+            'days': days,
+            'sort': sort,
+            self.key: [
+                {
+                    **{name: row[field] for name, field in self.fields.items()},
+                    'runs': row['runs'],
+                    'cached_runs': row['cached_runs'],
+                    'avg_seconds': round(row['avg_seconds'], 6),
+                    'max_seconds': round(row['max_seconds'], 6),
+                    'total_seconds': round(row['total_seconds'], 6),
+                    'avg_stage_seconds': {stage: round(row[f'avg_{stage}_seconds'], 6) for stage in RuleRunMetrics.STAGES},
+                    'avg_rows_per_second': round(row['avg_rows_per_second'], 1),
+                    'bytes_read': row['bytes_read'],
+                    'peak_memory_bytes': row['peak_memory_bytes'],
+                }
+                for row in rows
+            ],
+        })
+
+
+class SlowestRulesView(SlowestRunsMixin, View):
+    """
+    API endpoint ranking rules by run time, with the average per-stage breakdown
+    """
+    fields = {
+        'rule_id': 'rule_run__rule_id',
+        'rule_name': 'rule_run__rule__name',
+        'dataset_id': 'rule_run__dataset_id',
+        'dataset_name': 'rule_run__dataset__name',
+    }
+    key = 'rules'
+
+
+class SlowestDatasetsView(SlowestRunsMixin, View):
+    """
+    API endpoint ranking datasets by the run time of their rules
+    """
+    fields = {
+        'dataset_id': 'rule_run__dataset_id',
+        'dataset_name': 'rule_run__dataset__name',
+    }
+    key = 'datasets'
+
+
+LATENCY_DEFAULT_HOURS = 24
+LATENCY_SORT_FIELDS = ('p50_ms', 'p95_ms', 'p99_ms', 'avg_ms', 'max_ms', 'requests')
+
+
+class EndpointLatencyView(View):
+    """
+    API endpoint reporting p50/p95/p99 response times per API endpoint from the request logs
+
+    Query parameters:
+        hours: Only requests in the last N hours (default 24)
+        endpoint: Only this URL pattern, e.g. /api/incidents/
+        method: Only this HTTP method
+        sort: 'p95_ms' (default), 'p50_ms', 'p99_ms', 'avg_ms', 'max_ms' or 'requests'
+    """
+    
+    def get(self, request):
+        try:
+            hours = int(request.GET.get('hours', LATENCY_DEFAULT_HOURS))
+        except ValueError:
+            return JsonResponse({'error': 'hours must be an integer'}, status=400)
+        sort = request.GET.get('sort', 'p95_ms')
+        if hours < 1 or sort not in LATENCY_SORT_FIELDS:
+            return JsonResponse({'error': f"hours must be positive and sort one of {', '.join(LATENCY_SORT_FIELDS)}"}, status=400)
+        
+        endpoints = endpoint_latency(
+            timezone.now() - timedelta(hours=hours),
+            endpoint=request.GET.get('endpoint'),
+            method=request.GET.get('method'),
+        )
+        endpoints.sort(key=lambda row: row[sort], reverse=True)
+        return JsonResponse({'hours': hours, 'sort': sort, 'endpoints': endpoints})
+
+
 class DatasetRuleRecommendationsView(View):
     """
     API endpoint to get rule recommendations for a dataset
@@ -240,20 +463,13 @@ class DatasetRuleRecommendationsView(View):
             # Try to read the CSV file
             try:
                 # Try multiple encodings
-                encodings = ['utf-8', 'latin1', 'cp1252']
-                df = None
-                for encoding in encodings:
-                    try:
-                        df = pd.read_csv(dataset.file.path, encoding=encoding)
-                        break
-                    except UnicodeDecodeError:
-                        continue
-                
-                if df is None:
-                    return JsonResponse({'error': 'Unable to read CSV file with supported encodings'}, status=400)
+                try:
+                    df = read_csv(dataset.file.path)
+                except ValueError as e:
+                    return JsonResponse({'error': str(e)}, status=400)
                 
                 # Analyze dataset for rule recommendations
-                recommendations = analyze_dataset_for_rules(df)
+                recommendations = analyze_dataset_for_rules(df, stored_column_stats(dataset))
                 
                 return JsonResponse({
                     'status': 'completed',
@@ -269,7 +485,6 @@ class DatasetRuleRecommendationsView(View):
             return JsonResponse({'error': str(e)}, status=500)
 
 
-@method_decorator(csrf_exempt, name='dispatch')
 class DatasetQualityMetricsView(View):
     """
     API endpoint to get detailed quality metrics for a specific dataset
@@ -371,4 +586,133 @@ class DatasetQualityMetricsView(View):
             'total_violations': total_violations,
             'latest_run_date': latest_run_date,
             'rules_executed': rules_executed,
-        }
\ No newline at end of file
+        }
+
+
+class UploadMixin:
+    """
+    Access to the requesting user's chunked uploads: the session user, or
+    the owner of the API key sent. Session requests must pass the CSRF check.
+    """
+    
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            if getattr(request, 'api_key', None) is not None:
+                return JsonResponse({'error': 'API key has no owner to upload as'}, status=403)
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+        return super().dispatch(request, *args, **kwargs)
+    
+    def get_upload(self, request, upload_id):
+        return DatasetUpload.objects.filter(pk=upload_id, owner=request.user).first()
+
+
+class UploadCreateView(UploadMixin, View):
+    """
+    API endpoint to start a chunked, resumable CSV upload.
+    
+    POST {"name", "filename", "description"?, "total_size"?} returns the
+    upload id and the offset (0) to send the first chunk at.
+    """
+    
+    def post(self, request):
+        try:
+            data = json.loads(request.body or b'{}')
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        
+        total_size = data.get('total_size')
+        if total_size is not None and (not isinstance(total_size, int) or total_size < 0):
+            return JsonResponse({'error': 'total_size must be a non-negative integer'}, status=400)
+        
+        try:
+            upload = create_upload(
+                request.user, data.get('name', '').strip(), data.get('filename', ''),
+                description=data.get('description', ''), total_size=total_size,
+            )
+        except UploadError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        return JsonResponse({
+            **upload.to_dict(),
+            'chunk_url': reverse('api:upload_chunk', args=[upload.id]),
+            'complete_url': reverse('api:upload_complete', args=[upload.id]),
+        }, status=201)
+
+
+class UploadDetailView(UploadMixin, View):
+    """
+    API endpoint reporting an upload's offset, so an interrupted client knows where to resume
+    """
+    
+    def get(self, request, upload_id):
+        upload = self.get_upload(request, upload_id)
+        if upload is None:
+            return JsonResponse({'error': 'Upload not found'}, status=404)
+        return JsonResponse(upload.to_dict())
+
+
+class UploadChunkView(UploadMixin, View):
+    """
+    API endpoint to append one chunk to an upload.
+    
+    The request body is the raw chunk and the Upload-Offset header its
+    starting byte. It is streamed into the dataset file without buffering;
+    a wrong offset gets 409 with the offset to resume from.
+    """
+    
+    def post(self, request, upload_id):
+        if self.get_upload(request, upload_id) is None:
+            return JsonResponse({'error': 'Upload not found'}, status=404)
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+        except ValueError:
+            return JsonResponse({'error': 'Upload-Offset header is required'}, status=400)
+        
+        try:
+            upload = append_chunk(upload_id, offset, request)
+        except UploadOffsetMismatch as e:
+            return JsonResponse({'error': str(e), 'offset': e.expected}, status=409)
+        except UploadError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        return JsonResponse(upload.to_dict())
+    
+    put = post
+
+
+class UploadCompleteView(UploadMixin, View):
+    """
+    API endpoint to finish an upload: creates the dataset and starts its
+    ingestion. An optional {"sha256"} is checked against the received data.
+    """
+    
+    def post(self, request, upload_id):
+        if self.get_upload(request, upload_id) is None:
+            return JsonResponse({'error': 'Upload not found'}, status=404)
+        try:
+            data = json.loads(request.body or b'{}')
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        
+        try:
+            upload, ingestion = complete_upload(upload_id, data.get('sha256'))
+        except UploadError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        log_dataset_upload(request.user, upload.dataset, request.META.get('REMOTE_ADDR'))
+        return JsonResponse({
+            **upload.to_dict(),
+            'ingestion_id': str(ingestion.id),
+            'progress_url': reverse('datasets:ingestion_progress', args=[ingestion.id]),
+        }, status=202)
+
+
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint: every metric series, summed over all web and
+    worker processes, in the text exposition format
+    """
+    
+    def get(self, request):
+        get_metrics_buffer().flush()
+        return HttpResponse(render_exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,327 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime, time, timedelta
+from itertools import islice
+from types import SimpleNamespace
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from data_quality_watchtower.text import tokenize
+from .models import AuditLog, AuditArchivePartition
+
+logger = logging.getLogger(__name__)
+
+ACTION_LABELS = dict(AuditLog.ACTION_TYPES)
+
+
+def get_archive_root():
+    return str(getattr(settings, 'AUDIT_ARCHIVE_ROOT', os.path.join(settings.BASE_DIR, 'audit_archive')))
+
+
+def partition_path(day):
+    """
+    Relative path of the cold-tier file for one UTC day, e.g. 2026/01/audit-2026-01-31.ndjson.gz
+    """
+    return os.path.join(f'{day:%Y}', f'{day:%m}', f'audit-{day:%Y-%m-%d}.ndjson.gz')
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min), timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def serialize_log(log):
+    """
+    Archive record for one AuditLog row (one NDJSON line)
+    """
+    return {
+        'id': log.id,
+        'timestamp': log.timestamp.isoformat(),
+        'actor_id': log.actor_id,
+        'actor': log.actor.username,
+        'action_type': log.action_type,
+        'target_type': log.target_type,
+        'target_id': log.target_id,
+        'before': log.before,
+        'after': log.after,
+        'ip_address': log.ip_address,
+        'search_text': log.search_text,
+    }
+
+
+class ArchivedAuditLog:
+    """
+    Read-only stand-in for an AuditLog row loaded from the cold tier.
+
+    Exposes the attributes the audit list template and exports use.
+    """
+    is_archived = True
+
+    def __init__(self, record):
+        self.id = record['id']
+        self.timestamp = parse_datetime(record['timestamp'])
+        self.actor_id = record['actor_id']
+        self.actor = SimpleNamespace(id=record['actor_id'], username=record['actor'])
+        self.action_type = record['action_type']
+        self.target_type = record['target_type']
+        self.target_id = record['target_id']
+        self.before = record['before']
+        self.after = record['after']
+        self.ip_address = record['ip_address']
+        self.search_text = record.get('search_text', '')
+
+    def get_action_type_display(self):
+        return ACTION_LABELS.get(self.action_type, self.action_type)
+
+
+def _write_partition(day, logs):
+    """
+    Append rows to a day's partition as a new gzip member.
+
+    The existing file is copied to a temp file, the new member is appended,
+    and the result is renamed into place, so a crash never leaves a
+    truncated partition. Returns (relative_path, rows_written, max_id,
+    distinct_rows, size_bytes); distinct_rows counts the whole file, so a
+    re-run after a crash doesn't count its duplicates twice.
+    """
+    root = get_archive_root()
+    relative_path = partition_path(day)
+    final_path = os.path.join(root, relative_path)
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(final_path), suffix='.tmp')
+    written = 0
+    max_id = None
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            if os.path.exists(final_path):
+                with open(final_path, 'rb') as existing:
+                    shutil.copyfileobj(existing, raw)
+            with gzip.GzipFile(fileobj=raw, mode='wb') as member:
+                for log in logs:
+                    line = json.dumps(serialize_log(log), cls=DjangoJSONEncoder) + '\n'
+                    member.write(line.encode('utf-8'))
+                    written += 1
+                    max_id = log.id if max_id is None else max(max_id, log.id)
+            raw.flush()
+            os.fsync(raw.fileno())
+        distinct_rows = len(_load_records(temp_path))
+        os.replace(temp_path, final_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return relative_path, written, max_id, distinct_rows, os.path.getsize(final_path)
+
+
+def archive_audit_logs(retention_days=None):
+    """
+    Move audit rows older than the retention window into daily gzip partitions.
+
+    Whole UTC days are archived oldest first; each day's rows are written and
+    fsynced before they are deleted from the hot table. Re-running after a
+    crash is safe: duplicates in a partition are dropped on read.
+
+    Returns a list of {'day', 'rows'} dicts, one per archived day.
+    """
+    if retention_days is None:
+        retention_days = getattr(settings, 'AUDIT_RETENTION_DAYS', 90)
+    cutoff_day = (timezone.now() - timedelta(days=retention_days)).astimezone(timezone.utc).date()
+    cutoff, _ = _day_bounds(cutoff_day)
+
+    summary = []
+    while True:
+        oldest = AuditLog.objects.filter(timestamp__lt=cutoff).order_by('timestamp').values_list('timestamp', flat=True).first()
+        if oldest is None:
+            break
+
+        day = oldest.astimezone(timezone.utc).date()
+        start, end = _day_bounds(day)
+        day_logs = AuditLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        rows = day_logs.select_related('actor').order_by('timestamp', 'id').iterator(chunk_size=2000)
+
+        relative_path, written, max_id, distinct_rows, size_bytes = _write_partition(day, rows)
+        if written:
+            day_logs.filter(id__lte=max_id).delete()
+
+        partition, created = AuditArchivePartition.objects.get_or_create(day=day, defaults={'path': relative_path})
+        partition.path = relative_path
+        partition.row_count = distinct_rows
+        partition.size_bytes = size_bytes
+        partition.save()
+
+        logger.info(f"Archived {written} audit log entries for {day} to {relative_path}")
+        summary.append({'day': day.isoformat(), 'rows': written})
+
+    return summary
+
+
+def _load_records(path):
+    # Later copies of an id (from a re-run after a crash) replace earlier ones
+    records = {}
+    with gzip.open(path, 'rt', encoding='utf-8') as handle:
+        for line in handle:
+            if line.strip():
+                record = json.loads(line)
+                records[record['id']] = record
+    return records
+
+
+def _read_partition(partition):
+    """
+    Records of one partition, newest first, de-duplicated by id
+    """
+    path = os.path.join(get_archive_root(), partition.path)
+    if not os.path.exists(path):
+        logger.error(f"Audit archive partition missing: {path}")
+        return []
+    return sorted(_load_records(path).values(), key=lambda r: (r['timestamp'], r['id']), reverse=True)
+
+
+def archive_partitions(date_from=None, date_to=None):
+    """
+    Partitions whose day falls in the date range (YYYY-MM-DD, either end
+    open), newest first
+    """
+    first_day = parse_date(date_from) if date_from else None
+    last_day = parse_date(date_to) if date_to else None
+    partitions = AuditArchivePartition.objects.order_by('-day')
+    if first_day:
+        partitions = partitions.filter(day__gte=first_day)
+    if last_day:
+        partitions = partitions.filter(day__lte=last_day)
+    return partitions
+
+
+def archive_reaches(date_from=None, date_to=None, include=False):
+    """
+    True if a list should read the archive: its date_from is explicitly set
+    on or before an archived day, or the archive was asked for with
+    `include` (then a range with no lower bound reaches every archived day
+    up to date_to). Lists without either stay on the hot table.
+    """
+    if not date_from and not include:
+        return False
+    return archive_partitions(date_from, date_to).exists()
+
+
+def _matching_records(partition, search=None, action=None, user=None):
+    terms = tokenize(search) if search else []
+    for record in _read_partition(partition):
+        if action and record['action_type'] != action:
+            continue
+        if user and record['actor'] != user:
+            continue
+        if terms:
+            words = record.get('search_text', '').split()
+            if not all(any(word.startswith(term) for word in words) for term in terms):
+                continue
+        yield record
+
+
+def iter_archived_logs(date_from=None, date_to=None, search=None, action=None, user=None):
+    """
+    Yield ArchivedAuditLog objects matching the audit list filters, newest first.
+
+    Only partitions inside the date range are opened, and only one day is
+    held in memory at a time.
+    """
+    for partition in archive_partitions(date_from, date_to):
+        for record in _matching_records(partition, search, action, user):
+            yield ArchivedAuditLog(record)
+
+
+class TieredAuditLogList:
+    """
+    Sliceable view over hot rows followed by archived rows.
+
+    Every archived entry is older than every hot one, so the combined
+    newest-first ordering is simply the hot queryset then the archive.
+    Works with django.core.paginator.Paginator.
+
+    Matching entries per partition are counted once and kept, so paging
+    only opens the partitions a page overlaps. Without search, action or
+    user filters the stored row_count is used and no partition is opened
+    to count; filtered counts are also kept in the cache for
+    AUDIT_ARCHIVE_COUNT_CACHE_SECONDS, so paging through a filtered list
+    doesn't re-read every partition on each request.
+    """
+
+    def __init__(self, hot_queryset, date_from=None, date_to=None, **record_filters):
+        self.hot_queryset = hot_queryset
+        self.date_range = (date_from, date_to)
+        self.record_filters = {name: value for name, value in record_filters.items() if value}
+        self._hot_count = None
+        self._partition_counts = None
+
+    @property
+    def partition_counts(self):
+        """
+        [(partition, matching entries)] for the partitions in range, newest first
+        """
+        if self._partition_counts is None:
+            partitions = archive_partitions(*self.date_range)
+            if self.record_filters:
+                self._partition_counts = [(partition, self._filtered_count(partition)) for partition in partitions]
+            else:
+                self._partition_counts = [(partition, partition.row_count) for partition in partitions]
+        return self._partition_counts
+
+    def _filtered_count(self, partition):
+        # Keyed by when the partition was last written, so an append re-counts it
+        filters = '&'.join(f'{name}={value}' for name, value in sorted(self.record_filters.items()))
+        filters_digest = hashlib.sha256(filters.encode()).hexdigest()
+        cache_key = f'audit-archive-count:{partition.pk}:{partition.archived_at.timestamp()}:{filters_digest}'
+        count = cache.get(cache_key)
+        if count is None:
+            count = sum(1 for _ in _matching_records(partition, **self.record_filters))
+            cache.set(cache_key, count, timeout=getattr(settings, 'AUDIT_ARCHIVE_COUNT_CACHE_SECONDS', 3600))
+        return count
+
+    def _archived(self, start=0):
+        # Skip whole partitions that end before `start` without reading them
+        for partition, count in self.partition_counts:
+            if start >= count:
+                start -= count
+                continue
+            records = _matching_records(partition, **self.record_filters)
+            for record in islice(records, start, None):
+                yield ArchivedAuditLog(record)
+            start = 0
+
+    @property
+    def hot_count(self):
+        if self._hot_count is None:
+            self._hot_count = self.hot_queryset.count()
+        return self._hot_count
+
+    def count(self):
+        return self.hot_count + sum(count for _, count in self.partition_counts)
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        yield from self.hot_queryset.iterator(chunk_size=2000)
+        yield from self._archived()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = key.stop if key.stop is not None else self.count()
+        items = []
+        if start < self.hot_count:
+            items.extend(self.hot_queryset[start:min(stop, self.hot_count)])
+        if stop > self.hot_count:
+            archive_start = max(start - self.hot_count, 0)
+            items.extend(islice(self._archived(archive_start), stop - self.hot_count - archive_start))
+        return items
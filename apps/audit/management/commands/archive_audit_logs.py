@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from apps.audit.archive import archive_audit_logs
+
+
+class Command(BaseCommand):
+    help = 'Move audit log entries older than the retention window into the compressed archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=None,
+            help=f'Retention window in days (default: AUDIT_RETENTION_DAYS={settings.AUDIT_RETENTION_DAYS})',
+        )
+
+    def handle(self, *args, **options):
+        summary = archive_audit_logs(retention_days=options['older_than_days'])
+        for day in summary:
+            self.stdout.write(f"{day['day']}: {day['rows']} entries")
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {sum(day['rows'] for day in summary)} entries across {len(summary)} days")
+        )
@@ -0,0 +1,115 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:21
+
+from django.db import migrations, models
+
+
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS audit_auditlog_fts USING fts5(
+        search_text,
+        content = 'audit_auditlog',
+        content_rowid = 'id',
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_auditlog_fts_insert AFTER INSERT ON audit_auditlog BEGIN
+        INSERT INTO audit_auditlog_fts (rowid, search_text) VALUES (new.id, new.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_auditlog_fts_delete AFTER DELETE ON audit_auditlog BEGIN
+        INSERT INTO audit_auditlog_fts (audit_auditlog_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_auditlog_fts_update AFTER UPDATE OF search_text ON audit_auditlog BEGIN
+        INSERT INTO audit_auditlog_fts (audit_auditlog_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+        INSERT INTO audit_auditlog_fts (rowid, search_text) VALUES (new.id, new.search_text);
+    END
+    """,
+    "INSERT INTO audit_auditlog_fts (audit_auditlog_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS audit_auditlog_fts_insert',
+    'DROP TRIGGER IF EXISTS audit_auditlog_fts_delete',
+    'DROP TRIGGER IF EXISTS audit_auditlog_fts_update',
+    'DROP TABLE IF EXISTS audit_auditlog_fts',
+]
+
+POSTGRES_CREATE = [
+    "CREATE INDEX IF NOT EXISTS audit_auditlog_search_idx ON audit_auditlog USING GIN (to_tsvector('simple', search_text))",
+]
+
+POSTGRES_DROP = [
+    'DROP INDEX IF EXISTS audit_auditlog_search_idx',
+]
+
+
+def _flatten(value):
+    if value is None:
+        return
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield str(key)
+            yield from _flatten(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _flatten(item)
+    else:
+        yield str(value)
+
+
+def build_search_text(actor_username, action_type, target_type, before=None, after=None):
+    # Frozen copy of apps.audit.search.build_search_text as of this migration
+    parts = [actor_username or '', action_type or '', target_type or '']
+    parts.extend(_flatten(before))
+    parts.extend(_flatten(after))
+    return ' '.join(' '.join(parts).lower().split())
+
+
+def backfill_search_text(apps, schema_editor):
+    AuditLog = apps.get_model('audit', 'AuditLog')
+    batch = []
+    for log in AuditLog.objects.select_related('actor').iterator(chunk_size=2000):
+        log.search_text = build_search_text(
+            log.actor.username, log.action_type, log.target_type, log.before, log.after
+        )
+        batch.append(log)
+        if len(batch) >= 2000:
+            AuditLog.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    if batch:
+        AuditLog.objects.bulk_update(batch, ['search_text'])
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE}.get(vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}.get(vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditlog',
+            name='search_text',
+            field=models.TextField(blank=True, default='', help_text='Normalized text projection used by audit search'),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
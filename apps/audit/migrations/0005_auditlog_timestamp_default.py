@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:24
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+# Copied rather than imported so this migration never changes with the app code
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_auditlog_fts_insert AFTER INSERT ON audit_auditlog BEGIN
+        INSERT INTO audit_auditlog_fts (rowid, search_text) VALUES (new.id, new.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_auditlog_fts_delete AFTER DELETE ON audit_auditlog BEGIN
+        INSERT INTO audit_auditlog_fts (audit_auditlog_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS audit_auditlog_fts_update AFTER UPDATE OF search_text ON audit_auditlog BEGIN
+        INSERT INTO audit_auditlog_fts (audit_auditlog_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+        INSERT INTO audit_auditlog_fts (rowid, search_text) VALUES (new.id, new.search_text);
+    END
+    """,
+]
+
+
+def install_sqlite_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in SQLITE_TRIGGERS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0004_auditlog_search_text'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        # SQLite rebuilds audit_auditlog for this ALTER, which drops the FTS triggers
+        migrations.RunPython(install_sqlite_triggers, migrations.RunPython.noop),
+    ]
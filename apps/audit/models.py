@@ -1,5 +1,7 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+from .search import build_search_text
 
 class AuditLog(models.Model):
     ACTION_TYPES = [
@@ -18,16 +20,44 @@ class AuditLog(models.Model):
     target_id = models.PositiveIntegerField()
     before = models.JSONField(null=True, blank=True)
     after = models.JSONField(null=True, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)  # set at enqueue time, not at flush time
     ip_address = models.GenericIPAddressField(null=True, blank=True)
+    search_text = models.TextField(blank=True, default='', help_text="Normalized text projection used by audit search")
     
     def __str__(self):
         return f"{self.actor.username} {self.action_type} {self.target_type} at {self.timestamp}"
     
+    def save(self, *args, **kwargs):
+        # Build the search projection once, when the entry is written
+        if not self.search_text:
+            self.search_text = build_search_text(
+                self.actor.username if self.actor_id else '',
+                self.action_type,
+                self.target_type,
+                self.before,
+                self.after,
+            )
+        super().save(*args, **kwargs)
+    
     class Meta:
         ordering = ['-timestamp']
         indexes = [
             models.Index(fields=['actor', 'timestamp']),
             models.Index(fields=['target_type', 'target_id']),
             models.Index(fields=['action_type', 'timestamp']),
-        ]
\ No newline at end of file
+            models.Index(fields=['timestamp', 'id'], name='auditlog_ts_id_idx'),
+        ]
+
+class AuditArchivePartition(models.Model):
+    """One day of audit entries moved to the compressed cold tier"""
+    day = models.DateField(unique=True)
+    path = models.CharField(max_length=255, help_text="Path relative to AUDIT_ARCHIVE_ROOT")
+    row_count = models.PositiveIntegerField(default=0)
+    size_bytes = models.PositiveBigIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Audit archive {self.day} ({self.row_count} entries)"
+    
+    class Meta:
+        ordering = ['-day']
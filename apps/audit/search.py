@@ -0,0 +1,71 @@
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from data_quality_watchtower.text import tokenize
+
+FTS_TABLE = 'audit_auditlog_fts'
+
+# The FTS5 table and the triggers that keep it in step with audit_auditlog are
+# created by migration 0004. SQLite drops the triggers whenever Django rebuilds
+# the table for an ALTER, so a migration that alters AuditLog must recreate
+# them with its own copy of the trigger SQL (see 0005).
+
+
+def _flatten(value):
+    """
+    Yield the keys and scalar values of a JSON payload, depth first
+    """
+    if value is None:
+        return
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield str(key)
+            yield from _flatten(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _flatten(item)
+    else:
+        yield str(value)
+
+
+def build_search_text(actor_username, action_type, target_type, before=None, after=None):
+    """
+    Normalized text projection of an audit entry.
+
+    Lowercased and whitespace-collapsed so the search box only ever queries
+    this one indexed column instead of casting the JSON payloads.
+    """
+    parts = [actor_username or '', action_type or '', target_type or '']
+    parts.extend(_flatten(before))
+    parts.extend(_flatten(after))
+    return ' '.join(' '.join(parts).lower().split())
+
+
+def filter_by_search(queryset, query):
+    """
+    Restrict an AuditLog queryset to entries matching every search term.
+
+    Uses the FTS5 table on SQLite and the tsvector GIN index on PostgreSQL.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return queryset
+
+    vendor = connection.vendor
+    if vendor == 'sqlite':
+        match = ' AND '.join(f'"{term}"*' for term in terms)
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        )
+    if vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return queryset.filter(
+            id__in=RawSQL(
+                "SELECT id FROM audit_auditlog "
+                "WHERE to_tsvector('simple', search_text) @@ to_tsquery('simple', %s)",
+                [tsquery]
+            )
+        )
+
+    for term in terms:
+        queryset = queryset.filter(search_text__contains=term)
+    return queryset
@@ -0,0 +1,21 @@
+from celery import shared_task
+from .writer import write_entries_durably
+
+
+@shared_task
+def write_audit_log_batch(entries):
+    """
+    Bulk-insert a batch of serialized audit entries queued by the web process.
+    """
+    written = write_entries_durably(entries)
+    return f"Wrote {written} of {len(entries)} audit log entries"
+
+
+@shared_task
+def archive_audit_logs_task():
+    """
+    Move audit entries past AUDIT_RETENTION_DAYS into the compressed archive.
+    """
+    from .archive import archive_audit_logs
+    summary = archive_audit_logs()
+    return f"Archived {sum(day['rows'] for day in summary)} audit log entries across {len(summary)} days"
@@ -0,0 +1,251 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from .archive import (
+    TieredAuditLogList, _read_partition, _write_partition, archive_audit_logs, get_archive_root, iter_archived_logs,
+)
+from .models import AuditLog, AuditArchivePartition
+from .search import build_search_text, filter_by_search
+from .utils import create_audit_log
+from .writer import BufferedAuditWriter, get_audit_writer
+
+User = get_user_model()
+
+
+class AuditSearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auditor', password='testpass123')
+        self.triage = create_audit_log(
+            actor=self.user, action_type='UPDATE', target_type='Incident', target_id=7,
+            before={'status': 'OPEN', 'assigned_to': None},
+            after={'status': 'RESOLVED', 'assigned_to': 'Priya'}
+        )
+        self.login = create_audit_log(
+            actor=self.user, action_type='RUN', target_type='UserLogin', target_id=self.user.id,
+            after={'username': 'auditor', 'role': 'viewer'}
+        )
+    
+    def test_build_search_text_flattens_payloads(self):
+        """Test that keys and values are lowercased and None is dropped"""
+        text = build_search_text('Auditor', 'UPDATE', 'Rule', {'rules': [{'name': 'Email  Check'}]}, None)
+        self.assertEqual(text, 'auditor update rule rules name email check')
+    
+    def test_search_text_written_on_create(self):
+        """Test that the projection is stored with the entry"""
+        self.assertIn('resolved', self.triage.search_text)
+        self.assertIn('priya', self.triage.search_text)
+    
+    def test_filter_matches_payload_values(self):
+        """Test that searching payload values uses the index and honours prefixes"""
+        results = filter_by_search(AuditLog.objects.all(), 'resolv')
+        self.assertEqual(list(results), [self.triage])
+        results = filter_by_search(AuditLog.objects.all(), 'auditor viewer')
+        self.assertEqual(list(results), [self.login])
+    
+    def test_deleted_entries_leave_the_index(self):
+        """Test that deleting an entry removes it from search results"""
+        self.triage.delete()
+        self.assertEqual(list(filter_by_search(AuditLog.objects.all(), 'resolved')), [])
+
+
+
+class AuditExportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='exporter', password='testpass123')
+        for i in range(3):
+            create_audit_log(
+                actor=self.user, action_type='UPDATE', target_type='Rule', target_id=i,
+                after={'name': f'rule {i}'}
+            )
+        self.client.force_login(self.user)
+    
+    def test_csv_export_streams_filtered_rows(self):
+        """Test that the CSV export streams a header plus one line per matching entry"""
+        response = self.client.get(reverse('audit:export_audit_logs'), {'format': 'csv', 'action': 'UPDATE'})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().strip().splitlines()
+        self.assertEqual(lines[0].split(',')[0], 'Timestamp')
+        self.assertEqual(len(lines), 4)
+    
+    def test_gzipped_ndjson_export(self):
+        """Test that gzip=1 wraps NDJSON output in a valid gzip stream"""
+        response = self.client.get(reverse('audit:export_audit_logs'), {'format': 'ndjson', 'gzip': '1', 'action': 'UPDATE'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        body = gzip.decompress(b''.join(response.streaming_content)).decode()
+        records = [json.loads(line) for line in body.strip().splitlines()]
+        self.assertEqual(sorted(record['target_id'] for record in records), [0, 1, 2])
+
+
+
+@mock.patch.object(BufferedAuditWriter, '_ensure_thread')
+class BufferedAuditWriterTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buffered', password='testpass123')
+    
+    def tearDown(self):
+        get_audit_writer()._drain()
+    
+    @override_settings(AUDIT_LOG_WRITER='buffered')
+    def test_entries_are_queued_until_flush(self, _):
+        """Test that buffered entries are held back and bulk inserted on flush"""
+        self.assertIsNone(create_audit_log(actor=self.user, action_type='RUN', target_type='UserLogin', target_id=1))
+        create_audit_log(actor=self.user, action_type='RUN', target_type='UserLogout', target_id=1)
+        self.assertEqual(AuditLog.objects.count(), 0)
+        
+        self.assertEqual(get_audit_writer().flush(), 2)
+        self.assertEqual(
+            sorted(AuditLog.objects.values_list('target_type', flat=True)), ['UserLogin', 'UserLogout']
+        )
+        self.assertTrue(filter_by_search(AuditLog.objects.all(), 'userlogout').exists())
+    
+    @override_settings(AUDIT_LOG_WRITER='celery')
+    def test_celery_mode_sends_one_task_per_flush(self, _):
+        """Test that celery mode queues entries and sends each flush as one batch task"""
+        for target_id in range(3):
+            self.assertIsNone(create_audit_log(actor=self.user, action_type='RUN', target_type='Rule', target_id=target_id))
+        self.assertEqual(AuditLog.objects.count(), 0)
+        
+        with mock.patch('apps.audit.tasks.write_audit_log_batch.delay') as delay:
+            self.assertEqual(get_audit_writer().flush(), 3)
+        delay.assert_called_once()
+        self.assertEqual([entry['target_id'] for entry in delay.call_args.args[0]], [0, 1, 2])
+    
+    @override_settings(AUDIT_LOG_WRITER='celery')
+    def test_celery_mode_writes_inline_when_broker_is_down(self, _):
+        """Test that a batch the broker refuses is written synchronously instead of dropped"""
+        create_audit_log(actor=self.user, action_type='TRIAGE', target_type='Incident', target_id=3)
+        create_audit_log(actor=self.user, action_type='TRIAGE', target_type='Incident', target_id=4)
+        with mock.patch('apps.audit.tasks.write_audit_log_batch.delay', side_effect=ConnectionError('broker down')):
+            self.assertEqual(get_audit_writer().flush(), 2)
+        self.assertEqual(AuditLog.objects.filter(action_type='TRIAGE').count(), 2)
+    
+    def test_sync_mode_writes_in_the_request(self, _):
+        """Test that sync mode has the entry in the database when create_audit_log returns"""
+        log = create_audit_log(actor=self.user, action_type='EXPORT', target_type='Dataset', target_id=4)
+        self.assertEqual(AuditLog.objects.get(pk=log.pk).action_type, 'EXPORT')
+
+
+class AuditArchiveTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.archive_root = tempfile.mkdtemp()
+        self.override = override_settings(AUDIT_ARCHIVE_ROOT=self.archive_root, AUDIT_RETENTION_DAYS=30)
+        self.override.enable()
+        self.user = User.objects.create_user(username='archivist', password='testpass123')
+        self.old_day = (timezone.now() - timedelta(days=45)).replace(hour=12)
+        for i in range(3):
+            log = create_audit_log(
+                actor=self.user, action_type='UPDATE', target_type='Rule', target_id=i,
+                after={'name': f'Legacy rule {i}'}
+            )
+            AuditLog.objects.filter(id=log.id).update(timestamp=self.old_day + timedelta(minutes=i))
+        self.recent = create_audit_log(
+            actor=self.user, action_type='CREATE', target_type='Dataset', target_id=1, after={'name': 'Fresh'}
+        )
+        self.client.login(username='archivist', password='testpass123')
+    
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.archive_root, ignore_errors=True)
+    
+    def test_old_days_move_to_compressed_partitions(self):
+        """Test that entries past retention are written to a gzip partition and removed from the hot table"""
+        summary = archive_audit_logs()
+        self.assertEqual(summary, [{'day': self.old_day.date().isoformat(), 'rows': 3}])
+        self.assertEqual(list(AuditLog.objects.values_list('id', flat=True)), [self.recent.id])
+        
+        partition = AuditArchivePartition.objects.get()
+        self.assertEqual(partition.row_count, 3)
+        with gzip.open(os.path.join(get_archive_root(), partition.path), 'rt') as handle:
+            self.assertEqual(len(handle.readlines()), 3)
+    
+    def test_archived_entries_are_filterable(self):
+        """Test that archived entries are read back newest first and honour the search filter"""
+        archive_audit_logs()
+        logs = list(iter_archived_logs())
+        self.assertEqual([log.target_id for log in logs], [2, 1, 0])
+        self.assertEqual(logs[0].actor.username, 'archivist')
+        self.assertEqual(logs[0].get_action_type_display(), 'Update')
+        self.assertEqual([log.target_id for log in iter_archived_logs(search='legacy 1')], [1])
+    
+    def test_list_reads_archive_when_range_reaches_it(self):
+        """Test that the audit list appends archived entries only for a date range that covers them"""
+        archive_audit_logs()
+        date_from = (self.old_day + timedelta(days=1)).strftime('%Y-%m-%d')
+        response = self.client.get(reverse('audit:audit_log_list'), {'date_from': date_from})
+        self.assertFalse(response.context['includes_archive'])
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        
+        date_from = (self.old_day - timedelta(days=1)).strftime('%Y-%m-%d')
+        response = self.client.get(reverse('audit:audit_log_list'), {'date_from': date_from})
+        self.assertTrue(response.context['includes_archive'])
+        entries = list(response.context['page_obj'])
+        self.assertEqual(entries[0].id, self.recent.id)
+        self.assertEqual([log.target_id for log in entries[1:]], [2, 1, 0])
+    
+    def test_list_reads_archive_only_when_asked(self):
+        """Test that a list with no start date stays on the hot table unless the archive is requested"""
+        archive_audit_logs()
+        response = self.client.get(reverse('audit:audit_log_list'))
+        self.assertFalse(response.context['includes_archive'])
+        self.assertEqual([log.id for log in response.context['page_obj']], [self.recent.id])
+        
+        date_to = self.old_day.strftime('%Y-%m-%d')
+        response = self.client.get(reverse('audit:audit_log_list'), {'date_to': date_to})
+        self.assertFalse(response.context['includes_archive'])
+        
+        response = self.client.get(reverse('audit:audit_log_list'), {'archive': '1'})
+        self.assertTrue(response.context['includes_archive'])
+        self.assertEqual(response.context['page_obj'].paginator.count, 4)
+        
+        response = self.client.get(reverse('audit:audit_log_list'), {'date_to': date_to, 'archive': '1'})
+        self.assertEqual([log.target_id for log in response.context['page_obj']], [2, 1, 0])
+    
+    def test_rerun_after_crash_keeps_row_count_exact(self):
+        """Test that re-archiving rows already in a partition doesn't inflate its row count"""
+        logs = list(AuditLog.objects.filter(target_type='Rule').select_related('actor'))
+        # A crash after the partition was written and recorded but before the hot rows were deleted
+        relative_path, written, _, _, size_bytes = _write_partition(self.old_day.date(), logs)
+        AuditArchivePartition.objects.create(day=self.old_day.date(), path=relative_path, row_count=written, size_bytes=size_bytes)
+        archive_audit_logs()
+        self.assertEqual(AuditArchivePartition.objects.get().row_count, 3)
+        self.assertEqual(len(list(iter_archived_logs())), 3)
+    
+    def test_tiered_list_counts_partitions_once(self):
+        """Test that a filtered tiered list reads each partition once to count, then pages from the cached counts"""
+        archive_audit_logs()
+        logs = TieredAuditLogList(AuditLog.objects.filter(action_type='UPDATE').order_by('-timestamp'), action='UPDATE')
+        with mock.patch('apps.audit.archive._read_partition', wraps=_read_partition) as read:
+            self.assertEqual(logs.count(), 3)
+            self.assertEqual(logs.count(), 3)
+            self.assertEqual(read.call_count, 1)
+            self.assertEqual([log.target_id for log in logs[1:3]], [1, 0])
+        
+        # Another request for the same filters reuses the cached counts
+        again = TieredAuditLogList(AuditLog.objects.filter(action_type='UPDATE').order_by('-timestamp'), action='UPDATE')
+        with mock.patch('apps.audit.archive._read_partition', wraps=_read_partition) as read:
+            self.assertEqual(again.count(), 3)
+            self.assertEqual(read.call_count, 0)
+        
+        unfiltered = TieredAuditLogList(AuditLog.objects.order_by('-timestamp'))
+        with mock.patch('apps.audit.archive._read_partition', wraps=_read_partition) as read:
+            self.assertEqual(unfiltered.count(), 4)
+            self.assertEqual(read.call_count, 0)
+    
+    def test_export_includes_archived_entries(self):
+        """Test that an export whose range reaches the archive streams archived rows after hot rows"""
+        archive_audit_logs()
+        date_from = (self.old_day - timedelta(days=1)).strftime('%Y-%m-%d')
+        response = self.client.get(reverse('audit:export_audit_logs'), {'format': 'ndjson', 'date_from': date_from, 'action': 'UPDATE'})
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([record['target_id'] for record in records], [2, 1, 0])
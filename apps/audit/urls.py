@@ -5,5 +5,6 @@ app_name = 'audit'
 
 urlpatterns = [
     path('', views.audit_log_list, name='audit_log_list'),
-    path('export/csv/', views.export_audit_logs_csv, name='export_audit_logs_csv'),
+    path('export/', views.export_audit_logs, name='export_audit_logs'),
+    path('export/csv/', views.export_audit_logs, name='export_audit_logs_csv'),
 ]
\ No newline at end of file
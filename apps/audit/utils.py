@@ -1,10 +1,15 @@
-from .models import AuditLog
+from .writer import serialize_entry, submit_audit_entry
 
 
 def create_audit_log(actor, action_type, target_type, target_id, before=None, after=None, ip_address=None):
     """
     Create an audit log entry
     
+    Depending on settings.AUDIT_LOG_WRITER the entry is queued in memory and
+    sent to a Celery worker in batches ('celery', the default), queued and
+    bulk-inserted in the background ('buffered') or written immediately
+    ('sync').
+    
     Args:
         actor: User who performed the action
         action_type: Type of action (CREATE, UPDATE, DELETE, RUN, TRIAGE, EXPORT)
@@ -13,8 +18,11 @@ def create_audit_log(actor, action_type, target_type, target_id, before=None, af
         before: State before the action (for UPDATE)
         after: State after the action (for CREATE/UPDATE)
         ip_address: IP address of the request (optional)
+    
+    Returns:
+        The saved AuditLog when it was written in the request, otherwise None
     """
-    return AuditLog.objects.create(
+    entry = serialize_entry(
         actor=actor,
         action_type=action_type,
         target_type=target_type,
@@ -23,6 +31,7 @@ def create_audit_log(actor, action_type, target_type, target_id, before=None, af
         after=after,
         ip_address=ip_address
     )
+    return submit_audit_entry(entry)
 
 
 def log_user_login(user, ip_address=None):
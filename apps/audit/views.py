@@ -1,29 +1,21 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.http import HttpResponse
-from django.db.models import Q
-import csv
+from itertools import chain
 from .models import AuditLog
 from apps.audit.utils import create_audit_log
+from .search import filter_by_search
+from .archive import archive_reaches, iter_archived_logs, TieredAuditLogList
+from data_quality_watchtower.pagination import paginate_queryset, cursor_query_string
+from data_quality_watchtower.exports import EXPORT_CHUNK_SIZE, get_export_options, streaming_export_response, export_query_string
 
 
-@login_required
-def audit_log_list(request):
-    """Display list of audit logs with filtering and search"""
-    # Get all audit logs, ordered by timestamp (newest first)
-    audit_logs = AuditLog.objects.select_related('actor').all().order_by('-timestamp')
-    
-    # Filter by search query
+def _filter_audit_logs(request, audit_logs):
+    """Apply the list/export filters from the query string to an AuditLog queryset"""
+    # Filter by search query (indexed text projection of user, action, target and payloads)
     search_query = request.GET.get('search')
     if search_query:
-        audit_logs = audit_logs.filter(
-            Q(actor__username__icontains=search_query) |
-            Q(action_type__icontains=search_query) |
-            Q(target_type__icontains=search_query) |
-            Q(before__icontains=search_query) |
-            Q(after__icontains=search_query)
-        )
+        audit_logs = filter_by_search(audit_logs, search_query)
     
     # Filter by action type
     action_filter = request.GET.get('action')
@@ -43,16 +35,60 @@ def audit_log_list(request):
     if date_to:
         audit_logs = audit_logs.filter(timestamp__lte=date_to + ' 23:59:59')
     
+    return audit_logs
+
+
+def _include_archive(request):
+    """True if the archive should be read for this list or export"""
+    return archive_reaches(
+        request.GET.get('date_from'), request.GET.get('date_to'), include=request.GET.get('archive') == '1'
+    )
+
+
+def _archive_filters(request):
+    """The list filters in the form iter_archived_logs() takes them"""
+    return {
+        'date_from': request.GET.get('date_from'),
+        'date_to': request.GET.get('date_to'),
+        'search': request.GET.get('search'),
+        'action': request.GET.get('action'),
+        'user': request.GET.get('user'),
+    }
+
+
+@login_required
+def audit_log_list(request):
+    """Display list of audit logs with filtering and search"""
+    # Get all audit logs, ordered by timestamp (newest first)
+    audit_logs = _filter_audit_logs(request, AuditLog.objects.select_related('actor').all().order_by('-timestamp'))
+    
+    search_query = request.GET.get('search')
+    action_filter = request.GET.get('action')
+    user_filter = request.GET.get('user')
+    date_from = request.GET.get('date_from')
+    date_to = request.GET.get('date_to')
+    
     # Get unique users for filter dropdown
     users = AuditLog.objects.values_list('actor__username', flat=True).distinct().order_by('actor__username')
     
-    # Pagination
-    paginator = Paginator(audit_logs, 25)  # Show 25 logs per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # A date_from on or before an archived day, or ?archive=1, also reads the archive;
+    # archived rows are always older, so they follow the hot rows (offset pagination
+    # only). Everything else stays on the hot table.
+    includes_archive = _include_archive(request)
+    if includes_archive:
+        paginator = Paginator(TieredAuditLogList(audit_logs, **_archive_filters(request)), 25)
+        page_obj, cursor_mode = paginator.get_page(request.GET.get('page')), False
+    else:
+        # Pagination - 25 logs per page; keyset with ?pagination=cursor skips the COUNT(*)
+        page_obj, cursor_mode = paginate_queryset(request, audit_logs, 25, 'timestamp')
     
     context = {
         'page_obj': page_obj,
+        'cursor_mode': cursor_mode,
+        'includes_archive': includes_archive,
+        'archive_requested': request.GET.get('archive') == '1',
+        'cursor_query': cursor_query_string(request),
+        'export_query': export_query_string(request),
         'users': users,
         'search_query': search_query,
         'action_filter': action_filter,
@@ -64,9 +100,50 @@ def audit_log_list(request):
     return render(request, 'audit/list.html', context)
 
 
+AUDIT_EXPORT_HEADER = [
+    'Timestamp', 
+    'User', 
+    'Action', 
+    'Target Type', 
+    'Target ID', 
+    'IP Address',
+    'Before Data',
+    'After Data'
+]
+
+
+def _audit_log_row(log):
+    return [
+        log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+        log.actor.username,
+        log.get_action_type_display(),
+        log.target_type,
+        log.target_id,
+        log.ip_address or '',
+        str(log.before) if log.before else '',
+        str(log.after) if log.after else ''
+    ]
+
+
+def _audit_log_record(log):
+    return {
+        'id': log.id,
+        'timestamp': log.timestamp.isoformat(),
+        'user': log.actor.username,
+        'action': log.action_type,
+        'target_type': log.target_type,
+        'target_id': log.target_id,
+        'ip_address': log.ip_address,
+        'before': log.before,
+        'after': log.after,
+    }
+
+
 @login_required
-def export_audit_logs_csv(request):
-    """Export audit logs as CSV"""
+def export_audit_logs(request):
+    """Stream audit logs as CSV or NDJSON (?format=csv|ndjson, ?gzip=1)"""
+    export_format, use_gzip = get_export_options(request)
+    
     # Create audit log for the export action
     create_audit_log(
         actor=request.user,
@@ -74,73 +151,17 @@ def export_audit_logs_csv(request):
         target_type='AuditLogs',
         target_id=0,
         after={
-            'format': 'CSV'
+            'format': export_format.upper(),
+            'gzip': use_gzip
         },
         ip_address=request.META.get('REMOTE_ADDR')
     )
     
     # Get all audit logs
-    audit_logs = AuditLog.objects.select_related('actor').all().order_by('-timestamp')
-    
-    # Filter by search query
-    search_query = request.GET.get('search')
-    if search_query:
-        audit_logs = audit_logs.filter(
-            Q(actor__username__icontains=search_query) |
-            Q(action_type__icontains=search_query) |
-            Q(target_type__icontains=search_query) |
-            Q(before__icontains=search_query) |
-            Q(after__icontains=search_query)
-        )
+    audit_logs = _filter_audit_logs(request, AuditLog.objects.select_related('actor').all().order_by('-timestamp'))
+    if _include_archive(request):
+        audit_logs = chain(audit_logs.iterator(chunk_size=EXPORT_CHUNK_SIZE), iter_archived_logs(**_archive_filters(request)))
     
-    # Filter by action type
-    action_filter = request.GET.get('action')
-    if action_filter:
-        audit_logs = audit_logs.filter(action_type=action_filter)
-    
-    # Filter by user
-    user_filter = request.GET.get('user')
-    if user_filter:
-        audit_logs = audit_logs.filter(actor__username=user_filter)
-    
-    # Filter by date range
-    date_from = request.GET.get('date_from')
-    date_to = request.GET.get('date_to')
-    if date_from:
-        audit_logs = audit_logs.filter(timestamp__gte=date_from)
-    if date_to:
-        audit_logs = audit_logs.filter(timestamp__lte=date_to + ' 23:59:59')
-    
-    # Create the HttpResponse object with CSV header
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="audit_logs.csv"'
-    
-    # Create CSV writer
-    writer = csv.writer(response)
-    
-    # Write header row
-    writer.writerow([
-        'Timestamp', 
-        'User', 
-        'Action', 
-        'Target Type', 
-        'Target ID', 
-        'IP Address',
-        'Before Data',
-        'After Data'
-    ])
-    
-    # Write data rows
-    for log in audit_logs:
-        writer.writerow([
-            log.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-            log.actor.username,
-            log.get_action_type_display(),
-            log.target_type,
-            log.target_id,
-            log.ip_address or '',
-            str(log.before) if log.before else '',
-            str(log.after) if log.after else ''
-        ])
-    
-    return response
\ No newline at end of file
+    return streaming_export_response(
+        request, audit_logs, 'audit_logs', AUDIT_EXPORT_HEADER, _audit_log_row, _audit_log_record
+    )
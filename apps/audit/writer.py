@@ -0,0 +1,190 @@
+import atexit
+import logging
+import os
+import threading
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import AuditLog
+from .search import build_search_text
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def serialize_entry(actor, action_type, target_type, target_id, before=None, after=None, ip_address=None):
+    """
+    Capture an audit entry as a JSON-serializable dict.
+
+    The timestamp and search projection are fixed here, at the moment of the
+    action, so a delayed flush doesn't change what was recorded.
+    """
+    return {
+        'actor_id': actor.pk,
+        'action_type': action_type,
+        'target_type': target_type,
+        'target_id': target_id,
+        'before': before,
+        'after': after,
+        'ip_address': ip_address,
+        'timestamp': timezone.now().isoformat(),
+        'search_text': build_search_text(actor.username, action_type, target_type, before, after),
+    }
+
+
+def build_audit_log(entry):
+    """
+    Turn a serialized entry back into an unsaved AuditLog
+    """
+    values = dict(entry)
+    values['timestamp'] = parse_datetime(values['timestamp'])
+    return AuditLog(**values)
+
+
+def write_entries(entries):
+    """
+    Insert serialized entries with bulk_create, one batch per call
+    """
+    if not entries:
+        return 0
+    batch_size = _setting('AUDIT_LOG_BATCH_SIZE', 100)
+    AuditLog.objects.bulk_create([build_audit_log(entry) for entry in entries], batch_size=batch_size)
+    return len(entries)
+
+
+def write_entries_durably(entries):
+    """
+    Synchronous fallback: bulk insert, and if that fails insert row by row so
+    one bad entry can't take the rest of the batch down with it.
+    """
+    try:
+        return write_entries(entries)
+    except Exception as e:
+        logger.warning(f"Bulk audit insert failed, retrying row by row: {str(e)}")
+
+    written = 0
+    for entry in entries:
+        try:
+            build_audit_log(entry).save()
+            written += 1
+        except Exception as e:
+            logger.error(f"Dropped audit entry {entry}: {str(e)}")
+    return written
+
+
+def send_entries(entries):
+    """
+    Hand a batch to one write_audit_log_batch task, or write it here when
+    the broker can't be reached. Returns the number of entries handled.
+    """
+    from .tasks import write_audit_log_batch
+    try:
+        write_audit_log_batch.delay(entries)
+        return len(entries)
+    except Exception as e:
+        logger.warning(f"Audit queue unavailable, writing {len(entries)} entries synchronously: {str(e)}")
+        return write_entries_durably(entries)
+
+
+class BufferedAuditWriter:
+    """
+    Process-local audit queue flushed by a background thread ('celery' and
+    'buffered' modes).
+
+    Entries are appended under a lock and the request returns immediately.
+    The flusher wakes when the buffer reaches AUDIT_LOG_BATCH_SIZE or every
+    AUDIT_LOG_FLUSH_INTERVAL seconds and hands the batch on: to one Celery
+    task in 'celery' mode, or straight to a bulk insert in 'buffered' mode.
+    Queued entries only live in this process's memory until then, so a
+    killed worker loses at most one interval's worth.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_thread(self):
+        # Gunicorn forks workers after import, so start one flusher per process.
+        # A forked child starts with an empty buffer; the parent still owns its entries.
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._buffer = []
+        self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+        self._thread.start()
+
+    def enqueue(self, entry):
+        with self._lock:
+            self._ensure_thread()
+            self._buffer.append(entry)
+            full = len(self._buffer) >= _setting('AUDIT_LOG_BATCH_SIZE', 100)
+        if full:
+            self._wakeup.set()
+
+    def _drain(self):
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+        return entries
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(_setting('AUDIT_LOG_FLUSH_INTERVAL', 2.0))
+            self._wakeup.clear()
+            # The flusher thread owns its own DB connection; recycle it like a request would
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Audit log flush failed: {str(e)}")
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """
+        Hand on everything queued so far as one batch. Safe to call from any thread.
+        """
+        entries = self._drain()
+        if not entries:
+            return 0
+        if _setting('AUDIT_LOG_WRITER', 'celery') == 'celery':
+            return send_entries(entries)
+        return write_entries_durably(entries)
+
+
+_writer = BufferedAuditWriter()
+
+
+def get_audit_writer():
+    return _writer
+
+
+def submit_audit_entry(entry):
+    """
+    Route a serialized entry according to AUDIT_LOG_WRITER.
+
+    'celery' (the default) and 'buffered' queue it for the background
+    flusher and return None; 'sync' writes it now and returns the AuditLog.
+    """
+    if _setting('AUDIT_LOG_WRITER', 'celery') in ('celery', 'buffered'):
+        _writer.enqueue(entry)
+        return None
+
+    log = build_audit_log(entry)
+    log.save()
+    return log
+
+
+@atexit.register
+def _flush_on_exit():
+    # Best effort: don't lose the tail of the buffer on a clean shutdown
+    try:
+        _writer.flush()
+    except Exception as e:
+        logger.error(f"Failed to flush audit log buffer on exit: {str(e)}")
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from apps.dashboard.search import get_search_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for datasets, rules and incidents'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        self.stdout.write(f'Rebuilding search index using {backend.__class__.__name__}...')
+        indexed = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} documents'))
@@ -0,0 +1,99 @@
+from django.db import migrations
+
+
+SQLITE_CREATE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS dashboard_search_index USING fts5(
+    object_type UNINDEXED,
+    object_id UNINDEXED,
+    title,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+POSTGRES_CREATE = [
+    """
+    CREATE TABLE IF NOT EXISTS dashboard_search_index (
+        object_type varchar(20) NOT NULL,
+        object_id bigint NOT NULL,
+        title text NOT NULL DEFAULT '',
+        body text NOT NULL DEFAULT '',
+        document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(body, '')), 'B')
+        ) STORED,
+        PRIMARY KEY (object_type, object_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS dashboard_search_index_document_idx ON dashboard_search_index USING GIN (document)",
+]
+
+# Frozen copies of the apps.dashboard.search index writes as of this migration.
+# SQLite keys the FTS5 rowid on (object_id, type code).
+TYPE_CODES = {
+    'dataset': 1,
+    'rule': 2,
+    'incident': 3,
+}
+
+SQLITE_INSERT = (
+    'INSERT INTO dashboard_search_index (rowid, object_type, object_id, title, body) '
+    'VALUES (%s, %s, %s, %s, %s)'
+)
+
+POSTGRES_UPSERT = (
+    'INSERT INTO dashboard_search_index (object_type, object_id, title, body) '
+    'VALUES (%s, %s, %s, %s) '
+    'ON CONFLICT (object_type, object_id) DO UPDATE '
+    'SET title = EXCLUDED.title, body = EXCLUDED.body'
+)
+
+
+def index_row(cursor, vendor, object_type, object_id, title, body):
+    if vendor == 'sqlite':
+        rowid = object_id * 4 + TYPE_CODES[object_type]
+        cursor.execute('DELETE FROM dashboard_search_index WHERE rowid = %s', [rowid])
+        cursor.execute(SQLITE_INSERT, [rowid, object_type, object_id, title or '', body or ''])
+    else:
+        cursor.execute(POSTGRES_UPSERT, [object_type, object_id, title or '', body or ''])
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(SQLITE_CREATE)
+    elif vendor == 'postgresql':
+        for statement in POSTGRES_CREATE:
+            schema_editor.execute(statement)
+    else:
+        return
+
+    # Backfill from the historical models
+    sources = [
+        ('dataset', apps.get_model('datasets', 'Dataset'), 'name', 'description'),
+        ('rule', apps.get_model('rules', 'Rule'), 'name', 'description'),
+        ('incident', apps.get_model('incidents', 'Incident'), 'title', 'description'),
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        for object_type, model, title_field, body_field in sources:
+            for object_id, title, body in model.objects.values_list('id', title_field, body_field).iterator():
+                index_row(cursor, vendor, object_type, object_id, title, body)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute('DROP TABLE IF EXISTS dashboard_search_index')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0002_remove_old_models_add_dashboard_graph'),
+        ('datasets', '0005_dataset_heatmap_data'),
+        ('rules', '0009_keyset_pagination_indexes'),
+        ('incidents', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,220 @@
+import logging
+from django.db import connection
+from django.db.models import Q
+from data_quality_watchtower.text import tokenize
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'dashboard_search_index'
+
+# Each indexed object type gets a small code so SQLite can key the FTS5
+# rowid on (object_id, type) and update/delete rows without a table scan.
+TYPE_CODES = {
+    'dataset': 1,
+    'rule': 2,
+    'incident': 3,
+}
+
+
+def get_indexed_models():
+    """
+    Map of object type -> (model, title field, body field) for indexed models
+    """
+    from apps.datasets.models import Dataset
+    from apps.rules.models import Rule
+    from apps.incidents.models import Incident
+
+    return {
+        'dataset': (Dataset, 'name', 'description'),
+        'rule': (Rule, 'name', 'description'),
+        'incident': (Incident, 'title', 'description'),
+    }
+
+
+def object_type_for(instance):
+    for object_type, (model, _, _) in get_indexed_models().items():
+        if isinstance(instance, model):
+            return object_type
+    return None
+
+
+class LikeSearchBackend:
+    """
+    Fallback backend for databases without a full-text engine.
+
+    Keeps the old icontains behaviour so search still works, just unindexed.
+    """
+    vendor = None
+
+    def index(self, object_type, object_id, title, body):
+        pass
+
+    def remove(self, object_type, object_id):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, query, object_type, limit=10):
+        model, title_field, body_field = get_indexed_models()[object_type]
+        terms = tokenize(query)
+        if not terms:
+            return []
+        queryset = model.objects.all()
+        for term in terms:
+            queryset = queryset.filter(
+                Q(**{f'{title_field}__icontains': term}) | Q(**{f'{body_field}__icontains': term})
+            )
+        return list(queryset.values_list('id', flat=True)[:limit])
+
+
+class SQLiteSearchBackend(LikeSearchBackend):
+    """
+    SQLite FTS5 backend, ranked with bm25 (title weighted over body)
+    """
+    vendor = 'sqlite'
+
+    @staticmethod
+    def _rowid(object_type, object_id):
+        return object_id * 4 + TYPE_CODES[object_type]
+
+    def index(self, object_type, object_id, title, body):
+        rowid = self._rowid(object_type, object_id)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [rowid])
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, object_type, object_id, title, body) '
+                f'VALUES (%s, %s, %s, %s, %s)',
+                [rowid, object_type, object_id, title or '', body or '']
+            )
+
+    def remove(self, object_type, object_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [self._rowid(object_type, object_id)])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+
+    def search(self, query, object_type, limit=10):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # Every term is a quoted prefix query so partial words match while typing
+        match = ' AND '.join(f'"{term}"*' for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT object_id FROM {SEARCH_TABLE} '
+                f'WHERE {SEARCH_TABLE} MATCH %s AND object_type = %s '
+                f'ORDER BY bm25({SEARCH_TABLE}, 0.0, 0.0, 10.0, 1.0) LIMIT %s',
+                [match, object_type, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(LikeSearchBackend):
+    """
+    PostgreSQL backend using a stored, weighted tsvector column with a GIN index
+    """
+    vendor = 'postgresql'
+
+    def index(self, object_type, object_id, title, body):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (object_type, object_id, title, body) '
+                f'VALUES (%s, %s, %s, %s) '
+                f'ON CONFLICT (object_type, object_id) DO UPDATE '
+                f'SET title = EXCLUDED.title, body = EXCLUDED.body',
+                [object_type, object_id, title or '', body or '']
+            )
+
+    def remove(self, object_type, object_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE object_type = %s AND object_id = %s',
+                [object_type, object_id]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {SEARCH_TABLE}')
+
+    def search(self, query, object_type, limit=10):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT object_id FROM {SEARCH_TABLE} "
+                f"WHERE object_type = %s AND document @@ to_tsquery('simple', %s) "
+                f"ORDER BY ts_rank(document, to_tsquery('simple', %s)) DESC LIMIT %s",
+                [object_type, tsquery, tsquery, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+SEARCH_BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend():
+    """
+    Pick the search backend for the default database connection
+    """
+    return SEARCH_BACKENDS.get(connection.vendor, LikeSearchBackend)()
+
+
+def index_instance(instance):
+    """
+    Add or refresh a Dataset, Rule or Incident in the search index
+    """
+    object_type = object_type_for(instance)
+    if object_type is None:
+        return
+    _, title_field, body_field = get_indexed_models()[object_type]
+    get_search_backend().index(
+        object_type,
+        instance.pk,
+        getattr(instance, title_field),
+        getattr(instance, body_field),
+    )
+
+
+def remove_instance(instance):
+    """
+    Drop a Dataset, Rule or Incident from the search index
+    """
+    object_type = object_type_for(instance)
+    if object_type is None:
+        return
+    get_search_backend().remove(object_type, instance.pk)
+
+
+def search(query, object_type, limit=10):
+    """
+    Ranked search for one object type.
+
+    Returns model instances ordered by relevance.
+    """
+    model = get_indexed_models()[object_type][0]
+    ids = get_search_backend().search(query, object_type, limit=limit)
+    objects = model.objects.in_bulk(ids)
+    return [objects[object_id] for object_id in ids if object_id in objects]
+
+
+def rebuild_index():
+    """
+    Re-index every Dataset, Rule and Incident. Returns the number of documents indexed.
+    """
+    backend = get_search_backend()
+    backend.clear()
+    indexed = 0
+    for object_type, (model, title_field, body_field) in get_indexed_models().items():
+        rows = model.objects.values_list('id', title_field, body_field)
+        for object_id, title, body in rows.iterator(chunk_size=2000):
+            backend.index(object_type, object_id, title, body)
+            indexed += 1
+    return indexed
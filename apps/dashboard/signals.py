@@ -0,0 +1,39 @@
+import logging
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.datasets.models import Dataset
+from apps.rules.models import Rule
+from apps.incidents.models import Incident
+from .search import index_instance, remove_instance
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Dataset)
+@receiver(post_save, sender=Rule)
+@receiver(post_save, sender=Incident)
+def update_search_index(sender, instance, **kwargs):
+    """
+    Keep the full-text search index in step with saved datasets, rules and incidents
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not {'name', 'title', 'description'} & set(update_fields):
+        # Stats-only saves (e.g. trend data) don't touch searchable text
+        return
+    try:
+        index_instance(instance)
+    except Exception as e:
+        logger.warning(f"Failed to index {sender.__name__} {instance.pk}: {str(e)}")
+
+
+@receiver(post_delete, sender=Dataset)
+@receiver(post_delete, sender=Rule)
+@receiver(post_delete, sender=Incident)
+def remove_from_search_index(sender, instance, **kwargs):
+    """
+    Drop deleted datasets, rules and incidents from the search index
+    """
+    try:
+        remove_instance(instance)
+    except Exception as e:
+        logger.warning(f"Failed to remove {sender.__name__} {instance.pk} from search index: {str(e)}")
@@ -1,3 +1,58 @@
 from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from apps.datasets.models import Dataset
+from apps.rules.models import Rule
+from .search import search
 
-# Create your tests here.
+User = get_user_model()
+
+
+class SearchIndexTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='searcher', password='testpass123')
+        self.dataset = Dataset.objects.create(
+            name='customer_orders', description='Daily order extract', source_type='CSV', owner=self.user
+        )
+        self.rule = Rule.objects.create(
+            name='order_id Unique Check', description='Check that order_id values are unique',
+            dataset=self.dataset, rule_type='UNIQUE', dsl_expression='UNIQUE(order_id)', owner=self.user
+        )
+    
+    def test_prefix_match(self):
+        """Test that partial words match for type-ahead"""
+        self.assertEqual(search('custom', 'dataset'), [self.dataset])
+        self.assertEqual(search('uniq', 'rule'), [self.rule])
+    
+    def test_index_follows_save_and_delete(self):
+        """Test that renames and deletes are reflected in results"""
+        self.dataset.name = 'supplier_invoices'
+        self.dataset.save()
+        self.assertEqual(search('customer', 'dataset'), [])
+        self.assertEqual(search('supplier', 'dataset'), [self.dataset])
+        
+        self.rule.delete()
+        self.assertEqual(search('uniq', 'rule'), [])
+    
+    def test_title_ranks_above_description(self):
+        """Test that a title hit outranks a description-only hit"""
+        description_hit = Dataset.objects.create(
+            name='sales_history', description='Order history by region', source_type='CSV', owner=self.user
+        )
+        title_hit = Dataset.objects.create(
+            name='order_lines', description='Line items', source_type='CSV', owner=self.user
+        )
+        results = search('order', 'dataset')
+        self.assertLess(results.index(title_hit), results.index(description_hit))
+    
+    def test_suggest_limit_is_validated_and_clamped(self):
+        """Test that a non-numeric limit is a 400 and out-of-range limits are clamped to 1..20"""
+        self.client.force_login(self.user)
+        url = reverse('dashboard:global_search_suggest')
+        self.assertEqual(self.client.get(url, {'q': 'custom', 'limit': 'abc'}).status_code, 400)
+        
+        for i in range(25):
+            Dataset.objects.create(name=f'customer_copy_{i}', source_type='CSV', owner=self.user)
+        for limit, expected in ((-3, 1), (0, 1), (500, 20)):
+            suggestions = self.client.get(url, {'q': 'custom', 'limit': limit}).json()['suggestions']
+            self.assertEqual(len([s for s in suggestions if s['type'] == 'dataset']), expected)
@@ -12,6 +12,7 @@ urlpatterns = [
     path('dashboard/', views.dashboard_home, name='dashboard_home'),
     path('dashboard/enhanced/', views.enhanced_dashboard, name='enhanced_dashboard'),
     path('dashboard/search/', views_search.global_search, name='global_search'),
+    path('dashboard/search/suggest/', views_search.global_search_suggest, name='global_search_suggest'),
     path('dashboard/api/dataset-quality/', api_views.dataset_quality_api, name='dataset_quality_api'),
     path('dashboard/api/rule-frequency/', api_views.rule_frequency_api, name='rule_frequency_api'),
     path('dashboard/api/rules-per-dataset/', api_views.rules_per_dataset_api, name='rules_per_dataset_api'),
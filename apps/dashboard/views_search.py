@@ -1,9 +1,11 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
-from apps.datasets.models import Dataset
-from apps.rules.models import Rule
-from apps.incidents.models import Incident
+from django.http import JsonResponse
+from django.urls import reverse
+from .search import search
+
+SUGGEST_DEFAULT_LIMIT = 5
+SUGGEST_MAX_LIMIT = 20
 
 
 @login_required
@@ -17,23 +19,10 @@ def global_search(request):
     }
     
     if query:
-        # Search datasets
-        results['datasets'] = Dataset.objects.filter(
-            Q(name__icontains=query) | 
-            Q(description__icontains=query)
-        ).distinct()[:10]
-        
-        # Search rules
-        results['rules'] = Rule.objects.filter(
-            Q(name__icontains=query) | 
-            Q(description__icontains=query)
-        ).distinct()[:10]
-        
-        # Search incidents
-        results['incidents'] = Incident.objects.filter(
-            Q(title__icontains=query) | 
-            Q(description__icontains=query)
-        ).distinct()[:10]
+        # Ranked full-text search (FTS5 on SQLite, tsvector on PostgreSQL)
+        results['datasets'] = search(query, 'dataset', limit=10)
+        results['rules'] = search(query, 'rule', limit=10)
+        results['incidents'] = search(query, 'incident', limit=10)
     
     context = {
         'query': query,
@@ -41,4 +30,41 @@ def global_search(request):
         'total_results': sum(len(results[key]) for key in results)
     }
     
-    return render(request, 'search/results.html', context)
\ No newline at end of file
+    return render(request, 'search/results.html', context)
+
+
+@login_required
+def global_search_suggest(request):
+    """Type-ahead suggestions; every word is matched as a prefix"""
+    query = request.GET.get('q', '')
+    try:
+        limit = int(request.GET.get('limit', SUGGEST_DEFAULT_LIMIT))
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+    limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+    
+    suggestions = []
+    if query:
+        for dataset in search(query, 'dataset', limit=limit):
+            suggestions.append({
+                'type': 'dataset',
+                'id': dataset.id,
+                'label': dataset.name,
+                'url': reverse('datasets:dataset_detail', args=[dataset.id]),
+            })
+        for rule in search(query, 'rule', limit=limit):
+            suggestions.append({
+                'type': 'rule',
+                'id': rule.id,
+                'label': rule.name,
+                'url': reverse('rules:rule_detail', args=[rule.id]),
+            })
+        for incident in search(query, 'incident', limit=limit):
+            suggestions.append({
+                'type': 'incident',
+                'id': incident.id,
+                'label': incident.title,
+                'url': reverse('incidents:incident_detail', args=[incident.id]),
+            })
+    
+    return JsonResponse({'query': query, 'suggestions': suggestions})
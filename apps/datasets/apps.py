@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class DatasetsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.datasets'
\ No newline at end of file
+    name = 'apps.datasets'
+    
+    def ready(self):
+        import apps.datasets.signals
@@ -0,0 +1,132 @@
+import bz2
+import gzip
+import io
+import zlib
+import pandas as pd
+
+try:
+    import zstandard
+except ImportError:  # .csv.zst datasets need the optional zstandard package
+    zstandard = None
+
+CSV_ENCODINGS = ['utf-8', 'latin1', 'cp1252']
+
+# Compression named by a CSV file's second suffix, with the magic bytes its data starts with
+COMPRESSIONS = {
+    '.gz': ('gzip', b'\x1f\x8b'),
+    '.bz2': ('bz2', b'BZh'),
+    '.zst': ('zstd', b'\x28\xb5\x2f\xfd'),
+}
+
+CSV_EXTENSIONS = ['.csv'] + [f'.csv{suffix}' for suffix in COMPRESSIONS]
+
+# Decompressed bytes checked when validating an upload
+VALIDATION_BYTES = 64 * 1024
+
+# Raised by the decompressors for data that isn't a valid stream
+CORRUPT_ERRORS = (OSError, EOFError, zlib.error) + ((zstandard.ZstdError,) if zstandard else ())
+
+
+class CompressionError(ValueError):
+    """
+    A dataset file whose name or contents don't match a supported CSV format
+    """
+
+
+def compression_for(filename):
+    """
+    'gzip', 'bz2' or 'zstd' as named by the file's suffix, or None for an uncompressed file
+    """
+    name = (filename or '').lower()
+    for suffix, (compression, _) in COMPRESSIONS.items():
+        if name.endswith(suffix):
+            return compression
+    return None
+
+
+def is_csv_filename(filename):
+    return (filename or '').lower().endswith(tuple(CSV_EXTENSIONS))
+
+
+def open_decompressed(handle, compression):
+    """
+    Readable binary stream of the decompressed bytes of `handle`, which is
+    read incrementally; nothing is decompressed to disk or held whole in memory
+    """
+    if compression is None:
+        return handle
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=handle, mode='rb')
+    if compression == 'bz2':
+        return bz2.BZ2File(handle, mode='rb')
+    if zstandard is None:
+        raise CompressionError('Reading .zst files requires the zstandard package')
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(handle, closefd=False))
+
+
+def open_dataset_file(path):
+    """
+    Open a dataset file for reading as uncompressed CSV bytes
+    """
+    compression = compression_for(path)
+    if compression is None:
+        return open(path, 'rb')
+    if compression == 'gzip':
+        return gzip.open(path, 'rb')
+    if compression == 'bz2':
+        return bz2.open(path, 'rb')
+    if zstandard is None:
+        raise CompressionError('Reading .zst files requires the zstandard package')
+    return io.BufferedReader(zstandard.open(path, 'rb'))
+
+
+def validate_csv_file(filename, handle):
+    """
+    Check that a file's name is a supported CSV extension and, for compressed
+    files, that its data starts with the matching magic bytes and decompresses.
+    Only the first VALIDATION_BYTES of CSV are decompressed, and the handle
+    is rewound afterwards.
+    
+    Returns the compression, or None for a plain CSV.
+    """
+    if not is_csv_filename(filename):
+        raise CompressionError(f'Only {", ".join(CSV_EXTENSIONS)} files are supported')
+    compression = compression_for(filename)
+    if compression is None:
+        return None
+    suffix, magic = next((suffix, magic) for suffix, (name, magic) in COMPRESSIONS.items() if name == compression)
+    
+    try:
+        handle.seek(0)
+        if handle.read(len(magic)) != magic:
+            raise CompressionError(f'File is named {suffix} but is not {compression} compressed')
+        handle.seek(0)
+        open_decompressed(handle, compression).read(VALIDATION_BYTES)
+    except CORRUPT_ERRORS as e:
+        raise CompressionError(f'Compressed file is corrupt: {e}')
+    finally:
+        handle.seek(0)
+    return compression
+
+
+def read_csv(path, encodings=CSV_ENCODINGS, **kwargs):
+    """
+    Read a (possibly compressed) dataset CSV into a DataFrame, trying each
+    encoding in turn
+    """
+    for encoding in encodings:
+        try:
+            with open_dataset_file(path) as handle:
+                return pd.read_csv(handle, encoding=encoding, **kwargs)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError('Unable to read CSV file with supported encodings')
+
+
+def iter_csv_chunks(path, chunksize, **kwargs):
+    """
+    Yield a (possibly compressed) dataset CSV as DataFrames of `chunksize` rows,
+    decompressing as the rows are consumed
+    """
+    with open_dataset_file(path) as handle:
+        yield from pd.read_csv(handle, chunksize=chunksize, **kwargs)
@@ -0,0 +1,158 @@
+import logging
+import os
+import shutil
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .compression import COMPRESSIONS
+from .models import Dataset, DatasetContent, DatasetProfileSketch
+
+logger = logging.getLogger(__name__)
+
+CONTENT_PREFIX = 'datasets/content'
+
+
+def content_name(sha256, filename):
+    """
+    Storage name for content with this hash, keeping the compression suffix
+    readers pick the codec from
+    """
+    name = (filename or '').lower()
+    suffix = next((suffix for suffix in COMPRESSIONS if name.endswith(suffix)), '')
+    return f'{CONTENT_PREFIX}/{sha256[:2]}/{sha256}.csv{suffix}'
+
+
+def stored_content_hash(dataset):
+    """
+    The dataset's content hash if its file is the content-addressed copy,
+    otherwise None. Content files are immutable, so this needs no rereading.
+    """
+    if dataset.content_id and dataset.file and dataset.file.name == content_name(dataset.content_id, dataset.file.name):
+        return dataset.content_id
+    return None
+
+
+def _link(source, target):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def _delete_file_on_commit(name):
+    def delete():
+        try:
+            default_storage.delete(name)
+        except OSError as e:
+            logger.warning(f"Failed to delete dataset file {name}: {e}")
+    transaction.on_commit(delete)
+
+
+def release_content(sha256):
+    """
+    Drop one reference to stored content; the file stays until the next collection
+    """
+    DatasetContent.objects.filter(pk=sha256, ref_count__gt=0).update(
+        ref_count=F('ref_count') - 1, released_at=timezone.now()
+    )
+
+
+def store_dataset_content(dataset, sha256):
+    """
+    Point a dataset at the content-addressed copy of its file.
+
+    If identical bytes are already stored, the dataset shares that file and
+    its own upload is deleted once the transaction commits. Otherwise the
+    upload becomes the stored copy. Any content the dataset referenced
+    before is released.
+
+    Returns (content, shared): shared is True when the bytes were already stored.
+    """
+    with transaction.atomic():
+        content = DatasetContent.objects.select_for_update().filter(pk=sha256).first()
+        own_name = dataset.file.name
+        shared = content is not None and default_storage.exists(content.file_name)
+
+        if not shared:
+            name = content_name(sha256, own_name)
+            if own_name != name:
+                # Linked rather than moved, so a rollback leaves the upload intact
+                _link(default_storage.path(own_name), default_storage.path(name))
+            content, _ = DatasetContent.objects.update_or_create(
+                pk=sha256, defaults={'file_name': name, 'size': default_storage.size(name)}
+            )
+        if own_name != content.file_name:
+            _delete_file_on_commit(own_name)
+
+        if dataset.content_id != sha256:
+            if dataset.content_id:
+                release_content(dataset.content_id)
+            DatasetContent.objects.filter(pk=sha256).update(ref_count=F('ref_count') + 1, released_at=None)
+        dataset.content = content
+        dataset.file.name = content.file_name
+        dataset.save(update_fields=['file', 'content'])
+
+    if shared:
+        logger.info(f"Dataset {dataset.name} shares stored content {sha256[:12]}")
+    return content, shared
+
+
+def profiled_twin(dataset):
+    """
+    Another dataset with the same stored content whose profile was computed
+    from that content, or None
+    """
+    sha256 = stored_content_hash(dataset)
+    if not sha256:
+        return None
+    return (
+        Dataset.objects.filter(content_id=sha256, profile_content_hash=sha256, sample_stats__isnull=False)
+        .exclude(pk=dataset.pk)
+        .order_by('-updated_at')
+        .first()
+    )
+
+
+def copy_profile(source, dataset):
+    """
+    Give a dataset the profile, and the resumable profile sketch, computed for
+    another dataset with the same content
+    """
+    for field in ('row_count', 'column_count', 'quality_score', 'sample_stats', 'schema', 'profile_content_hash'):
+        setattr(dataset, field, getattr(source, field))
+    dataset.save(update_fields=['row_count', 'column_count', 'quality_score', 'sample_stats', 'schema', 'profile_content_hash'])
+
+    sketch = DatasetProfileSketch.objects.filter(dataset=source).first()
+    if sketch is not None:
+        DatasetProfileSketch.objects.update_or_create(
+            dataset=dataset, defaults={'payload': sketch.payload, 'row_count': sketch.row_count}
+        )
+
+
+def collect_dataset_content():
+    """
+    Delete stored content that no dataset references, with its file.
+
+    The reference count is checked against the datasets that actually point
+    at each candidate, and corrected instead of deleting if they disagree.
+
+    Returns (deleted, freed_bytes).
+    """
+    deleted, freed = 0, 0
+    for sha256 in list(DatasetContent.objects.filter(ref_count=0).values_list('sha256', flat=True)):
+        with transaction.atomic():
+            content = DatasetContent.objects.select_for_update().filter(pk=sha256, ref_count=0).first()
+            if content is None:
+                continue
+            references = content.datasets.count()
+            if references:
+                logger.warning(f"Content {sha256[:12]} had ref_count 0 but {references} datasets; corrected")
+                DatasetContent.objects.filter(pk=sha256).update(ref_count=references, released_at=None)
+                continue
+            content.delete()
+            _delete_file_on_commit(content.file_name)
+        deleted += 1
+        freed += content.size
+    return deleted, freed
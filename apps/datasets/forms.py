@@ -1,4 +1,5 @@
 from django import forms
+from .compression import CSV_EXTENSIONS, CompressionError, validate_csv_file
 from .models import Dataset
 
 
@@ -10,7 +11,7 @@ class DatasetForm(forms.ModelForm):
             'name': forms.TextInput(attrs={'class': 'form-control'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
             'source_type': forms.Select(attrs={'class': 'form-select'}),
-            'file': forms.FileInput(attrs={'class': 'form-control'}),
+            'file': forms.FileInput(attrs={'class': 'form-control', 'accept': ','.join(CSV_EXTENSIONS)}),
             'table_name': forms.TextInput(attrs={'class': 'form-control'}),
             'db_connection': forms.Textarea(attrs={'class': 'form-control', 'rows': 5, 'placeholder': '{"host": "localhost", "port": 5432, "database": "mydb", "user": "myuser", "password": "mypassword"}'}),
         }
@@ -20,6 +21,16 @@ class DatasetForm(forms.ModelForm):
         self.fields['file'].required = False
         self.fields['table_name'].required = False
         self.fields['db_connection'].required = False
+    
+    def clean_file(self):
+        file = self.cleaned_data.get('file')
+        if file:
+            # Compressed CSVs are checked by their header; the upload is stored as sent
+            try:
+                validate_csv_file(file.name, file)
+            except CompressionError as e:
+                raise forms.ValidationError(str(e))
+        return file
         
     def clean(self):
         cleaned_data = super().clean()
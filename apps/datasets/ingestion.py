@@ -0,0 +1,240 @@
+import io
+import logging
+import os
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from apps.rules.models import Rule, RuleRun
+from .compression import CSV_ENCODINGS, compression_for, open_decompressed
+from .models import DatasetIngestion
+from .profiler import profile_frame, dsl_number
+from .utils import analyze_dataset_for_rules
+from .utils_profiling import (
+    apply_profile, compute_profile, dataset_content_hash, save_profile_sketch, stored_column_stats, uses_sketch_profiling,
+)
+from .content_store import store_dataset_content, profiled_twin, copy_profile
+
+logger = logging.getLogger(__name__)
+
+# Percent complete when each stage starts
+STAGE_PROGRESS = {
+    'queued': 0,
+    'parsing': 5,
+    'caching': 45,
+    'profiling': 50,
+    'recommending': 75,
+    'creating_rules': 85,
+    'completed': 100,
+}
+
+
+def start_ingestion(dataset, user):
+    """
+    Record an ingestion for an uploaded dataset and hand it to a worker.
+    
+    With DATASET_INGESTION = 'sync' (used by the test suite) the pipeline
+    runs in process instead.
+    """
+    ingestion = DatasetIngestion.objects.create(dataset=dataset, dataset_name=dataset.name, owner=user)
+    if getattr(settings, 'DATASET_INGESTION', 'async') == 'sync':
+        run_ingestion(ingestion.id)
+        ingestion.refresh_from_db()
+    else:
+        from .tasks import ingest_dataset_task
+        transaction.on_commit(lambda: ingest_dataset_task.delay(str(ingestion.id)))
+    return ingestion
+
+
+def _report(ingestion, stage, progress=None, **fields):
+    # A single UPDATE, so progress polling never waits on the pipeline
+    ingestion.stage = stage
+    ingestion.progress = STAGE_PROGRESS[stage] if progress is None else progress
+    for name, value in fields.items():
+        setattr(ingestion, name, value)
+    DatasetIngestion.objects.filter(pk=ingestion.pk).update(
+        stage=ingestion.stage, progress=ingestion.progress, updated_at=timezone.now(), **fields
+    )
+
+
+class _ProgressReader(io.RawIOBase):
+    """
+    Binary file wrapper that reports the fraction of bytes read so far
+    """
+
+    def __init__(self, handle, size, callback):
+        self.handle = handle
+        self.size = max(size, 1)
+        self.callback = callback
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.handle.readinto(buffer)
+        self.bytes_read += count or 0
+        self.callback(self.bytes_read / self.size)
+        return count
+
+
+def read_csv_with_progress(path, callback):
+    """
+    Read a CSV (trying each of CSV_ENCODINGS) and report parse progress as
+    the fraction of the file consumed. Compressed files are decompressed as
+    they are parsed, with progress measured in compressed bytes.
+    """
+    size = os.path.getsize(path)
+    compression = compression_for(path)
+    for encoding in CSV_ENCODINGS:
+        try:
+            with open(path, 'rb') as handle:
+                stream = open_decompressed(io.BufferedReader(_ProgressReader(handle, size, callback)), compression)
+                return pd.read_csv(stream, encoding=encoding)
+        except UnicodeDecodeError:
+            continue
+    raise ValueError('Unable to read CSV file with supported encodings')
+
+
+def run_ingestion(ingestion_id):
+    """
+    Parse, profile and recommend rules for an uploaded dataset, recording
+    the stage and percentage on its DatasetIngestion as it goes.
+    
+    The dataset is deleted if its file can't be processed, as the upload
+    view used to do; the ingestion record keeps the error.
+    """
+    ingestion = DatasetIngestion.objects.select_related('dataset', 'owner').get(pk=ingestion_id)
+    dataset = ingestion.dataset
+    if dataset is None:
+        return ingestion
+    
+    DatasetIngestion.objects.filter(pk=ingestion.pk).update(status='RUNNING')
+    try:
+        parse_start, parse_end = STAGE_PROGRESS['parsing'], STAGE_PROGRESS['caching']
+        last_reported = [parse_start]
+        
+        def parse_progress(fraction):
+            progress = parse_start + int(fraction * (parse_end - parse_start))
+            if progress > last_reported[0]:
+                last_reported[0] = progress
+                _report(ingestion, 'parsing', min(progress, parse_end - 1))
+        
+        _report(ingestion, 'parsing')
+        df = read_csv_with_progress(dataset.file.path, parse_progress)
+        
+        _report(ingestion, 'caching')
+        dataset.row_count = len(df)
+        dataset.column_count = len(df.columns)
+        # Chunked uploads arrive with the hash computed as the bytes were written
+        content_hash = dataset.profile_content_hash or dataset_content_hash(dataset)
+        dataset.profile_content_hash = content_hash or ''
+        dataset.save(update_fields=['row_count', 'column_count', 'profile_content_hash'])
+        # Identical uploads share one stored file, and the profile computed from it
+        twin = None
+        if content_hash:
+            store_dataset_content(dataset, content_hash)
+            twin = profiled_twin(dataset)
+        
+        _report(ingestion, 'profiling')
+        if twin is not None:
+            copy_profile(twin, dataset)
+            column_stats = stored_column_stats(dataset)
+        else:
+            profile, accumulator = compute_profile(dataset) if uses_sketch_profiling() else (None, None)
+            if accumulator is not None:
+                save_profile_sketch(dataset, accumulator)
+            else:
+                profile = profile_frame(df)
+            apply_profile(dataset, profile)
+            column_stats = profile['columns']
+        
+        _report(ingestion, 'recommending')
+        recommendations = analyze_dataset_for_rules(df, column_stats)
+        
+        _report(ingestion, 'creating_rules')
+        created_rules = create_rules_from_recommendations(dataset, recommendations, ingestion.owner)
+        
+        _report(ingestion, 'completed', status='COMPLETED', rules_created=len(created_rules), finished_at=timezone.now())
+        logger.info(f"Ingested dataset {dataset.name}: {len(df)} rows, {len(created_rules)} rules")
+    except Exception as e:
+        logger.error(f"Error ingesting dataset {dataset.name}: {str(e)}")
+        DatasetIngestion.objects.filter(pk=ingestion.pk).update(
+            status='FAILED', error=f'Error processing CSV file: {str(e)}', finished_at=timezone.now(), updated_at=timezone.now()
+        )
+        # Delete the dataset if processing failed
+        dataset.delete()
+    
+    ingestion.refresh_from_db()
+    return ingestion
+
+
+def create_rules_from_recommendations(dataset, recommendations, user):
+    """
+    Create rules automatically from recommendations
+    """
+    created_rules = []
+    
+    try:
+        for rec in recommendations:
+            rule_type = rec.get('type')
+            column = rec.get('column')
+            
+            if not rule_type or not column:
+                continue
+                
+            # Generate rule name and DSL expression based on type
+            if rule_type == 'NOT_NULL':
+                rule_name = f'{column} Not Null Check'
+                dsl_expression = f'NOT_NULL("{column}")'
+                description = f'Check that {column} values are not null'
+            elif rule_type == 'UNIQUE':
+                rule_name = f'{column} Unique Check'
+                dsl_expression = f'UNIQUE("{column}")'
+                description = f'Check that {column} values are unique'
+            elif rule_type == 'IN_RANGE':
+                rule_name = f'{column} Range Check'
+                # Use the recommended p0.1-p99.9 bounds, falling back to a default range
+                params = rec.get('params') or {}
+                dsl_expression = f'IN_RANGE("{column}", {dsl_number(params.get("min", 0))}, {dsl_number(params.get("max", 1000000))})'
+                description = f'Check that {column} values are within range'
+            elif rule_type == 'REGEX':
+                rule_name = f'{column} Email Format Check'
+                dsl_expression = f'REGEX("{column}", "^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\\.[a-zA-Z]{{2,}}$")'
+                description = f'Check that {column} values match email format'
+            else:
+                rule_name = f'{column} {rule_type} Check'
+                dsl_expression = f'{rule_type}("{column}")'
+                description = f'Auto-generated {rule_type} rule for {column}'
+            
+            # Create the rule
+            rule = Rule.objects.create(
+                name=rule_name,
+                description=description,
+                dataset=dataset,
+                rule_type=rule_type,
+                dsl_expression=dsl_expression,
+                owner=user,
+                is_active=True
+            )
+            
+            created_rules.append(rule)
+            
+            # Create initial rule run for dashboard visualization
+            rule_run = RuleRun.objects.create(
+                rule=rule,
+                dataset=dataset,
+                run_id=f"initial_run_{rule.id}_{timezone.now().strftime('%Y%m%d%H%M%S')}",
+                started_at=timezone.now(),
+                finished_at=timezone.now(),
+                status='COMPLETED',
+                total_rows=dataset.row_count or 0,
+                passed_count=dataset.row_count or 0,  # Initially assume all pass
+                failed_count=0,
+                sample_evidence=[]
+            )
+            
+    except Exception as e:
+        logger.error(f"Error creating rules from recommendations: {str(e)}")
+    
+    return created_rules
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from apps.datasets.content_store import collect_dataset_content, store_dataset_content
+from apps.datasets.models import Dataset
+from apps.datasets.utils_profiling import dataset_content_hash
+
+
+class Command(BaseCommand):
+    help = 'Delete stored dataset files that no dataset references'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--adopt',
+            action='store_true',
+            help='First move CSV datasets uploaded before content-addressed storage into it',
+        )
+
+    def handle(self, *args, **options):
+        if options['adopt']:
+            adopted = shared = 0
+            for dataset in Dataset.objects.filter(source_type='CSV', content__isnull=True).exclude(file=''):
+                content_hash = dataset_content_hash(dataset)
+                if not content_hash:
+                    self.stdout.write(self.style.WARNING(f'  - Skipped {dataset.name}: file not readable'))
+                    continue
+                _, was_shared = store_dataset_content(dataset, content_hash)
+                adopted += 1
+                shared += was_shared
+            self.stdout.write(f'Adopted {adopted} datasets ({shared} shared existing content)')
+
+        deleted, freed = collect_dataset_content()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} unreferenced dataset files ({freed / 1024 / 1024:.1f} MB freed)'))
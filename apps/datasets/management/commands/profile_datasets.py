@@ -1,6 +1,45 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import connections
 from apps.datasets.models import Dataset
-from apps.datasets.utils_profiling import profile_dataset
+from apps.datasets.utils_profiling import profile_dataset, dataset_content_hash, profile_is_current
+
+
+def _init_worker(column_workers):
+    # Forked workers must not share the parent's database connections
+    connections.close_all()
+    settings.PROFILE_WORKERS = column_workers
+
+
+def profile_one(dataset_id, force=False):
+    """
+    Profile one dataset unless its file is unchanged since the last profile.
+    Returns a summary entry: id, name, status (profiled, skipped, failed,
+    missing) and seconds.
+    """
+    started = time.monotonic()
+    try:
+        dataset = Dataset.objects.get(id=dataset_id)
+    except Dataset.DoesNotExist:
+        return {'id': dataset_id, 'name': None, 'status': 'missing', 'seconds': 0.0}
+
+    content_hash = dataset_content_hash(dataset)
+    if not force and profile_is_current(dataset, content_hash):
+        status = 'skipped'
+    else:
+        status = 'profiled' if profile_dataset(dataset, content_hash) else 'failed'
+    return {
+        'id': dataset.id,
+        'name': dataset.name,
+        'status': status,
+        'content_hash': content_hash,
+        'seconds': round(time.monotonic() - started, 3),
+    }
 
 
 class Command(BaseCommand):
@@ -17,50 +56,99 @@ class Command(BaseCommand):
             action='store_true',
             help='Profile all datasets',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of datasets to profile in parallel (default: 1)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-profile datasets whose file is unchanged since the last profile',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print a JSON summary with per-dataset timing instead of progress lines',
+        )
 
     def handle(self, *args, **options):
         if options['dataset_id']:
-            try:
-                dataset = Dataset.objects.get(id=options['dataset_id'])
-                self.stdout.write(f'Profiling dataset: {dataset.name}')
-                if profile_dataset(dataset):
-                    self.stdout.write(
-                        self.style.SUCCESS(f'Successfully profiled dataset: {dataset.name}')
-                    )
-                else:
-                    self.stdout.write(
-                        self.style.ERROR(f'Failed to profile dataset: {dataset.name}')
-                    )
-            except Dataset.DoesNotExist:
-                self.stdout.write(
-                    self.style.ERROR(f'Dataset with ID {options["dataset_id"]} does not exist')
-                )
+            dataset_ids = [options['dataset_id']]
         elif options['all']:
-            datasets = Dataset.objects.all()
-            self.stdout.write(f'Profiling {len(datasets)} datasets...')
-            
-            success_count = 0
-            for dataset in datasets:
-                self.stdout.write(f'Profiling dataset: {dataset.name}')
-                if profile_dataset(dataset):
-                    success_count += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(f'  ✓ Successfully profiled {dataset.name}')
-                    )
-                else:
-                    self.stdout.write(
-                        self.style.ERROR(f'  ✗ Failed to profile {dataset.name}')
-                    )
-            
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'Profiled {success_count}/{len(datasets)} datasets successfully'
-                )
-            )
+            dataset_ids = list(Dataset.objects.values_list('id', flat=True))
         else:
             self.stdout.write(
                 self.style.WARNING(
                     'Please specify either --dataset-id or --all flag. '
                     'Use --help for more information.'
                 )
-            )
\ No newline at end of file
+            )
+            return
+
+        as_json = options['json']
+        if not as_json:
+            self.stdout.write(f'Profiling {len(dataset_ids)} datasets...')
+
+        started = time.monotonic()
+        results = []
+        for result in self._profile(dataset_ids, options['workers'], options['force']):
+            results.append(result)
+            if not as_json:
+                self._report(result)
+        elapsed = round(time.monotonic() - started, 3)
+
+        counts = {status: sum(1 for r in results if r['status'] == status) for status in ('profiled', 'skipped', 'failed', 'missing')}
+        if as_json:
+            self.stdout.write(json.dumps({
+                'total': len(results),
+                **counts,
+                'workers': options['workers'],
+                'seconds': elapsed,
+                'datasets': sorted(results, key=lambda r: r['id']),
+            }, indent=2))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Profiled {counts["profiled"]}/{len(results)} datasets successfully '
+                    f'({counts["skipped"]} unchanged, {counts["failed"]} failed) in {elapsed:.1f}s'
+                )
+            )
+
+    def _profile(self, dataset_ids, workers, force):
+        """
+        Yield summary entries as datasets finish, profiling up to `workers`
+        datasets at once in forked processes
+        """
+        if workers <= 1 or len(dataset_ids) <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            for dataset_id in dataset_ids:
+                yield profile_one(dataset_id, force)
+            return
+
+        # Split the CPUs between datasets so per-column pools don't oversubscribe
+        column_workers = max(1, (os.cpu_count() or 1) // workers)
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_worker,
+            initargs=(column_workers,),
+        ) as executor:
+            futures = {executor.submit(profile_one, dataset_id, force): dataset_id for dataset_id in dataset_ids}
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as e:
+                    yield {'id': futures[future], 'name': None, 'status': 'failed', 'error': str(e), 'seconds': None}
+
+    def _report(self, result):
+        name = result['name'] or f'#{result["id"]}'
+        if result['status'] == 'profiled':
+            self.stdout.write(self.style.SUCCESS(f'  ✓ Successfully profiled {name} ({result["seconds"]:.2f}s)'))
+        elif result['status'] == 'skipped':
+            self.stdout.write(f'  - Skipped {name}: unchanged since last profile')
+        elif result['status'] == 'missing':
+            self.stdout.write(self.style.ERROR(f'Dataset with ID {result["id"]} does not exist'))
+        else:
+            self.stdout.write(self.style.ERROR(f'  ✗ Failed to profile {name}'))
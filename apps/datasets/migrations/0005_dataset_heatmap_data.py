@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0004_dataset_quality_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='heatmap_data',
+            field=models.JSONField(blank=True, help_text='Per-dataset heatmap data for visualization', null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0005_dataset_heatmap_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetProfileSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.BinaryField(help_text='zlib-compressed ProfileAccumulator state')),
+                ('row_count', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('dataset', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile_sketch', to='datasets.dataset')),
+            ],
+        ),
+    ]
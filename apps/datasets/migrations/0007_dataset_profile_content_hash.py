@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0006_dataset_profile_sketch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='profile_content_hash',
+            field=models.CharField(blank=True, help_text='SHA-256 of the file when it was last profiled', max_length=64),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('datasets', '0008_dataset_ingestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('file_name', models.CharField(help_text='Storage name the chunks are appended to', max_length=255)),
+                ('total_size', models.BigIntegerField(blank=True, help_text='Expected size in bytes, if the client sent one', null=True)),
+                ('bytes_received', models.BigIntegerField(default=0)),
+                ('line_count', models.BigIntegerField(default=0, help_text='Newlines received so far')),
+                ('ends_with_newline', models.BooleanField(default=True)),
+                ('sha256', models.CharField(blank=True, help_text='Content hash, set on completion', max_length=64)),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('COMPLETED', 'Completed')], default='OPEN', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('dataset', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload', to='datasets.dataset')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dataset_uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
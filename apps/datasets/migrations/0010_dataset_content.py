@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0009_dataset_upload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetContent',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('file_name', models.CharField(help_text='Storage name of the shared file', max_length=255)),
+                ('size', models.BigIntegerField(default=0)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('released_at', models.DateTimeField(blank=True, help_text='When the last reference was dropped', null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ref_count', 'released_at'], name='datasets_da_ref_cou_db1eee_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='content',
+            field=models.ForeignKey(blank=True, help_text='Content-addressed file shared by datasets with identical uploads', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='datasets', to='datasets.datasetcontent'),
+        ),
+    ]
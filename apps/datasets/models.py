@@ -1,6 +1,8 @@
+import uuid
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from .compression import compression_for
 
 
 class Dataset(models.Model):
@@ -26,6 +28,9 @@ class Dataset(models.Model):
     quality_score = models.DecimalField(max_digits=5, decimal_places=2, default=0.00, help_text="Overall quality score (0-100)")
     sample_stats = models.JSONField(blank=True, null=True, help_text="Sample statistics for the dataset")
     schema = models.JSONField(blank=True, null=True, help_text="Dataset schema information")
+    profile_content_hash = models.CharField(max_length=64, blank=True, help_text="SHA-256 of the file when it was last profiled")
+    content = models.ForeignKey('DatasetContent', on_delete=models.PROTECT, null=True, blank=True, related_name='datasets',
+                                help_text="Content-addressed file shared by datasets with identical uploads")
     # Graph data
     quality_trend_data = models.JSONField(blank=True, null=True, help_text="Quality trend data for charts")
     rule_pass_rates = models.JSONField(blank=True, null=True, help_text="Rule-level pass rates for charts")
@@ -48,4 +53,153 @@ class Dataset(models.Model):
             self.row_count = 0
         if self.column_count is None:
             self.column_count = 0
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+class DatasetContent(models.Model):
+    """
+    A dataset file stored once under its SHA-256. Datasets uploaded with
+    identical bytes point at the same content; ref_count tracks how many do,
+    and content nobody references is removed by collect_dataset_content().
+    Content files are never modified in place.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    file_name = models.CharField(max_length=255, help_text="Storage name of the shared file")
+    size = models.BigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    released_at = models.DateTimeField(null=True, blank=True, help_text="When the last reference was dropped")
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'released_at']),
+        ]
+    
+    def __str__(self):
+        return f"Content {self.sha256[:12]} ({self.ref_count} references)"
+
+
+class DatasetProfileSketch(models.Model):
+    """
+    Resumable sketch-based profile state (HyperLogLog registers, moments,
+    candidate top values) so appended data can be profiled incrementally
+    """
+    dataset = models.OneToOneField(Dataset, on_delete=models.CASCADE, related_name='profile_sketch')
+    payload = models.BinaryField(help_text="zlib-compressed ProfileAccumulator state")
+    row_count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Profile sketch for {self.dataset.name} ({self.row_count} rows)"
+
+
+class DatasetIngestion(models.Model):
+    """
+    Background processing of an uploaded dataset (parse, profile, recommend
+    rules), with the stage and percentage reported by the progress endpoint
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    STAGE_CHOICES = [
+        ('queued', 'Queued'),
+        ('parsing', 'Parsing file'),
+        ('caching', 'Storing dataset metadata'),
+        ('profiling', 'Profiling columns'),
+        ('recommending', 'Recommending rules'),
+        ('creating_rules', 'Creating rules'),
+        ('completed', 'Completed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    dataset = models.ForeignKey(Dataset, on_delete=models.SET_NULL, null=True, blank=True, related_name='ingestions')
+    dataset_name = models.CharField(max_length=255)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='dataset_ingestions')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, default='queued')
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent complete (0-100)")
+    rules_created = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Ingestion of {self.dataset_name} ({self.status}, {self.progress}%)"
+    
+    def to_dict(self):
+        return {
+            'id': str(self.id),
+            'dataset_id': self.dataset_id,
+            'dataset_name': self.dataset_name,
+            'status': self.status,
+            'stage': self.stage,
+            'stage_display': self.get_stage_display(),
+            'progress': self.progress,
+            'rules_created': self.rules_created,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class DatasetUpload(models.Model):
+    """
+    A chunked, resumable CSV upload. Chunks are appended straight into the
+    dataset file; the byte offset, line count and content hash advance with
+    each chunk so completing the upload never rereads the file.
+    """
+    STATUS_CHOICES = [
+        ('OPEN', 'Open'),
+        ('COMPLETED', 'Completed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='dataset_uploads')
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    file_name = models.CharField(max_length=255, help_text="Storage name the chunks are appended to")
+    total_size = models.BigIntegerField(null=True, blank=True, help_text="Expected size in bytes, if the client sent one")
+    bytes_received = models.BigIntegerField(default=0)
+    line_count = models.BigIntegerField(default=0, help_text="Newlines received so far")
+    ends_with_newline = models.BooleanField(default=True)
+    sha256 = models.CharField(max_length=64, blank=True, help_text="Content hash, set on completion")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='OPEN')
+    dataset = models.OneToOneField(Dataset, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Upload of {self.name} ({self.bytes_received} bytes, {self.status})"
+    
+    @property
+    def row_count(self):
+        """
+        Data rows (lines after the header); a final line without a newline still
+        counts. None for compressed uploads, whose rows are counted on ingestion.
+        """
+        if compression_for(self.file_name):
+            return None
+        lines = self.line_count + (0 if self.ends_with_newline or self.bytes_received == 0 else 1)
+        return max(lines - 1, 0)
+    
+    def to_dict(self):
+        return {
+            'upload_id': str(self.id),
+            'name': self.name,
+            'status': self.status,
+            'offset': self.bytes_received,
+            'total_size': self.total_size,
+            'row_count': self.row_count,
+            'sha256': self.sha256 or None,
+            'dataset_id': self.dataset_id,
+        }
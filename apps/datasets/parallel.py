@@ -0,0 +1,120 @@
+import logging
+import multiprocessing
+import os
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Frame and per-group function for the running pool. Workers are forked
+# while these are set, so they read the parent's frame through shared
+# copy-on-write pages; only column names and results cross the pipe.
+#
+# Forking while the background writer threads (audit, API log, metrics) are
+# running is safe here: only the forking thread exists in a child, and a
+# child only runs func over its columns and returns. It never touches the
+# writers' buffers, their locks or a database connection, so no lock held by
+# a thread that didn't survive the fork is ever waited on.
+_shared = {}
+
+
+def get_worker_count():
+    """
+    Configured PROFILE_WORKERS, or every CPU when it is 0
+    """
+    workers = getattr(settings, 'PROFILE_WORKERS', 0) or os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def _column_bytes(frame):
+    return [int(frame.iloc[:, i].memory_usage(index=False, deep=False)) for i in range(frame.shape[1])]
+
+
+def column_groups(frame, workers, budget_bytes):
+    """
+    Split the columns into contiguous groups for the pool.
+
+    Aims for a few groups per worker so uneven columns balance out, and caps
+    each group at the per-worker share of the memory budget, since a worker's
+    scratch memory (codes, hashes, the numeric block) grows with its group.
+
+    Returns (groups, workers): the worker count is lowered when the budget
+    can't hold one of the largest columns per worker.
+    """
+    sizes = _column_bytes(frame)
+    if sizes:
+        workers = max(1, min(workers, budget_bytes // max(max(sizes), 1)))
+    target = min(sum(sizes) / (workers * 4), budget_bytes / workers)
+
+    groups = []
+    current, current_bytes = [], 0
+    for column, size in zip(frame.columns, sizes):
+        if current and current_bytes + size > target:
+            groups.append(current)
+            current, current_bytes = [], 0
+        current.append(column)
+        current_bytes += size
+    if current:
+        groups.append(current)
+    return groups, workers
+
+
+def _pool_context():
+    """
+    Fork context to start the pool from, or None if no pool can be started.
+
+    multiprocessing won't let a daemonic process (such as a Celery prefork
+    pool child, where ingestion and profiling tasks run) start children, but
+    billiard, Celery's fork of it, will, so daemonic processes use billiard.
+    """
+    try:
+        import billiard
+    except ImportError:
+        billiard = None
+    daemonic = multiprocessing.current_process().daemon or (
+        billiard is not None and billiard.current_process().daemon
+    )
+    if not daemonic:
+        return multiprocessing.get_context('fork')
+    return billiard.get_context('fork') if billiard is not None else None
+
+
+def _run_group(columns):
+    return _shared['func'](_shared['frame'], columns)
+
+
+def map_column_groups(frame, func):
+    """
+    Run func(frame, columns) over groups of the frame's columns across a
+    process pool and return the results in column order.
+
+    Small frames, PROFILE_WORKERS=1 and platforms without fork run in
+    process as a single group covering every column. A pool that can't be
+    started (e.g. a daemonic process without billiard) falls back to the same.
+
+    Args:
+        frame: DataFrame to split by column
+        func: Module-level or closure callable; it is never pickled
+    """
+    workers = get_worker_count()
+    min_cells = getattr(settings, 'PROFILE_PARALLEL_MIN_CELLS', 5_000_000)
+    if workers == 1 or frame.size < min_cells or frame.shape[1] < 2 \
+            or 'fork' not in multiprocessing.get_all_start_methods():
+        return [func(frame, list(frame.columns))]
+    context = _pool_context()
+    if context is None:
+        return [func(frame, list(frame.columns))]
+
+    budget_bytes = getattr(settings, 'PROFILE_MEMORY_BUDGET_MB', 4096) * 1024 * 1024
+    groups, workers = column_groups(frame, workers, budget_bytes)
+    if workers == 1 or len(groups) == 1:
+        return [func(frame, list(frame.columns))]
+
+    _shared.update(frame=frame, func=func)
+    try:
+        with context.Pool(min(workers, len(groups))) as pool:
+            return pool.map(_run_group, groups, chunksize=1)
+    except (AssertionError, OSError) as e:
+        logger.warning(f"Column pool unavailable ({e}); profiling in process")
+        return [func(frame, list(frame.columns))]
+    finally:
+        _shared.clear()
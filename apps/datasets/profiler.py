@@ -0,0 +1,291 @@
+import warnings
+import numpy as np
+import pandas as pd
+from .parallel import map_column_groups
+
+# Column dtypes that get min/max/mean/std, as in the original per-column profiler
+NUMERIC_DTYPES = ('int64', 'float64')
+
+# Percentiles stored for numeric columns; IN_RANGE suggestions use the outer pair
+PERCENTILES = (0.001, 0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99, 0.999)
+HISTOGRAM_BINS = 20
+
+
+def is_text_column(series):
+    """
+    True for object columns and pandas string columns (the default for CSV text in pandas 3)
+    """
+    return series.dtype == object or isinstance(series.dtype, pd.StringDtype)
+
+
+def _float_or_none(value):
+    return None if pd.isna(value) else float(value)
+
+
+def percentile_label(fraction):
+    return f'p{fraction * 100:g}'
+
+
+def histogram(edges, counts):
+    return {'edges': [float(edge) for edge in edges], 'counts': [int(count) for count in counts]}
+
+
+def _distribution(values):
+    """
+    Percentiles and a fixed-bin histogram for one column's values
+    """
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return {}
+    counts, edges = np.histogram(values, bins=HISTOGRAM_BINS)
+    return {
+        'percentiles': dict(zip(map(percentile_label, PERCENTILES), np.quantile(values, PERCENTILES).tolist())),
+        'histogram': histogram(edges, counts),
+    }
+
+
+def range_bounds(stats):
+    """
+    Suggested IN_RANGE bounds (p0.1, p99.9) from a column's profile, or None
+    """
+    percentiles = (stats or {}).get('percentiles')
+    if not percentiles:
+        return None
+    return percentiles[percentile_label(PERCENTILES[0])], percentiles[percentile_label(PERCENTILES[-1])]
+
+
+def dsl_number(value):
+    """
+    Positional notation for a DSL argument (the parser reads '1e-05' as text)
+    """
+    return np.format_float_positional(float(value), trim='-')
+
+
+def _numeric_summary(frame, columns):
+    """
+    min/max/mean/std for all numeric columns at once, as one 2-D NumPy reduction
+    per statistic, plus each column's percentiles and histogram
+    """
+    if not columns:
+        return {}
+    values = frame[columns].to_numpy(dtype='float64')
+    with warnings.catch_warnings(), np.errstate(all='ignore'):
+        # All-null columns produce NaN (reported as None) rather than a warning
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mins = np.nanmin(values, axis=0) if len(values) else np.full(len(columns), np.nan)
+        maxs = np.nanmax(values, axis=0) if len(values) else np.full(len(columns), np.nan)
+        means = np.nanmean(values, axis=0)
+        stds = np.nanstd(values, axis=0, ddof=1)
+    return {
+        column: {
+            'min': _float_or_none(mins[i]),
+            'max': _float_or_none(maxs[i]),
+            'mean': _float_or_none(means[i]),
+            'std': _float_or_none(stds[i]),
+            **_distribution(values[:, i]),
+        }
+        for i, column in enumerate(columns)
+    }
+
+
+# Row hashes are folded column by column: h = h * _HASH_MULTIPLIER ^ column_hash
+_HASH_MULTIPLIER = np.uint64(1099511628211)
+_NULL_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _value_hashes(uniques, text):
+    """
+    64-bit hash of each distinct value (hashing uniques, not rows)
+    """
+    values = np.asarray(uniques, dtype=object) if text else np.asarray(uniques)
+    return pd.util.hash_array(values, categorize=False)
+
+
+def _text_summary(uniques, counts):
+    """
+    Top values and numeric-looking count for a text column; the string
+    checks run over the distinct values only, weighted by their counts
+    """
+    top = np.argsort(-counts, kind='stable')[:5]
+    try:
+        numeric_like = pd.Series(uniques).str.isnumeric().fillna(False).to_numpy(dtype=bool)
+        numeric_like_count = int(counts[numeric_like].sum())
+    except AttributeError:
+        numeric_like_count = 0
+
+    return {
+        'top_values': {str(uniques[i]): int(counts[i]) for i in top},
+        'numeric_like_count': numeric_like_count,
+    }
+
+
+def profile_column_block(frame):
+    """
+    Per-column statistics for every column of `frame`, plus a 64-bit hash
+    per row over those columns (used to count duplicate rows).
+
+    Each column is factorized exactly once; that single hash pass yields the
+    distinct count, the top values and the column's contribution to the row
+    hash. The null mask is computed once for the whole block, and numeric
+    summaries come from one NumPy reduction over the numeric columns.
+
+    Returns:
+        (stats, row_hash): dict of column name -> statistics (including
+        'sample_values'), and a uint64 array of length len(frame)
+    """
+    row_count = len(frame)
+    null_mask = frame.isna().to_numpy()
+    null_counts = null_mask.sum(axis=0)
+    row_hash = np.zeros(row_count, dtype=np.uint64)
+
+    numeric_columns = [column for column in frame.columns if str(frame[column].dtype) in NUMERIC_DTYPES]
+    numeric = _numeric_summary(frame, numeric_columns)
+
+    stats = {}
+    for i, column in enumerate(frame.columns):
+        col_data = frame.iloc[:, i]
+        null_count = int(null_counts[i])
+        text = is_text_column(col_data)
+        col_stats = {
+            'name': column,
+            'dtype': str(col_data.dtype),
+            'non_null_count': row_count - null_count,
+            'null_count': null_count,
+            'null_percentage': round((null_count / row_count) * 100, 2) if row_count > 0 else 0,
+        }
+
+        codes, uniques = pd.factorize(col_data, use_na_sentinel=True)
+        col_stats['unique_count'] = int(len(uniques))
+        if text:
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            col_stats.update(_text_summary(uniques, counts))
+
+        if column in numeric:
+            col_stats.update(numeric[column])
+
+        # First three non-null values, without materialising a dropna() copy
+        positions = np.flatnonzero(~null_mask[:, i])[:3]
+        col_stats['sample_values'] = col_data.iloc[positions].tolist()
+
+        if len(uniques):
+            column_hash = np.where(codes >= 0, _value_hashes(uniques, text)[codes], _NULL_HASH)
+        else:
+            column_hash = np.full(row_count, _NULL_HASH, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            row_hash = (row_hash * _HASH_MULTIPLIER) ^ column_hash
+
+        stats[column] = col_stats
+
+    return stats, row_hash
+
+
+def profile_columns(df, columns=None):
+    """
+    Per-column statistics, each column scanned once.
+
+    Args:
+        df: DataFrame to profile
+        columns: Optional subset of column names (defaults to all)
+
+    Returns:
+        Dict of column name -> statistics, including 'sample_values'
+    """
+    frame = df if columns is None else df[list(columns)]
+    return profile_column_block(frame)[0]
+
+
+def count_hash_duplicates(row_hash):
+    return int(pd.Series(row_hash).duplicated().sum()) if len(row_hash) else 0
+
+
+def count_duplicate_rows(df):
+    """
+    Duplicate rows via one 64-bit hash per row instead of comparing full rows
+    """
+    if df.empty:
+        return 0
+    return int(pd.util.hash_pandas_object(df, index=False).duplicated().sum())
+
+
+def score_quality(row_count, total_cells, missing_cells, duplicate_rows):
+    """
+    Overall quality score (0-100) from already-computed counts
+    """
+    if row_count == 0:
+        return 0.0
+
+    # Factors for quality score calculation:
+    # 1. Completeness (missing values) - 40%
+    # 2. Uniqueness (duplicate rows) - 30%
+    # 3. Consistency (data types) - 20%
+    # 4. Validity (schema adherence) - 10%
+    completeness_score = (1 - (missing_cells / total_cells)) * 40 if total_cells > 0 else 0
+    uniqueness_score = (1 - (duplicate_rows / row_count)) * 30
+    consistency_score = 20  # Placeholder
+    validity_score = 10  # Placeholder
+
+    return round(float(completeness_score + uniqueness_score + consistency_score + validity_score), 2)
+
+
+def build_profile(df, column_stats, row_hash=None):
+    """
+    Assemble the frame-level profile from per-column statistics.
+    Duplicate rows come from the row hash when the column pass produced one.
+    """
+    row_count = len(df)
+    missing_cells = sum(stats['null_count'] for stats in column_stats.values())
+    duplicate_rows = count_hash_duplicates(row_hash) if row_hash is not None else count_duplicate_rows(df)
+
+    columns = {}
+    schema_columns = []
+    for column, stats in column_stats.items():
+        stats = dict(stats)
+        sample_values = stats.pop('sample_values', [])
+        columns[column] = stats
+        schema_columns.append({'name': column, 'dtype': stats['dtype'], 'sample_values': sample_values})
+
+    return {
+        'row_count': row_count,
+        'column_count': len(df.columns),
+        'missing_cells': missing_cells,
+        'duplicate_rows': duplicate_rows,
+        'quality_score': score_quality(row_count, df.size, missing_cells, duplicate_rows),
+        'columns': columns,
+        'schema': {
+            'columns': schema_columns,
+            'total_columns': len(df.columns),
+            'total_rows': row_count,
+        },
+    }
+
+
+def _profile_group(frame, columns):
+    return profile_column_block(frame[columns])
+
+
+def profile_column_groups(df):
+    """
+    profile_column_block() over column groups in a process pool (see
+    parallel.map_column_groups). With several groups the row hash folds
+    the groups' row hashes, which identifies duplicate rows equally well.
+    """
+    results = map_column_groups(df, _profile_group)
+    if len(results) == 1:
+        return results[0]
+
+    column_stats = {}
+    row_hash = np.zeros(len(df), dtype=np.uint64)
+    for stats, group_hash in results:
+        column_stats.update(stats)
+        with np.errstate(over='ignore'):
+            row_hash = (row_hash * _HASH_MULTIPLIER) ^ group_hash
+    return column_stats, row_hash
+
+
+def profile_frame(df):
+    """
+    Profile a DataFrame once; the result feeds profile_dataset(),
+    generate_quality_report() and the profile API.
+    """
+    column_stats, row_hash = profile_column_groups(df)
+    return build_profile(df, column_stats, row_hash)
@@ -0,0 +1,262 @@
+import base64
+import json
+import zlib
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from .profiler import (
+    NUMERIC_DTYPES, PERCENTILES, HISTOGRAM_BINS, is_text_column, score_quality, percentile_label, histogram,
+)
+from .sketches import HyperLogLog, KLLSketch, hash_values
+
+# Candidate values kept per text column for the approximate top values
+TOP_CANDIDATES = 1000
+
+# Exact duplicate-row detection keeps one 8-byte hash per distinct row up to
+# this many rows; past it the row HyperLogLog estimate is used instead
+EXACT_DUPLICATE_ROW_LIMIT = 5_000_000
+
+
+def _new_sketch():
+    return HyperLogLog.for_error(getattr(settings, 'PROFILE_HLL_ERROR', 0.01))
+
+
+def _new_quantile_sketch():
+    return KLLSketch(getattr(settings, 'PROFILE_QUANTILE_K', 400))
+
+
+def sketch_distribution(sketch):
+    """
+    Percentiles and a fixed-bin histogram read from a KLL sketch, in the same
+    shape the exact profiler produces
+    """
+    if sketch.count == 0:
+        return {}
+    low, high = (sketch.min - 0.5, sketch.max + 0.5) if sketch.min == sketch.max else (sketch.min, sketch.max)
+    edges = np.linspace(low, high, HISTOGRAM_BINS + 1)
+    cumulative = sketch.cdf(edges)
+    cumulative[0], cumulative[-1] = 0.0, 1.0
+    # Rounding the cumulative counts keeps the bins summing to the value count
+    counts = np.diff(np.round(cumulative * sketch.count))
+    return {
+        'percentiles': dict(zip(map(percentile_label, PERCENTILES), sketch.quantiles(PERCENTILES).tolist())),
+        'histogram': histogram(edges, counts),
+    }
+
+
+def count_distinct(series):
+    """
+    Distinct non-null values: exact nunique(), or a HyperLogLog estimate
+    when PROFILE_DISTINCT_MODE is 'hll'
+    """
+    if getattr(settings, 'PROFILE_DISTINCT_MODE', 'exact') == 'hll':
+        return min(_new_sketch().add_series(series).count(), int(series.notna().sum()))
+    return int(series.nunique())
+
+
+class ColumnAccumulator:
+    """
+    Mergeable per-column profile state: counts, numeric moments, candidate
+    top values, a HyperLogLog for the distinct count and a KLL sketch for
+    percentiles and the histogram. Memory use does not depend on the number
+    of rows.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.dtype = None
+        self.rows = 0
+        self.nulls = 0
+        self.text = False
+        self.numeric = True
+        # Numeric moments (Chan et al. parallel variance)
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.top = {}
+        self.numeric_like = 0
+        self.sample_values = []
+        self.sketch = _new_sketch()
+        self.quantiles = _new_quantile_sketch()
+
+    def add(self, series):
+        null_mask = series.isna().to_numpy()
+        self.rows += len(series)
+        self.nulls += int(null_mask.sum())
+        if self.dtype is None or (is_text_column(series) and not self.text):
+            self.dtype = str(series.dtype)
+
+        non_null = series[~null_mask]
+        if len(self.sample_values) < 3:
+            self.sample_values.extend(non_null.head(3 - len(self.sample_values)).tolist())
+        if len(non_null) == 0:
+            return
+
+        self.sketch.add_hashes(hash_values(non_null))
+
+        if str(series.dtype) in NUMERIC_DTYPES:
+            values = non_null.to_numpy(dtype='float64')
+            if self.quantiles is not None:
+                self.quantiles.add_values(values)
+            self._merge_moments(len(values), float(values.mean()), float(((values - values.mean()) ** 2).sum()))
+            self.min = float(values.min()) if self.min is None else min(self.min, float(values.min()))
+            self.max = float(values.max()) if self.max is None else max(self.max, float(values.max()))
+        else:
+            self.numeric = False
+
+        if is_text_column(series):
+            self.text = True
+            counts = non_null.value_counts()
+            try:
+                self.numeric_like += int(counts[pd.Series(counts.index).str.isnumeric().fillna(False).to_numpy(dtype=bool)].sum())
+            except AttributeError:
+                pass
+            self._merge_top({str(k): int(v) for k, v in counts.head(TOP_CANDIDATES).items()})
+
+    def _merge_moments(self, n, mean, m2):
+        if n == 0:
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.mean += delta * n / total
+        self.n = total
+
+    def _merge_top(self, counts):
+        for value, count in counts.items():
+            self.top[value] = self.top.get(value, 0) + count
+        if len(self.top) > TOP_CANDIDATES:
+            self.top = dict(sorted(self.top.items(), key=lambda item: -item[1])[:TOP_CANDIDATES])
+
+    def stats(self):
+        non_null = self.rows - self.nulls
+        col_stats = {
+            'name': self.name,
+            'dtype': self.dtype,
+            'non_null_count': non_null,
+            'null_count': self.nulls,
+            'null_percentage': round((self.nulls / self.rows) * 100, 2) if self.rows > 0 else 0,
+            'unique_count': min(self.sketch.count(), non_null),
+        }
+        if self.text:
+            col_stats['top_values'] = dict(sorted(self.top.items(), key=lambda item: -item[1])[:5])
+            col_stats['numeric_like_count'] = self.numeric_like
+        elif self.numeric and self.dtype in NUMERIC_DTYPES:
+            col_stats.update({
+                'min': self.min,
+                'max': self.max,
+                'mean': self.mean if self.n else None,
+                'std': float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else None,
+                **(sketch_distribution(self.quantiles) if self.quantiles is not None else {}),
+            })
+        return col_stats
+
+    def to_dict(self):
+        state = {key: value for key, value in self.__dict__.items() if key not in ('sketch', 'quantiles')}
+        state['sketch'] = base64.b64encode(self.sketch.to_bytes()).decode('ascii')
+        state['quantiles'] = base64.b64encode(self.quantiles.to_bytes()).decode('ascii') if self.quantiles is not None else None
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        accumulator = cls(state['name'])
+        accumulator.__dict__.update({key: value for key, value in state.items() if key not in ('sketch', 'quantiles')})
+        accumulator.sketch = HyperLogLog.from_bytes(base64.b64decode(state['sketch']))
+        # State saved before quantile sketches existed has no percentiles until the next full profile
+        quantiles = state.get('quantiles')
+        accumulator.quantiles = KLLSketch.from_bytes(base64.b64decode(quantiles)) if quantiles else None
+        return accumulator
+
+
+class ProfileAccumulator:
+    """
+    Builds a dataset profile from a stream of DataFrame chunks in bounded
+    memory. The state can be saved and resumed, so appended rows can be
+    folded into an existing profile without rereading the old ones.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = {}
+        self.row_sketch = _new_sketch()
+        self.row_hashes = np.empty(0, dtype=np.uint64)
+        self.exact_duplicates = True
+
+    def add(self, chunk):
+        self.rows += len(chunk)
+        for column in chunk.columns:
+            if column not in self.columns:
+                self.columns[column] = ColumnAccumulator(column)
+            self.columns[column].add(chunk[column])
+
+        if len(chunk):
+            row_hash = pd.util.hash_pandas_object(chunk, index=False, categorize=False).to_numpy()
+            self.row_sketch.add_hashes(row_hash)
+            if self.exact_duplicates:
+                self.row_hashes = np.union1d(self.row_hashes, row_hash)
+                if len(self.row_hashes) > EXACT_DUPLICATE_ROW_LIMIT:
+                    self.exact_duplicates = False
+                    self.row_hashes = np.empty(0, dtype=np.uint64)
+        return self
+
+    def duplicate_rows(self):
+        distinct = len(self.row_hashes) if self.exact_duplicates else min(self.row_sketch.count(), self.rows)
+        return max(self.rows - distinct, 0)
+
+    def profile(self):
+        """
+        Same shape as profiler.build_profile(), with approximate distinct counts
+        """
+        column_stats = {name: column.stats() for name, column in self.columns.items()}
+        missing_cells = sum(stats['null_count'] for stats in column_stats.values())
+        duplicate_rows = self.duplicate_rows()
+        return {
+            'row_count': self.rows,
+            'column_count': len(self.columns),
+            'missing_cells': missing_cells,
+            'duplicate_rows': duplicate_rows,
+            'quality_score': score_quality(self.rows, self.rows * len(self.columns), missing_cells, duplicate_rows),
+            'columns': column_stats,
+            'schema': {
+                'columns': [
+                    {'name': name, 'dtype': column.dtype, 'sample_values': column.sample_values}
+                    for name, column in self.columns.items()
+                ],
+                'total_columns': len(self.columns),
+                'total_rows': self.rows,
+            },
+            'approximate': True,
+            'distinct_error': self.row_sketch.relative_error,
+        }
+
+    def to_bytes(self):
+        # Exact row hashes are not persisted; a resumed profile estimates duplicates
+        state = {
+            'rows': self.rows,
+            'columns': [column.to_dict() for column in self.columns.values()],
+            'row_sketch': base64.b64encode(self.row_sketch.to_bytes()).decode('ascii'),
+        }
+        return zlib.compress(json.dumps(state, default=str).encode('utf-8'), 6)
+
+    @classmethod
+    def from_bytes(cls, payload):
+        state = json.loads(zlib.decompress(bytes(payload)).decode('utf-8'))
+        accumulator = cls()
+        accumulator.rows = state['rows']
+        accumulator.columns = {column['name']: ColumnAccumulator.from_dict(column) for column in state['columns']}
+        accumulator.row_sketch = HyperLogLog.from_bytes(base64.b64decode(state['row_sketch']))
+        accumulator.exact_duplicates = False
+        return accumulator
+
+
+def profile_chunks(chunks, accumulator=None):
+    """
+    Fold an iterable of DataFrame chunks (e.g. pd.read_csv(..., chunksize=N))
+    into a ProfileAccumulator
+    """
+    accumulator = accumulator or ProfileAccumulator()
+    for chunk in chunks:
+        accumulator.add(chunk)
+    return accumulator
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from .content_store import release_content
+from .models import Dataset
+
+
+@receiver(post_delete, sender=Dataset)
+def release_dataset_content(sender, instance, **kwargs):
+    """
+    Drop the deleted dataset's reference to its stored content
+    """
+    if instance.content_id:
+        release_content(instance.content_id)
@@ -0,0 +1,232 @@
+import math
+import struct
+import zlib
+import numpy as np
+import pandas as pd
+
+
+def hash_values(series):
+    """
+    64-bit hash per non-null value, without building a hash table
+    """
+    values = series.dropna()
+    if len(values) == 0:
+        return np.empty(0, dtype=np.uint64)
+    if values.dtype == object or isinstance(values.dtype, pd.StringDtype):
+        array = np.asarray(values, dtype=object)
+    else:
+        array = values.to_numpy()
+    return pd.util.hash_array(array, categorize=False)
+
+
+def _bit_length(values):
+    """
+    Vectorized int.bit_length() for a uint64 array
+    """
+    values = values.copy()
+    lengths = np.zeros(values.shape, dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        over = values >= (np.uint64(1) << np.uint64(shift))
+        lengths[over] += shift
+        values[over] >>= np.uint64(shift)
+    lengths += (values > 0).astype(np.uint8)
+    return lengths
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count sketch over 64-bit hashes.
+
+    Uses 2**precision one-byte registers regardless of how many values are
+    added; two sketches with the same precision merge by taking the
+    register-wise maximum, so chunks (or later appends) can be profiled
+    separately and combined.
+    """
+
+    MIN_PRECISION = 4
+    MAX_PRECISION = 18
+
+    def __init__(self, precision=14, registers=None):
+        if not self.MIN_PRECISION <= precision <= self.MAX_PRECISION:
+            raise ValueError(f"HyperLogLog precision must be between {self.MIN_PRECISION} and {self.MAX_PRECISION}")
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    @classmethod
+    def for_error(cls, relative_error):
+        """
+        Smallest sketch whose standard error (1.04 / sqrt(m)) is within relative_error
+        """
+        registers_needed = (1.04 / relative_error) ** 2
+        precision = math.ceil(math.log2(registers_needed))
+        return cls(min(max(precision, cls.MIN_PRECISION), cls.MAX_PRECISION))
+
+    @property
+    def relative_error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add_hashes(self, hashes):
+        if len(hashes) == 0:
+            return self
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        remainder = hashes & ((np.uint64(1) << (np.uint64(64) - p)) - np.uint64(1))
+        rank = (64 - self.precision) - _bit_length(remainder).astype(np.int16) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def add_series(self, series):
+        return self.add_hashes(hash_values(series))
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        return bytes([self.precision]) + zlib.compress(self.registers.tobytes(), 6)
+
+    @classmethod
+    def from_bytes(cls, payload):
+        payload = bytes(payload)
+        registers = np.frombuffer(zlib.decompress(payload[1:]), dtype=np.uint8).copy()
+        return cls(payload[0], registers)
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang & Liberty) over finite float values.
+
+    Values are kept in a stack of compactors; an item at level h stands for
+    2**h input values. When the sketch outgrows its capacity the lowest full
+    level is sorted and every other item (random offset) is promoted to the
+    level above, so memory stays around 3k items however many values are
+    added. The rank error is roughly 1.7 / k. Sketches with the same k
+    merge by concatenating levels and compacting, so chunks (or later
+    appends) can be summarised separately and combined.
+    """
+
+    CAPACITY_DECAY = 2 / 3
+
+    def __init__(self, k=200, levels=None, count=0, min_value=None, max_value=None):
+        if k < 8:
+            raise ValueError("KLL k must be at least 8")
+        self.k = k
+        self.levels = levels if levels is not None else [np.empty(0, dtype=np.float64)]
+        self.count = count
+        self.min = min_value
+        self.max = max_value
+        self._rng = np.random.default_rng()
+
+    @property
+    def rank_error(self):
+        return 1.7 / self.k
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * self.CAPACITY_DECAY ** depth)))
+
+    def _compress(self):
+        while sum(len(items) for items in self.levels) > sum(self._capacity(h) for h in range(len(self.levels))):
+            level = next(h for h, items in enumerate(self.levels) if len(items) >= self._capacity(h))
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+            items = np.sort(self.levels[level])
+            # An odd item out stays behind so the promoted half keeps exact weight
+            keep = items[:1] if len(items) % 2 else items[:0]
+            items = items[len(keep):]
+            promoted = items[int(self._rng.integers(2))::2]
+            self.levels[level] = keep
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+
+    def add_values(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return self
+        self.count += len(values)
+        low, high = float(values.min()), float(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        if other.k != self.k:
+            raise ValueError("Cannot merge KLL sketches with different k")
+        if other.count == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype=np.float64) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, fractions):
+        """
+        Approximate values at each fraction in [0, 1]; 0 and 1 return the exact min and max
+        """
+        fractions = np.asarray(fractions, dtype=np.float64)
+        if self.count == 0:
+            return np.full(len(fractions), np.nan)
+        items, cumulative = self._weighted_items()
+        positions = np.searchsorted(cumulative, fractions * cumulative[-1], side='left')
+        result = items[np.minimum(positions, len(items) - 1)]
+        result = np.where(fractions <= 0, self.min, result)
+        return np.clip(np.where(fractions >= 1, self.max, result), self.min, self.max)
+
+    def cdf(self, points):
+        """
+        Approximate fraction of values <= each point
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if self.count == 0:
+            return np.zeros(len(points))
+        items, cumulative = self._weighted_items()
+        positions = np.searchsorted(items, points, side='right')
+        below = np.where(positions > 0, cumulative[np.maximum(positions - 1, 0)], 0.0)
+        return below / cumulative[-1]
+
+    def to_bytes(self):
+        sizes = np.array([len(level) for level in self.levels], dtype=np.uint32)
+        header = struct.pack('<IQddI', self.k, self.count,
+                             np.nan if self.min is None else self.min,
+                             np.nan if self.max is None else self.max,
+                             len(sizes))
+        return zlib.compress(header + sizes.tobytes() + np.concatenate(self.levels).tobytes(), 6)
+
+    @classmethod
+    def from_bytes(cls, payload):
+        data = zlib.decompress(bytes(payload))
+        header_size = struct.calcsize('<IQddI')
+        k, count, min_value, max_value, level_count = struct.unpack('<IQddI', data[:header_size])
+        sizes = np.frombuffer(data, dtype=np.uint32, count=level_count, offset=header_size)
+        items = np.frombuffer(data, dtype=np.float64, offset=header_size + sizes.nbytes).copy()
+        levels = np.split(items, np.cumsum(sizes)[:-1].astype(np.intp)) if level_count else []
+        return cls(
+            k, levels or None, count,
+            None if math.isnan(min_value) else min_value,
+            None if math.isnan(max_value) else max_value,
+        )
@@ -0,0 +1,21 @@
+from celery import shared_task
+from .ingestion import run_ingestion
+
+
+@shared_task
+def ingest_dataset_task(ingestion_id):
+    """
+    Parse, profile and recommend rules for an uploaded dataset.
+    """
+    ingestion = run_ingestion(ingestion_id)
+    return f"Ingestion {ingestion_id} {ingestion.status.lower()}: {ingestion.rules_created} rules created"
+
+
+@shared_task
+def collect_dataset_content_task():
+    """
+    Delete stored dataset content that no dataset references anymore.
+    """
+    from .content_store import collect_dataset_content
+    deleted, freed = collect_dataset_content()
+    return f"Deleted {deleted} unreferenced dataset files ({freed} bytes)"
@@ -1,8 +1,32 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 import pandas as pd
+import numpy as np
 import os
-from .utils import analyze_dataset_for_rules
+import bz2
+import gzip
+import json
+import shutil
+import tempfile
+import billiard
+from io import StringIO
+from unittest.mock import patch
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from .models import Dataset, DatasetContent, DatasetProfileSketch
+from .utils import analyze_dataset_for_rules, stratified_sample, classify_values
+from .profiler import profile_frame, range_bounds
+from .utils_profiling import generate_quality_report, generate_recommendations, profile_dataset, stored_profile
+from .sketches import HyperLogLog, KLLSketch
+from .profiler_streaming import ProfileAccumulator, profile_chunks
+from .parallel import column_groups, map_column_groups
+from .compression import validate_csv_file, CompressionError
+from .content_store import collect_dataset_content
+from apps.rules.models import Rule
+from apps.incidents.models import Incident
+from apps.rules.utils.rule_executor import RuleExecutor
 
 User = get_user_model()
 
@@ -35,4 +59,473 @@ class DatasetUtilsTest(TestCase):
             self.assertIn('type', rec)
             self.assertIn('column', rec)
             self.assertIn('confidence', rec)
-            self.assertIn('reason', rec)
\ No newline at end of file
+            self.assertIn('reason', rec)
+
+
+class ProfilerTest(TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'amount': [10.0, 20.0, 20.0, None, 10.0],
+            'city': ['Pune', 'Delhi', 'Delhi', None, 'Pune'],
+            'zip': ['411001', '110001', '110001', '400001', '411001'],
+            'empty': [np.nan] * 5,
+        })
+    
+    def test_single_pass_matches_pandas(self):
+        """Test that the one-pass profile agrees with the per-column pandas calls it replaces"""
+        profile = profile_frame(self.df)
+        self.assertEqual(profile['duplicate_rows'], int(self.df.duplicated().sum()))
+        self.assertEqual(profile['missing_cells'], int(self.df.isnull().sum().sum()))
+        for column in self.df.columns:
+            stats = profile['columns'][column]
+            self.assertEqual(stats['null_count'], int(self.df[column].isnull().sum()))
+            self.assertEqual(stats['unique_count'], int(self.df[column].nunique()))
+        amount = profile['columns']['amount']
+        self.assertAlmostEqual(amount['std'], float(self.df['amount'].std()))
+        self.assertEqual((amount['min'], amount['max'], amount['mean']), (10.0, 20.0, 15.0))
+        self.assertEqual(profile['columns']['city']['top_values'], {'Pune': 2, 'Delhi': 2})
+        self.assertIsNone(profile['columns']['empty']['mean'])
+        self.assertEqual(profile['schema']['columns'][1]['sample_values'], ['Pune', 'Delhi', 'Delhi'])
+    
+    def test_recommendations_reuse_profile(self):
+        """Test that recommendations are derived from the shared profile"""
+        profile = profile_frame(self.df)
+        types = {rec['type'] for rec in generate_recommendations(self.df, profile)}
+        self.assertEqual(types, {'missing_values', 'duplicates', 'data_type'})
+
+
+class SketchProfilingTest(TestCase):
+    def test_hyperloglog_estimates_and_merges(self):
+        """Test that HLL counts are within the error bound and merging equals the union"""
+        left = HyperLogLog.for_error(0.01).add_series(pd.Series(range(0, 30000)).astype(str))
+        right = HyperLogLog.for_error(0.01).add_series(pd.Series(range(20000, 50000)).astype(str))
+        self.assertLess(abs(left.count() - 30000) / 30000, 0.03)
+        restored = HyperLogLog.from_bytes(left.to_bytes())
+        self.assertLess(abs(restored.merge(right).count() - 50000) / 50000, 0.03)
+    
+    def test_chunked_profile_matches_exact_profile(self):
+        """Test that the streaming profile agrees with the exact one apart from distinct counts"""
+        df = pd.DataFrame({
+            'amount': [float(i % 7) if i % 5 else None for i in range(1000)],
+            'code': [f'C{i % 50}' for i in range(1000)],
+        })
+        exact = profile_frame(df)
+        approximate = profile_chunks(df.iloc[i:i + 128] for i in range(0, len(df), 128)).profile()
+        
+        self.assertEqual(approximate['duplicate_rows'], exact['duplicate_rows'])
+        self.assertEqual(approximate['missing_cells'], exact['missing_cells'])
+        for stat in ('min', 'max', 'mean', 'std'):
+            self.assertAlmostEqual(approximate['columns']['amount'][stat], exact['columns']['amount'][stat])
+        self.assertEqual(approximate['columns']['code']['top_values'], exact['columns']['code']['top_values'])
+        self.assertEqual(approximate['columns']['code']['unique_count'], 50)
+    
+    def test_incremental_update_resumes_stored_state(self):
+        """Test that saved accumulator state can absorb appended rows"""
+        first = profile_chunks([pd.DataFrame({'id': range(100)})])
+        resumed = ProfileAccumulator.from_bytes(first.to_bytes()).add(pd.DataFrame({'id': range(100, 150)}))
+        profile = resumed.profile()
+        self.assertEqual(profile['row_count'], 150)
+        self.assertEqual(profile['columns']['id']['max'], 149.0)
+        self.assertEqual(profile['columns']['id']['unique_count'], 150)
+    
+    @override_settings(PROFILE_DISTINCT_MODE='hll')
+    def test_unique_recommendation_uses_sketch(self):
+        """Test that UNIQUE is still recommended when distinct counts come from HyperLogLog"""
+        df = pd.DataFrame({'order_id': [f'ORD-{i}' for i in range(2000)]})
+        types = {(rec['type'], rec['column']) for rec in analyze_dataset_for_rules(df)}
+        self.assertIn(('UNIQUE', 'order_id'), types)
+
+
+class QuantileSketchTest(TestCase):
+    def setUp(self):
+        self.values = np.random.default_rng(7).lognormal(size=200000)
+        self.sorted_values = np.sort(self.values)
+    
+    def rank_errors(self, sketch, fractions):
+        estimates = sketch.quantiles(fractions)
+        return np.abs(np.searchsorted(self.sorted_values, estimates) / len(self.values) - np.asarray(fractions))
+    
+    def test_kll_quantiles_within_rank_error_after_merge_and_restore(self):
+        """Test that merged and restored KLL sketches stay within their rank error"""
+        fractions = [0.001, 0.25, 0.5, 0.75, 0.999]
+        left = KLLSketch(400).add_values(self.values[:120000])
+        right = KLLSketch(400).add_values(self.values[120000:])
+        merged = KLLSketch.from_bytes(left.merge(right).to_bytes())
+        self.assertEqual(merged.count, len(self.values))
+        self.assertLess(self.rank_errors(merged, fractions).max(), merged.rank_error)
+        self.assertEqual(merged.quantiles([0, 1]).tolist(), [self.values.min(), self.values.max()])
+    
+    def test_streaming_distribution_matches_exact_profile(self):
+        """Test that sketch percentiles and histograms agree with the exact profile"""
+        df = pd.DataFrame({'amount': self.values})
+        exact = profile_frame(df)['columns']['amount']
+        approximate = profile_chunks(df.iloc[i:i + 50000] for i in range(0, len(df), 50000)).profile()['columns']['amount']
+        
+        self.assertEqual(sum(approximate['histogram']['counts']), len(df))
+        self.assertEqual(sum(exact['histogram']['counts']), len(df))
+        self.assertEqual(approximate['histogram']['edges'], exact['histogram']['edges'])
+        for label, value in exact['percentiles'].items():
+            rank = np.searchsorted(self.sorted_values, approximate['percentiles'][label]) / len(df)
+            self.assertAlmostEqual(rank, np.searchsorted(self.sorted_values, value) / len(df), delta=0.005)
+    
+    def test_range_recommendation_uses_outer_percentiles(self):
+        """Test that IN_RANGE bounds come from p0.1-p99.9 rather than the raw min and max"""
+        df = pd.DataFrame({'latency': [float(i % 100) for i in range(9995)] + [5000.0] * 5})
+        column_stats = profile_frame(df)['columns']
+        self.assertEqual(range_bounds(column_stats['latency']), (0.0, 99.0))
+        
+        for stats in (None, column_stats):
+            [rec] = [rec for rec in analyze_dataset_for_rules(df, stats) if rec['type'] == 'IN_RANGE']
+            self.assertEqual((rec['params']['min'], rec['params']['max']), (0.0, 99.0))
+        types = {rec['type'] for rec in generate_recommendations(df, profile_frame(df))}
+        self.assertIn('outliers', types)
+
+
+@override_settings(PROFILE_WORKERS=2, PROFILE_PARALLEL_MIN_CELLS=0)
+class ParallelProfilingTest(TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'id': range(400),
+            'amount': [float(i % 13) for i in range(400)],
+            'email': [f'user{i % 40}@example.com' for i in range(400)],
+            'city': ['Pune', 'Delhi', None, 'Mumbai'] * 100,
+        })
+    
+    def test_pool_profile_matches_in_process_profile(self):
+        """Test that profiling column groups in worker processes gives the same profile"""
+        parallel = profile_frame(self.df)
+        with self.settings(PROFILE_WORKERS=1):
+            serial = profile_frame(self.df)
+        self.assertEqual(parallel['columns'], serial['columns'])
+        self.assertEqual(parallel['duplicate_rows'], serial['duplicate_rows'])
+    
+    def test_pool_recommendations_keep_column_order(self):
+        """Test that recommendations from worker processes match the in-process ones"""
+        parallel = analyze_dataset_for_rules(self.df)
+        with self.settings(PROFILE_WORKERS=1):
+            serial = analyze_dataset_for_rules(self.df)
+        self.assertEqual(parallel, serial)
+    
+    def test_memory_budget_limits_groups_and_workers(self):
+        """Test that column groups fit the per-worker budget and workers shrink to fit it"""
+        column_bytes = self.df['amount'].memory_usage(index=False)
+        groups, workers = column_groups(self.df, 8, budget_bytes=column_bytes * 2)
+        self.assertEqual(workers, 2)
+        self.assertEqual([column for group in groups for column in group], list(self.df.columns))
+        self.assertTrue(all(len(group) == 1 for group in groups))
+    
+    def test_daemonic_worker_starts_its_own_pool(self):
+        """Test that a daemonic process (as a Celery prefork child is) still splits the columns across a pool"""
+        def worker_pids(frame, columns):
+            return os.getpid(), columns
+        
+        def run_in_child(conn):
+            conn.send((os.getpid(), map_column_groups(self.df, worker_pids)))
+            conn.close()
+        
+        receiver, sender = billiard.Pipe(duplex=False)
+        child = billiard.get_context('fork').Process(target=run_in_child, args=(sender,), daemon=True)
+        child.start()
+        self.assertTrue(receiver.poll(60), 'The daemonic child never reported back')
+        child_pid, results = receiver.recv()
+        child.join(10)
+        
+        self.assertEqual([column for _, columns in results for column in columns], list(self.df.columns))
+        pool_pids = {pid for pid, _ in results}
+        self.assertNotIn(child_pid, pool_pids)
+        self.assertNotIn(os.getpid(), pool_pids)
+
+
+@override_settings(RULE_SAMPLE_ROWS=500, RULE_SAMPLE_CONFIDENCE=0.95)
+class RuleSamplingTest(TestCase):
+    def test_stratified_sample_spans_the_frame(self):
+        """Test that the sample takes one row from every slice of the frame"""
+        df = pd.DataFrame({'id': range(10000)})
+        sample = stratified_sample(df, 500)
+        self.assertEqual(len(sample), 500)
+        self.assertEqual((sample['id'] // 20).tolist(), list(range(500)))
+        self.assertTrue(stratified_sample(df.head(100), 500).equals(df.head(100)))
+    
+    def test_sampled_recommendations_state_confidence(self):
+        """Test that large frames are analyzed on a sample and report its size and margin of error"""
+        df = pd.DataFrame({
+            'contact': [f'user{i}@example.com' if i % 4 else '555-123-4567' for i in range(20000)],
+        })
+        self.assertEqual(classify_values(df['contact'].head(8)), {'email': 6, 'phone': 2, 'url': 0})
+        
+        [email] = [rec for rec in analyze_dataset_for_rules(df) if rec['type'] == 'REGEX']
+        self.assertAlmostEqual(float(email['reason'].split('%')[0]), 75.0, delta=5)
+        self.assertEqual(email['sample']['rows'], 500)
+        self.assertEqual(email['sample']['total_rows'], 20000)
+        self.assertEqual(email['sample']['confidence'], 0.95)
+        self.assertGreater(email['sample']['margin_of_error'], 0)
+    
+    def test_unique_is_not_estimated_from_the_sample(self):
+        """Test that UNIQUE comes from full-column counts, not from a sample whose values happen to be distinct"""
+        # Every value appears twice, but never twice in the stratified sample
+        df = pd.DataFrame({'code': [i // 2 for i in range(20000)], 'id': range(20000)})
+        self.assertEqual(stratified_sample(df, 500)['code'].nunique(), 500)
+        unique = {rec['column']: rec for rec in analyze_dataset_for_rules(df) if rec['type'] == 'UNIQUE'}
+        self.assertEqual(set(unique), {'id'})
+        self.assertNotIn('sample', unique['id'])
+    
+    def test_profiled_counts_are_not_sampled(self):
+        """Test that null and distinct counts come from the stored profile when one is given"""
+        df = pd.DataFrame({'id': range(20000)})
+        recommendations = analyze_dataset_for_rules(df, profile_frame(df)['columns'])
+        self.assertTrue(all('sample' not in rec for rec in recommendations))
+
+
+class ProfileDatasetsCommandTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        
+        user = User.objects.create_user(username='profiler', password='testpass123')
+        self.dataset = Dataset.objects.create(name='orders', source_type='CSV', owner=user)
+        self.dataset.file.save('orders.csv', ContentFile(b'id,amount\n1,10\n2,20\n'))
+    
+    def run_command(self):
+        out = StringIO()
+        call_command('profile_datasets', '--all', '--json', stdout=out)
+        return json.loads(out.getvalue())
+    
+    def test_unchanged_files_are_skipped(self):
+        """Test that a dataset is re-profiled only when its file content changes"""
+        first = self.run_command()
+        self.assertEqual((first['profiled'], first['skipped']), (1, 0))
+        self.assertEqual(first['datasets'][0]['status'], 'profiled')
+        self.assertIsNotNone(first['datasets'][0]['seconds'])
+        
+        self.assertEqual(self.run_command()['datasets'][0]['status'], 'skipped')
+        
+        with open(self.dataset.file.path, 'ab') as handle:
+            handle.write(b'3,30\n')
+        self.assertEqual(self.run_command()['datasets'][0]['status'], 'profiled')
+        self.dataset.refresh_from_db()
+        self.assertEqual(self.dataset.row_count, 3)
+    
+    def test_quality_report_reads_stored_profile(self):
+        """Test that the quality report is built from the stored profile without reloading the data"""
+        with patch('apps.datasets.utils_profiling.compute_profile') as compute:
+            self.assertIsNone(stored_profile(self.dataset))
+            compute.return_value = (None, None)
+            self.assertIsNone(generate_quality_report(self.dataset))
+            self.assertEqual(compute.call_count, 1)
+        
+        profile_dataset(self.dataset)
+        with patch('apps.datasets.utils_profiling.compute_profile') as compute:
+            report = generate_quality_report(self.dataset)
+            compute.assert_not_called()
+        self.assertEqual(report['summary'], {'total_rows': 2, 'total_columns': 2, 'missing_values': 0, 'duplicate_rows': 0})
+        self.assertEqual(set(report['column_details']), {'id', 'amount'})
+
+
+@override_settings(DATASET_INGESTION='sync')
+class DatasetIngestionTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        
+        self.user = User.objects.create_user(username='uploader', password='testpass123')
+        self.client.force_login(self.user)
+    
+    def upload(self, name, content):
+        return self.client.post(
+            reverse('datasets:dataset_create'),
+            {'name': name, 'source_type': 'CSV', 'file': SimpleUploadedFile(f'{name}.csv', content)},
+            HTTP_ACCEPT='application/json',
+        )
+    
+    def test_upload_returns_ingestion_id_and_reports_progress(self):
+        """Test that an upload returns an ingestion id whose progress reaches completion"""
+        response = self.upload('orders', b'id,email\n1,a@example.com\n2,b@example.com\n')
+        self.assertEqual(response.status_code, 202)
+        
+        progress = self.client.get(response.json()['progress_url']).json()
+        self.assertEqual((progress['status'], progress['stage'], progress['progress']), ('COMPLETED', 'completed', 100))
+        self.assertGreater(progress['rules_created'], 0)
+        
+        dataset = Dataset.objects.get(name='orders')
+        self.assertEqual(dataset.row_count, 2)
+        self.assertIn('percentiles', dataset.sample_stats['id'])
+        self.assertEqual(dataset.rules.count(), progress['rules_created'])
+        self.assertContains(self.client.get(reverse('datasets:ingestion_detail', args=[progress['id']])), 'orders')
+    
+    def test_failed_ingestion_keeps_error_and_removes_dataset(self):
+        """Test that an unreadable file fails the ingestion and deletes the dataset"""
+        response = self.upload('broken', b'\n\n')
+        progress = self.client.get(response.json()['progress_url']).json()
+        self.assertEqual(progress['status'], 'FAILED')
+        self.assertIn('Error processing CSV file', progress['error'])
+        self.assertFalse(Dataset.objects.filter(name='broken').exists())
+    
+    @override_settings(PROFILE_DISTINCT_MODE='hll')
+    def test_sketch_mode_upload_stores_resumable_profile(self):
+        """Test that ingestion in hll mode profiles with sketches and stores the sketch"""
+        response = self.upload('orders', b'id,email\n1,a@example.com\n2,b@example.com\n')
+        self.assertEqual(self.client.get(response.json()['progress_url']).json()['status'], 'COMPLETED')
+        
+        dataset = Dataset.objects.get(name='orders')
+        self.assertTrue(dataset.schema.get('approximate'))
+        self.assertEqual(DatasetProfileSketch.objects.get(dataset=dataset).row_count, 2)
+    
+    @override_settings(DATASET_INGESTION='async')
+    def test_async_upload_queues_task_without_parsing(self):
+        """Test that the upload request only queues the ingestion task"""
+        with patch('apps.datasets.tasks.ingest_dataset_task.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.upload('events', b'id\n1\n')
+        ingestion_id = response.json()['ingestion_id']
+        delay.assert_called_once_with(ingestion_id)
+        
+        progress = self.client.get(reverse('datasets:ingestion_progress', args=[ingestion_id])).json()
+        self.assertEqual((progress['status'], progress['stage'], progress['progress']), ('PENDING', 'queued', 0))
+        self.assertEqual(Dataset.objects.get(name='events').row_count, 0)
+
+
+@override_settings(DATASET_INGESTION='sync')
+class CompressedDatasetTest(TestCase):
+    CSV = b'id,email\n' + b''.join(f'{i},user{i}@example.com\n'.encode() for i in range(500))
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        
+        self.user = User.objects.create_user(username='compressor', password='testpass123')
+        self.client.force_login(self.user)
+    
+    def upload(self, filename, content):
+        return self.client.post(
+            reverse('datasets:dataset_create'),
+            {'name': filename.split('.')[0], 'source_type': 'CSV', 'file': SimpleUploadedFile(filename, content)},
+            HTTP_ACCEPT='application/json',
+        )
+    
+    def test_gzip_and_bz2_uploads_are_ingested_compressed(self):
+        """Test that gzip and bz2 CSVs are stored as sent and parsed, profiled and checked by rules"""
+        for filename, content in (('orders.csv.gz', gzip.compress(self.CSV)), ('events.csv.bz2', bz2.compress(self.CSV))):
+            response = self.upload(filename, content)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(self.client.get(response.json()['progress_url']).json()['status'], 'COMPLETED')
+            
+            dataset = Dataset.objects.get(name=filename.split('.')[0])
+            self.assertTrue(dataset.file.name.endswith(filename.partition('.')[2]))
+            with open(dataset.file.path, 'rb') as handle:
+                self.assertEqual(handle.read(), content)
+            self.assertEqual((dataset.row_count, dataset.column_count), (500, 2))
+            
+            rule = Rule.objects.create(name='id', dataset=dataset, rule_type='NOT_NULL', dsl_expression="NOT_NULL('id')", owner=self.user)
+            rule_run = RuleExecutor(rule, dataset).execute()
+            self.assertEqual((rule_run.passed_count, rule_run.failed_count), (500, 0))
+    
+    @override_settings(PROFILE_DISTINCT_MODE='hll', PROFILE_CHUNK_ROWS=100)
+    def test_chunked_profile_streams_compressed_file(self):
+        """Test that sketch profiling reads a compressed file in chunks"""
+        dataset = Dataset.objects.create(name='orders', source_type='CSV', owner=self.user)
+        dataset.file.save('orders.csv.gz', ContentFile(gzip.compress(self.CSV)))
+        self.assertTrue(profile_dataset(dataset))
+        
+        dataset.refresh_from_db()
+        self.assertEqual(dataset.row_count, 500)
+        self.assertTrue(dataset.schema.get('approximate'))
+        self.assertEqual(dataset.sample_stats['id']['max'], 499)
+    
+    def test_upload_validation_checks_extension_and_header(self):
+        """Test that uploads must be CSVs whose data matches the compression suffix"""
+        for filename, content in (('orders.txt', self.CSV), ('orders.csv.gz', self.CSV), ('orders.csv.bz2', b'BZh9 corrupt')):
+            response = self.upload(filename, content)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.context['form'].errors['file'])
+        self.assertFalse(Dataset.objects.exists())
+        
+        with self.assertRaises(CompressionError):
+            validate_csv_file('orders.csv.gz', SimpleUploadedFile('orders.csv.gz', gzip.compress(self.CSV)[:-8] + b'\xff' * 8 + b'x'))
+
+
+@override_settings(DATASET_INGESTION='sync')
+class ContentStoreTest(TestCase):
+    CSV = b'id,amount\n' + b''.join(f'{i},{i % 7}\n'.encode() for i in range(200))
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        
+        self.user = User.objects.create_user(username='deduper', password='testpass123')
+        self.client.force_login(self.user)
+    
+    def upload(self, name, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('datasets:dataset_create'),
+                {'name': name, 'source_type': 'CSV', 'file': SimpleUploadedFile(f'{name}.csv', content)},
+                HTTP_ACCEPT='application/json',
+            )
+        return Dataset.objects.get(name=name)
+    
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root) for name in names
+        )
+    
+    def test_identical_uploads_share_file_profile_and_sketch(self):
+        """Test that a second identical upload shares the stored bytes and reuses the first profile"""
+        first = self.upload('orders', self.CSV)
+        with patch('apps.datasets.ingestion.profile_frame') as profile_frame:
+            second = self.upload('orders_copy', self.CSV)
+        profile_frame.assert_not_called()
+        
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(self.stored_files(), [first.file.name])
+        self.assertEqual(DatasetContent.objects.get().ref_count, 2)
+        self.assertEqual(second.sample_stats, first.sample_stats)
+        self.assertEqual((second.row_count, second.quality_score), (200, first.quality_score))
+        self.assertEqual(second.rules.count(), first.rules.count())
+        
+        different = self.upload('refunds', self.CSV + b'200,1\n')
+        self.assertNotEqual(different.file.name, first.file.name)
+        self.assertEqual(DatasetContent.objects.count(), 2)
+    
+    def test_rule_results_are_reused_across_shared_content(self):
+        """Test that a rule over shared content reuses the result of the same expression"""
+        first, second = self.upload('orders', self.CSV), self.upload('orders_copy', self.CSV)
+        expression = "UNIQUE('amount')"
+        runs = []
+        for dataset in (first, second):
+            rule = Rule.objects.create(name='amount', dataset=dataset, rule_type='UNIQUE', dsl_expression=expression, owner=self.user)
+            with patch.object(RuleExecutor, '_load_dataset', wraps=RuleExecutor(rule, dataset)._load_dataset) as load:
+                runs.append(RuleExecutor(rule, dataset).execute())
+            self.assertEqual(load.call_count, 1 if dataset is first else 0)
+        
+        self.assertEqual(runs[0].result_cache_key, runs[1].result_cache_key)
+        self.assertEqual((runs[1].failed_count, runs[1].total_rows), (runs[0].failed_count, 200))
+        self.assertEqual(runs[1].dataset, second)
+        self.assertTrue(Incident.objects.filter(dataset=second).exists())
+    
+    def test_unreferenced_content_is_collected(self):
+        """Test that stored content is deleted only once no dataset references it"""
+        first, second = self.upload('orders', self.CSV), self.upload('orders_copy', self.CSV)
+        stored = first.file.name
+        
+        first.delete()
+        self.assertEqual(collect_dataset_content(), (0, 0))
+        self.assertEqual(self.stored_files(), [stored])
+        
+        second.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(collect_dataset_content(), (1, len(self.CSV)))
+        self.assertFalse(DatasetContent.objects.exists())
+        self.assertEqual(self.stored_files(), [])
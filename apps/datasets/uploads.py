@@ -0,0 +1,171 @@
+import hashlib
+import logging
+import os
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.text import get_valid_filename
+from .compression import CSV_EXTENSIONS, CompressionError, is_csv_filename, validate_csv_file
+from .ingestion import start_ingestion
+from .models import Dataset, DatasetUpload
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the request per write
+UPLOAD_BLOCK_SIZE = 1024 * 1024
+
+# Running SHA-256 per open upload in this process, with the number of bytes
+# it has consumed. hashlib state can't be persisted, so a chunk handled by
+# another process rebuilds it from the bytes already stored.
+_hashers = {}
+
+
+class UploadError(Exception):
+    """
+    An upload request that can't be applied (bad name, closed upload, hash mismatch)
+    """
+
+
+class UploadOffsetMismatch(UploadError):
+    """
+    A chunk sent for an offset other than the bytes received so far
+    """
+
+    def __init__(self, expected):
+        super().__init__(f'Expected chunk at offset {expected}')
+        self.expected = expected
+
+
+def create_upload(owner, name, filename, description='', total_size=None):
+    """
+    Open a chunked upload for a new CSV dataset
+    """
+    if not name:
+        raise UploadError('A dataset name is required')
+    if Dataset.objects.filter(name=name).exists():
+        raise UploadError(f'Dataset "{name}" already exists')
+    if not is_csv_filename(filename):
+        raise UploadError(f'Only {", ".join(CSV_EXTENSIONS)} files can be uploaded')
+
+    upload = DatasetUpload(owner=owner, name=name, description=description, total_size=total_size)
+    upload.file_name = f'datasets/{upload.id.hex}_{get_valid_filename(os.path.basename(filename))}'
+    path = default_storage.path(upload.file_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+    upload.save()
+    return upload
+
+
+def _hasher_at(upload, path):
+    """
+    SHA-256 state covering exactly the first bytes_received bytes of the file
+    """
+    hasher, hashed = _hashers.get(upload.id, (None, None))
+    if hasher is not None and hashed == upload.bytes_received:
+        return hasher
+    if upload.bytes_received == 0:
+        return hashlib.sha256()
+
+    logger.info(f"Rebuilding hash state for upload {upload.id} from {upload.bytes_received} stored bytes")
+    hasher = hashlib.sha256()
+    remaining = upload.bytes_received
+    with open(path, 'rb') as handle:
+        while remaining:
+            block = handle.read(min(UPLOAD_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def append_chunk(upload_id, offset, stream):
+    """
+    Append the bytes of `stream` (anything with read(n)) at `offset`.
+
+    The offset must equal the bytes received so far; anything past it from
+    an interrupted earlier attempt is truncated first, so a client can
+    always resume from the offset the server reports. The hash and line
+    count advance with the bytes as they are written.
+
+    Returns the updated DatasetUpload.
+    """
+    with transaction.atomic():
+        upload = DatasetUpload.objects.select_for_update().get(pk=upload_id)
+        if upload.status != 'OPEN':
+            raise UploadError('Upload is already completed')
+        if offset != upload.bytes_received:
+            raise UploadOffsetMismatch(upload.bytes_received)
+
+        path = default_storage.path(upload.file_name)
+        hasher = _hasher_at(upload, path)
+        _hashers.pop(upload.id, None)
+
+        written = 0
+        newlines = 0
+        last_byte = None
+        with open(path, 'r+b') as handle:
+            handle.truncate(offset)
+            handle.seek(offset)
+            for block in iter(lambda: stream.read(UPLOAD_BLOCK_SIZE), b''):
+                handle.write(block)
+                hasher.update(block)
+                newlines += block.count(b'\n')
+                written += len(block)
+                last_byte = block[-1:]
+            handle.flush()
+            os.fsync(handle.fileno())
+
+        upload.bytes_received += written
+        upload.line_count += newlines
+        if last_byte is not None:
+            upload.ends_with_newline = last_byte == b'\n'
+        upload.save(update_fields=['bytes_received', 'line_count', 'ends_with_newline', 'updated_at'])
+        _hashers[upload.id] = (hasher, upload.bytes_received)
+    return upload
+
+
+def complete_upload(upload_id, expected_sha256=None):
+    """
+    Turn a finished upload into a Dataset, using the hash and row count
+    gathered while the chunks arrived, and start its ingestion.
+
+    Returns (upload, ingestion).
+    """
+    with transaction.atomic():
+        upload = DatasetUpload.objects.select_for_update().select_related('owner').get(pk=upload_id)
+        if upload.status != 'OPEN':
+            raise UploadError('Upload is already completed')
+        if upload.bytes_received == 0:
+            raise UploadError('No data has been uploaded')
+        if upload.total_size is not None and upload.total_size != upload.bytes_received:
+            raise UploadError(f'Received {upload.bytes_received} of {upload.total_size} bytes')
+
+        path = default_storage.path(upload.file_name)
+        sha256 = _hasher_at(upload, path).hexdigest()
+        if expected_sha256 and expected_sha256.lower() != sha256:
+            raise UploadError(f'Content hash mismatch: received data hashes to {sha256}')
+        try:
+            with open(path, 'rb') as handle:
+                validate_csv_file(upload.file_name, handle)
+        except CompressionError as e:
+            raise UploadError(str(e))
+
+        dataset = Dataset(
+            name=upload.name,
+            description=upload.description,
+            source_type='CSV',
+            owner=upload.owner,
+            row_count=upload.row_count or 0,
+            profile_content_hash=sha256,
+        )
+        # The chunks were written to the dataset's final location
+        dataset.file.name = upload.file_name
+        dataset.save()
+
+        upload.sha256 = sha256
+        upload.status = 'COMPLETED'
+        upload.dataset = dataset
+        upload.save(update_fields=['sha256', 'status', 'dataset', 'updated_at'])
+        _hashers.pop(upload.id, None)
+
+    return upload, start_ingestion(dataset, upload.owner)
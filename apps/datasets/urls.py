@@ -7,6 +7,8 @@ app_name = 'datasets'
 urlpatterns = [
     path('', views.dataset_list, name='dataset_list'),
     path('create/', views.dataset_create, name='dataset_create'),
+    path('ingestions/<uuid:ingestion_id>/', views.ingestion_detail, name='ingestion_detail'),
+    path('ingestions/<uuid:ingestion_id>/progress/', views.ingestion_progress, name='ingestion_progress'),
     path('create-enhanced/', views_enhanced.enhanced_dataset_upload, name='enhanced_dataset_upload'),
     path('save-enhanced/', views_enhanced.save_enhanced_dataset, name='save_enhanced_dataset'),
     path('<int:pk>/', views.dataset_detail, name='dataset_detail'),
@@ -1,192 +1,288 @@
 import pandas as pd
 import numpy as np
 from typing import List, Dict, Any
+import math
 import re
 from datetime import datetime
+from statistics import NormalDist
 import logging
+from functools import partial
+from django.conf import settings
+from .parallel import map_column_groups
+from .profiler import PERCENTILES, range_bounds
+from .profiler_streaming import count_distinct
 
 logger = logging.getLogger(__name__)
 
-def analyze_dataset_for_rules(df: pd.DataFrame) -> List[Dict[str, Any]]:
+# Format checks for text columns: (name, pattern, recommend above %, HIGH above %, description)
+VALUE_FORMATS = (
+    ('email', r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', 50, 80, 'email addresses'),
+    ('phone', r'^(\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}$', 50, None, 'phone numbers'),
+    ('url', r'^https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:[\w.])*)?)?$', 30, None, 'URLs'),
+)
+
+# All formats in one alternation: a single match per value, classified by
+# the named group that matched
+VALUE_CLASSIFIER = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern, *_ in VALUE_FORMATS))
+
+DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d']
+
+
+def stratified_sample(df, size, seed=0):
     """
-    Analyze a dataset and generate rule recommendations based on the data.
+    One row drawn at random from each of `size` equal slices of the frame,
+    so every part of the file is represented (uploads are often ordered by
+    time or key). Frames with at most `size` rows are returned as they are.
+    """
+    if len(df) <= size:
+        return df
+    bounds = np.linspace(0, len(df), size + 1).astype(np.int64)
+    offsets = np.random.default_rng(seed).integers(0, np.diff(bounds))
+    return df.iloc[bounds[:-1] + offsets]
+
+
+def classify_values(values):
+    """
+    Count how many values match each of VALUE_FORMATS, trying each distinct
+    value once against the combined pattern
+    """
+    counts = dict.fromkeys((name for name, *_ in VALUE_FORMATS), 0)
+    for value, count in values.value_counts().items():
+        match = VALUE_CLASSIFIER.match(value)
+        if match:
+            counts[match.lastgroup] += int(count)
+    return counts
+
+
+class SampleEstimate:
+    """
+    Sample size and confidence level attached to sampled recommendations
+    """
+
+    def __init__(self, rows, total_rows, confidence):
+        self.rows = rows
+        self.total_rows = total_rows
+        self.confidence = confidence
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    def describe(self, percentage=None):
+        """
+        Sample metadata, with the margin of error (percentage points, Wilson
+        score interval half-width) for a percentage estimated from the sample
+        """
+        info = {'rows': self.rows, 'total_rows': self.total_rows, 'confidence': self.confidence}
+        if percentage is not None:
+            p, n, z2 = percentage / 100, self.rows, self.z ** 2
+            half_width = self.z * math.sqrt(p * (1 - p) / n + z2 / (4 * n * n)) / (1 + z2 / n)
+            info['margin_of_error'] = round(half_width * 100, 2)
+        return info
+
+
+def _analyze_column(column, series, column_stats, estimate=None):
+    """
+    Rule recommendations for one column.
     
     Args:
-        df: Pandas DataFrame containing the dataset
-        
-    Returns:
-        List of rule recommendations with confidence scores
+        column: Column name
+        series: The column's values, or a sample of them
+        column_stats: Optional stored profile columns; exact null and
+            distinct counts and percentiles are read from them when present
+        estimate: SampleEstimate when `series` is a sample; UNIQUE is then
+            only recommended from full-column counts in column_stats
     """
     recommendations = []
+    stats = (column_stats or {}).get(column) or {}
     
-    for column in df.columns:
-        try:
-            series = df[column]
-            
-            # Skip empty columns
-            if len(series.dropna()) == 0:
-                continue
-            
-            # NOT_NULL rule recommendation
-            null_percentage = series.isnull().sum() / len(series) * 100
-            if null_percentage < 95:  # Recommend NOT_NULL if less than 95% are null
-                confidence = min(100, int(100 - null_percentage))
-                recommendations.append({
-                    'type': 'NOT_NULL',
+    def recommend(recommendation, percentage=None, from_sample=True):
+        if estimate is not None and from_sample:
+            recommendation['sample'] = estimate.describe(percentage)
+        recommendations.append(recommendation)
+    
+    non_null_series = series.dropna()
+    
+    # Skip empty columns
+    if len(non_null_series) == 0:
+        return recommendations
+    
+    # NOT_NULL rule recommendation
+    profiled_nulls = 'null_percentage' in stats
+    null_percentage = stats['null_percentage'] if profiled_nulls else (len(series) - len(non_null_series)) / len(series) * 100
+    if null_percentage < 95:  # Recommend NOT_NULL if less than 95% are null
+        confidence = min(100, int(100 - null_percentage))
+        recommend({
+            'type': 'NOT_NULL',
+            'column': column,
+            'confidence': confidence,
+            'reason': f'{null_percentage:.1f}% of values are null',
+            'severity': 'HIGH' if null_percentage < 10 else 'MEDIUM' if null_percentage < 50 else 'LOW'
+        }, null_percentage, from_sample=not profiled_nulls)
+    
+    # UNIQUE rule recommendation. A sample says nothing about duplicates
+    # outside it (every value of a small enough sample can be distinct), so
+    # only full-column counts are used
+    profiled_distinct = stats.get('unique_count') is not None and stats.get('non_null_count')
+    if profiled_distinct:
+        unique_percentage = stats['unique_count'] / stats['non_null_count'] * 100
+    elif estimate is None:
+        unique_percentage = count_distinct(non_null_series) / len(non_null_series) * 100
+    else:
+        unique_percentage = 0
+    if unique_percentage > 90:  # Recommend UNIQUE if more than 90% are unique
+        confidence = min(100, int(unique_percentage))
+        recommend({
+            'type': 'UNIQUE',
+            'column': column,
+            'confidence': confidence,
+            'reason': f'{unique_percentage:.1f}% of non-null values are unique',
+            'severity': 'HIGH' if unique_percentage > 95 else 'MEDIUM'
+        }, unique_percentage, from_sample=not profiled_distinct)
+    
+    # IN_RANGE rule recommendation for numeric columns
+    if pd.api.types.is_numeric_dtype(series):
+        values = non_null_series.to_numpy(dtype='float64')
+        min_val = stats['min'] if stats.get('min') is not None else values.min()
+        max_val = stats['max'] if stats.get('max') is not None else values.max()
+        
+        # Check if values are within a reasonable range
+        if min_val >= 0 and max_val <= 1000000:  # Arbitrary reasonable range
+            # Bound the central 99.8% so a handful of outliers don't widen the rule
+            bounds = range_bounds(stats)
+            if bounds is None:
+                bounds = tuple(np.quantile(values, (PERCENTILES[0], PERCENTILES[-1])).tolist())
+            low, high = bounds
+            confidence = 80
+            recommend({
+                'type': 'IN_RANGE',
+                'column': column,
+                'confidence': confidence,
+                'reason': f'99.8% of numeric values fall between {low:g} and {high:g} (full range {min_val} to {max_val})',
+                'params': {
+                    'min': float(low),
+                    'max': float(high)
+                },
+                'severity': 'MEDIUM'
+            }, from_sample=range_bounds(stats) is None)
+    
+    if pd.api.types.is_string_dtype(series) or series.dtype == 'object':
+        # Convert to string once; every text check below reuses it
+        str_series = non_null_series.astype(str)
+        
+        # REGEX rule recommendations: email, phone and URL formats in one pass
+        matches = classify_values(str_series)
+        for name, pattern, threshold, high_threshold, description in VALUE_FORMATS:
+            percentage = matches[name] / len(str_series) * 100
+            if percentage > threshold:
+                confidence = min(100, int(percentage))
+                recommend({
+                    'type': 'REGEX',
                     'column': column,
                     'confidence': confidence,
-                    'reason': f'{null_percentage:.1f}% of values are null',
-                    'severity': 'HIGH' if null_percentage < 10 else 'MEDIUM' if null_percentage < 50 else 'LOW'
-                })
-            
-            # UNIQUE rule recommendation
-            non_null_series = series.dropna()
-            if len(non_null_series) > 0:
-                unique_percentage = series.nunique() / len(non_null_series) * 100
-                if unique_percentage > 90:  # Recommend UNIQUE if more than 90% are unique
-                    confidence = min(100, int(unique_percentage))
-                    recommendations.append({
-                        'type': 'UNIQUE',
-                        'column': column,
-                        'confidence': confidence,
-                        'reason': f'{unique_percentage:.1f}% of non-null values are unique',
-                        'severity': 'HIGH' if unique_percentage > 95 else 'MEDIUM'
-                    })
-            
-            # IN_RANGE rule recommendation for numeric columns
-            if pd.api.types.is_numeric_dtype(series):
-                non_null_series = series.dropna()
-                if len(non_null_series) > 0:
-                    min_val = non_null_series.min()
-                    max_val = non_null_series.max()
-                    
-                    # Check if values are within a reasonable range
-                    if min_val >= 0 and max_val <= 1000000:  # Arbitrary reasonable range
-                        confidence = 80
-                        recommendations.append({
-                            'type': 'IN_RANGE',
-                            'column': column,
-                            'confidence': confidence,
-                            'reason': f'Numeric values range from {min_val} to {max_val}',
-                            'params': {
-                                'min': float(min_val),
-                                'max': float(max_val)
-                            },
-                            'severity': 'MEDIUM'
-                        })
-            
-            # REGEX rule recommendations for string columns
-            if pd.api.types.is_string_dtype(series) or series.dtype == 'object':
-                non_null_series = series.dropna()
-                if len(non_null_series) > 0:
-                    # Convert to string to ensure consistent processing
-                    str_series = non_null_series.astype(str)
-                    
-                    # Check for email-like patterns
-                    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-                    email_matches = str_series.str.contains(email_pattern, na=False, regex=True).sum()
-                    email_percentage = email_matches / len(str_series) * 100
-                    if email_percentage > 50:  # Recommend REGEX for emails if more than 50% match
-                        confidence = min(100, int(email_percentage))
-                        recommendations.append({
-                            'type': 'REGEX',
-                            'column': column,
-                            'confidence': confidence,
-                            'reason': f'{email_percentage:.1f}% of values look like email addresses',
-                            'params': {
-                                'pattern': email_pattern
-                            },
-                            'severity': 'HIGH' if email_percentage > 80 else 'MEDIUM'
-                        })
-                    
-                    # Check for phone number patterns
-                    phone_pattern = r'^(\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}$'
-                    phone_matches = str_series.str.contains(phone_pattern, na=False, regex=True).sum()
-                    phone_percentage = phone_matches / len(str_series) * 100
-                    if phone_percentage > 50:  # Recommend REGEX for phones if more than 50% match
-                        confidence = min(100, int(phone_percentage))
-                        recommendations.append({
-                            'type': 'REGEX',
-                            'column': column,
-                            'confidence': confidence,
-                            'reason': f'{phone_percentage:.1f}% of values look like phone numbers',
-                            'params': {
-                                'pattern': phone_pattern
-                            },
-                            'severity': 'MEDIUM'
-                        })
-                    
-                    # Check for URL patterns
-                    url_pattern = r'^https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:[\w.])*)?)?$'
-                    url_matches = str_series.str.contains(url_pattern, na=False, regex=True).sum()
-                    url_percentage = url_matches / len(str_series) * 100
-                    if url_percentage > 30:  # Recommend REGEX for URLs if more than 30% match
-                        confidence = min(100, int(url_percentage))
-                        recommendations.append({
-                            'type': 'REGEX',
-                            'column': column,
-                            'confidence': confidence,
-                            'reason': f'{url_percentage:.1f}% of values look like URLs',
-                            'params': {
-                                'pattern': url_pattern
-                            },
-                            'severity': 'MEDIUM'
-                        })
-            
-            # DATE validation for potential date columns
-            if pd.api.types.is_string_dtype(series) or series.dtype == 'object':
-                non_null_series = series.dropna()
-                if len(non_null_series) > 0:
-                    # Try to parse as dates
-                    date_formats = ['%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d']
-                    parsed_successfully = 0
-                    
-                    for fmt in date_formats:
-                        try:
-                            pd.to_datetime(non_null_series.head(100), format=fmt, errors='raise')
-                            parsed_successfully += 1
-                        except (ValueError, TypeError):
-                            continue
-                    
-                    if parsed_successfully > 0:
-                        confidence = min(100, int((parsed_successfully / len(date_formats)) * 100))
-                        recommendations.append({
-                            'type': 'DATE_FORMAT',
-                            'column': column,
-                            'confidence': confidence,
-                            'reason': f'Values appear to be dates in common formats',
-                            'params': {
-                                'formats': date_formats
-                            },
-                            'severity': 'MEDIUM'
-                        })
-            
-            # Length validation for string columns
-            if pd.api.types.is_string_dtype(series) or series.dtype == 'object':
-                non_null_series = series.dropna()
-                if len(non_null_series) > 0:
-                    # Calculate lengths
-                    lengths = non_null_series.astype(str).str.len()
-                    min_len = lengths.min()
-                    max_len = lengths.max()
-                    
-                    # If there's significant variation in length, suggest length bounds
-                    if max_len - min_len > 10 and max_len <= 1000:  # Reasonable upper bound
-                        confidence = 70
-                        recommendations.append({
-                            'type': 'LENGTH_RANGE',
-                            'column': column,
-                            'confidence': confidence,
-                            'reason': f'String lengths vary from {min_len} to {max_len} characters',
-                            'params': {
-                                'min_length': int(min_len),
-                                'max_length': int(max_len)
-                            },
-                            'severity': 'LOW'
-                        })
-                        
+                    'reason': f'{percentage:.1f}% of values look like {description}',
+                    'params': {
+                        'pattern': pattern
+                    },
+                    'severity': 'HIGH' if high_threshold and percentage > high_threshold else 'MEDIUM'
+                }, percentage)
+        
+        # DATE validation for potential date columns
+        parsed_successfully = 0
+        for fmt in DATE_FORMATS:
+            try:
+                pd.to_datetime(non_null_series.head(100), format=fmt, errors='raise')
+                parsed_successfully += 1
+            except (ValueError, TypeError):
+                continue
+        
+        if parsed_successfully > 0:
+            confidence = min(100, int((parsed_successfully / len(DATE_FORMATS)) * 100))
+            recommend({
+                'type': 'DATE_FORMAT',
+                'column': column,
+                'confidence': confidence,
+                'reason': f'Values appear to be dates in common formats',
+                'params': {
+                    'formats': DATE_FORMATS
+                },
+                'severity': 'MEDIUM'
+            })
+        
+        # Length validation for string columns
+        lengths = str_series.str.len()
+        min_len = lengths.min()
+        max_len = lengths.max()
+        
+        # If there's significant variation in length, suggest length bounds
+        if max_len - min_len > 10 and max_len <= 1000:  # Reasonable upper bound
+            confidence = 70
+            recommend({
+                'type': 'LENGTH_RANGE',
+                'column': column,
+                'confidence': confidence,
+                'reason': f'String lengths vary from {min_len} to {max_len} characters',
+                'params': {
+                    'min_length': int(min_len),
+                    'max_length': int(max_len)
+                },
+                'severity': 'LOW'
+            })
+    
+    return recommendations
+
+
+def _with_distinct_counts(df, column_stats):
+    """
+    column_stats with full-column distinct and non-null counts added for the
+    columns that don't have them (exact, or HyperLogLog in 'hll' mode)
+    """
+    column_stats = dict(column_stats or {})
+    for column in df.columns:
+        stats = column_stats.get(column) or {}
+        if stats.get('unique_count') is None or not stats.get('non_null_count'):
+            column_stats[column] = {
+                **stats,
+                'unique_count': count_distinct(df[column]),
+                'non_null_count': int(df[column].notna().sum()),
+            }
+    return column_stats
+
+
+def _analyze_columns(frame, columns, column_stats=None, estimate=None):
+    recommendations = []
+    for column in columns:
+        try:
+            recommendations.extend(_analyze_column(column, frame[column], column_stats, estimate))
         except Exception as e:
             logger.warning(f"Error analyzing column {column}: {str(e)}")
-            continue
+    return recommendations
+
+
+def analyze_dataset_for_rules(df: pd.DataFrame, column_stats: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    """
+    Analyze a dataset and generate rule recommendations based on the data.
+    
+    Frames longer than RULE_SAMPLE_ROWS are analyzed on a stratified sample
+    of that many rows; recommendations estimated from it carry a 'sample'
+    entry with the sample size, confidence level (RULE_SAMPLE_CONFIDENCE)
+    and, for percentage-based ones, the margin of error. UNIQUE is never
+    estimated from the sample: distinct counts missing from column_stats
+    are counted over the whole frame.
+    
+    Args:
+        df: Pandas DataFrame containing the dataset
+        column_stats: Optional stored profile columns (Dataset.sample_stats);
+            null and distinct counts and IN_RANGE bounds are read from them
+            when present
+        
+    Returns:
+        List of rule recommendations with confidence scores
+    """
+    sample_rows = getattr(settings, 'RULE_SAMPLE_ROWS', 10000)
+    sample = stratified_sample(df, sample_rows)
+    estimate = None
+    if len(sample) < len(df):
+        estimate = SampleEstimate(len(sample), len(df), getattr(settings, 'RULE_SAMPLE_CONFIDENCE', 0.95))
+        column_stats = _with_distinct_counts(df, column_stats)
     
-    return recommendations
\ No newline at end of file
+    # Column groups are analyzed in parallel on large frames
+    results = map_column_groups(sample, partial(_analyze_columns, column_stats=column_stats, estimate=estimate))
+    return [recommendation for group in results for recommendation in group]
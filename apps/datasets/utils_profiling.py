@@ -1,43 +1,144 @@
 import pandas as pd
 import numpy as np
 from django.conf import settings
+import hashlib
 import json
 import os
-from .models import Dataset
+from .compression import open_dataset_file, iter_csv_chunks
+from .content_store import stored_content_hash
+from .models import Dataset, DatasetProfileSketch
+from .profiler import (
+    profile_frame, profile_columns, build_profile, count_duplicate_rows, score_quality, range_bounds,
+)
+from .profiler_streaming import ProfileAccumulator, profile_chunks
 
 
-def profile_dataset(dataset):
+def uses_sketch_profiling():
+    return getattr(settings, 'PROFILE_DISTINCT_MODE', 'exact') == 'hll'
+
+
+def compute_profile(dataset):
+    """
+    Profile a dataset's data with the configured engine.
+    
+    Returns (profile, accumulator): accumulator is the resumable
+    ProfileAccumulator in 'hll' mode and None in 'exact' mode. profile is
+    None if the data can't be loaded or is empty.
+    """
+    if uses_sketch_profiling():
+        chunks = iter_dataset_chunks(dataset)
+        if chunks is None:
+            return None, None
+        accumulator = profile_chunks(chunks)
+        if accumulator.rows == 0:
+            return None, None
+        return accumulator.profile(), accumulator
+    
+    df = load_dataset_data(dataset)
+    if df is None or df.empty:
+        return None, None
+    # One pass over the frame produces every statistic
+    return profile_frame(df), None
+
+
+def apply_profile(dataset, profile):
+    """
+    Store a profile on the dataset
+    """
+    dataset.row_count = profile['row_count']
+    dataset.column_count = profile['column_count']
+    dataset.quality_score = profile['quality_score']
+    dataset.sample_stats = profile['columns']
+    dataset.schema = profile_schema(profile)
+    dataset.save()
+
+
+def stored_column_stats(dataset):
+    """
+    Per-column profile stored on the dataset, or {} if it hasn't been profiled
+    (the upload view stores sample records in sample_stats until then)
+    """
+    return dataset.sample_stats if isinstance(dataset.sample_stats, dict) else {}
+
+
+def column_distributions(column_stats):
+    """
+    Percentiles and histogram bars (heights as a % of the tallest bin) for
+    each numeric column, for the profile page
+    """
+    distributions = []
+    for name, stats in column_stats.items():
+        hist = stats.get('histogram')
+        if not stats.get('percentiles') or not hist:
+            continue
+        tallest = max(hist['counts']) or 1
+        edges = hist['edges']
+        distributions.append({
+            'name': name,
+            'percentiles': list(stats['percentiles'].items()),
+            'bars': [
+                {'low': edges[i], 'high': edges[i + 1], 'count': count, 'height': round(count / tallest * 100, 1)}
+                for i, count in enumerate(hist['counts'])
+            ],
+        })
+    return distributions
+
+
+def save_profile_sketch(dataset, accumulator):
+    DatasetProfileSketch.objects.update_or_create(
+        dataset=dataset,
+        defaults={'payload': accumulator.to_bytes(), 'row_count': accumulator.rows},
+    )
+
+
+def dataset_content_hash(dataset):
+    """
+    SHA-256 of the dataset's file, or None for datasets without a readable file
+    """
+    if dataset.source_type != 'CSV' or not dataset.file:
+        return None
+    # Content-addressed files are immutable and named by their hash
+    stored = stored_content_hash(dataset)
+    if stored:
+        return stored
+    digest = hashlib.sha256()
+    try:
+        with open(dataset.file.path, 'rb') as handle:
+            for block in iter(lambda: handle.read(1024 * 1024), b''):
+                digest.update(block)
+    except (OSError, ValueError):
+        return None
+    return digest.hexdigest()
+
+
+def profile_is_current(dataset, content_hash):
+    """
+    True if the stored profile was computed from a file with this content hash
+    """
+    return bool(content_hash) and dataset.profile_content_hash == content_hash and bool(stored_column_stats(dataset))
+
+
+def profile_dataset(dataset, content_hash=None):
     """
     Profile a dataset and update its metadata with statistics
+    
+    Args:
+        dataset: Dataset to profile
+        content_hash: The file's dataset_content_hash(), if already computed
     """
     try:
-        # Load dataset data
-        df = load_dataset_data(dataset)
+        # Hash before reading, so a file replaced mid-profile is picked up next time
+        content_hash = content_hash or dataset_content_hash(dataset)
+        profile, accumulator = compute_profile(dataset)
         
-        if df is None or df.empty:
+        if profile is None:
             return False
-            
-        # Calculate basic statistics
-        row_count = len(df)
-        column_count = len(df.columns)
         
-        # Calculate quality score
-        quality_score = calculate_quality_score(df)
+        if accumulator is not None:
+            save_profile_sketch(dataset, accumulator)
         
-        # Get column statistics
-        column_stats = get_column_statistics(df)
-        
-        # Get schema information
-        schema_info = get_schema_info(df)
-        
-        # Update dataset object
-        dataset.row_count = row_count
-        dataset.column_count = column_count
-        dataset.quality_score = quality_score
-        dataset.sample_stats = column_stats
-        dataset.schema = schema_info
-        
-        dataset.save()
+        dataset.profile_content_hash = content_hash or ''
+        apply_profile(dataset, profile)
         
         return True
         
@@ -46,6 +147,42 @@ def profile_dataset(dataset):
         return False
 
 
+def update_profile_incrementally(dataset, new_rows):
+    """
+    Fold rows appended since the last sketch profile into it, without
+    rereading the rows already profiled. Falls back to a full profile_dataset()
+    when no sketch has been stored yet (the file is assumed to include new_rows).
+    
+    Args:
+        dataset: Dataset whose profile to update
+        new_rows: DataFrame of appended rows
+    """
+    try:
+        stored = DatasetProfileSketch.objects.get(dataset=dataset)
+    except DatasetProfileSketch.DoesNotExist:
+        return profile_dataset(dataset)
+    
+    accumulator = ProfileAccumulator.from_bytes(stored.payload).add(new_rows)
+    save_profile_sketch(dataset, accumulator)
+    dataset.profile_content_hash = dataset_content_hash(dataset) or ''
+    apply_profile(dataset, accumulator.profile())
+    return True
+
+
+def profile_schema(profile):
+    """
+    Schema info as stored on Dataset.schema, with the frame-level counts the
+    quality report needs so it can be rebuilt without reloading the data
+    """
+    schema = dict(profile['schema'])
+    schema['missing_values'] = profile['missing_cells']
+    schema['duplicate_rows'] = profile['duplicate_rows']
+    if profile.get('approximate'):
+        schema['approximate'] = True
+        schema['distinct_error'] = profile['distinct_error']
+    return schema
+
+
 def load_dataset_data(dataset):
     """
     Load dataset data into a pandas DataFrame
@@ -55,8 +192,8 @@ def load_dataset_data(dataset):
             # Load CSV file
             file_path = dataset.file.path
             if os.path.exists(file_path):
-                df = pd.read_csv(file_path)
-                return df
+                with open_dataset_file(file_path) as handle:
+                    return pd.read_csv(handle)
         elif dataset.source_type == 'DB' and dataset.db_connection:
             # Load from database (simplified implementation)
             # In a real implementation, this would connect to the actual database
@@ -68,6 +205,15 @@ def load_dataset_data(dataset):
         return None
 
 
+def iter_dataset_chunks(dataset):
+    """
+    Iterate a dataset's rows as DataFrames of PROFILE_CHUNK_ROWS rows, or None if unavailable
+    """
+    if dataset.source_type == 'CSV' and dataset.file and os.path.exists(dataset.file.path):
+        return iter_csv_chunks(dataset.file.path, getattr(settings, 'PROFILE_CHUNK_ROWS', 100000))
+    return None
+
+
 def calculate_quality_score(df):
     """
     Calculate an overall quality score for the dataset (0-100)
@@ -75,62 +221,17 @@ def calculate_quality_score(df):
     if df.empty:
         return 0.0
     
-    # Factors for quality score calculation:
-    # 1. Completeness (missing values) - 40%
-    # 2. Uniqueness (duplicate rows) - 30%
-    # 3. Consistency (data types) - 20%
-    # 4. Validity (schema adherence) - 10%
-    
-    total_cells = df.size
-    missing_cells = df.isnull().sum().sum()
-    completeness_score = (1 - (missing_cells / total_cells)) * 40 if total_cells > 0 else 0
-    
-    # Check for duplicate rows
-    duplicate_rows = df.duplicated().sum()
-    uniqueness_score = (1 - (duplicate_rows / len(df))) * 30 if len(df) > 0 else 0
-    
-    # Simple consistency check (basic)
-    consistency_score = 20  # Placeholder
-    
-    # Validity score (basic)
-    validity_score = 10  # Placeholder
-    
-    quality_score = completeness_score + uniqueness_score + consistency_score + validity_score
-    return round(quality_score, 2)
+    missing_cells = int(df.isnull().sum().sum())
+    return score_quality(len(df), df.size, missing_cells, count_duplicate_rows(df))
 
 
 def get_column_statistics(df):
     """
     Get detailed statistics for each column
     """
-    stats = {}
-    
-    for column in df.columns:
-        col_data = df[column]
-        col_stats = {
-            'name': column,
-            'dtype': str(col_data.dtype),
-            'non_null_count': int(col_data.count()),
-            'null_count': int(col_data.isnull().sum()),
-            'unique_count': int(col_data.nunique()),
-            'null_percentage': round((col_data.isnull().sum() / len(df)) * 100, 2) if len(df) > 0 else 0
-        }
-        
-        # Add type-specific statistics
-        if col_data.dtype in ['int64', 'float64']:
-            col_stats.update({
-                'min': float(col_data.min()) if not col_data.isnull().all() else None,
-                'max': float(col_data.max()) if not col_data.isnull().all() else None,
-                'mean': float(col_data.mean()) if not col_data.isnull().all() else None,
-                'std': float(col_data.std()) if not col_data.isnull().all() else None
-            })
-        elif col_data.dtype == 'object':
-            # For string columns, get top values
-            top_values = col_data.value_counts().head(5).to_dict()
-            col_stats['top_values'] = {str(k): int(v) for k, v in top_values.items()}
-        
-        stats[column] = col_stats
-    
+    stats = profile_columns(df)
+    for col_stats in stats.values():
+        col_stats.pop('sample_values', None)
     return stats
 
 
@@ -138,45 +239,53 @@ def get_schema_info(df):
     """
     Get schema information for the dataset
     """
-    schema = {
-        'columns': [],
-        'total_columns': len(df.columns),
-        'total_rows': len(df)
+    return build_profile(df, profile_columns(df))['schema']
+
+
+def stored_profile(dataset):
+    """
+    The profile saved by apply_profile(), in the shape compute_profile()
+    returns, or None if the dataset hasn't been profiled (or was profiled
+    before the frame-level counts were kept in its schema)
+    """
+    columns = stored_column_stats(dataset)
+    schema = dataset.schema if isinstance(dataset.schema, dict) else {}
+    if not columns or 'missing_values' not in schema or 'duplicate_rows' not in schema:
+        return None
+    return {
+        'row_count': dataset.row_count,
+        'column_count': dataset.column_count,
+        'missing_cells': schema['missing_values'],
+        'duplicate_rows': schema['duplicate_rows'],
+        'columns': columns,
     }
-    
-    for column in df.columns:
-        col_info = {
-            'name': column,
-            'dtype': str(df[column].dtype),
-            'sample_values': df[column].dropna().head(3).tolist()
-        }
-        schema['columns'].append(col_info)
-    
-    return schema
 
 
 def generate_quality_report(dataset):
     """
-    Generate a detailed quality report for a dataset
+    Generate a detailed quality report for a dataset from its stored profile,
+    profiling the data only if it has none
     """
     try:
-        df = load_dataset_data(dataset)
+        profile = stored_profile(dataset)
+        if profile is None:
+            profile, _ = compute_profile(dataset)
         
-        if df is None:
+        if profile is None:
             return None
-            
+        
         report = {
             'dataset_name': dataset.name,
             'generated_at': pd.Timestamp.now().isoformat(),
             'overall_quality_score': float(dataset.quality_score),
             'summary': {
-                'total_rows': len(df),
-                'total_columns': len(df.columns),
-                'missing_values': int(df.isnull().sum().sum()),
-                'duplicate_rows': int(df.duplicated().sum())
+                'total_rows': profile['row_count'],
+                'total_columns': profile['column_count'],
+                'missing_values': profile['missing_cells'],
+                'duplicate_rows': profile['duplicate_rows']
             },
-            'column_details': get_column_statistics(df),
-            'recommendations': generate_recommendations(df)
+            'column_details': profile['columns'],
+            'recommendations': generate_recommendations(None, profile)
         }
         
         return report
@@ -186,14 +295,22 @@ def generate_quality_report(dataset):
         return None
 
 
-def generate_recommendations(df):
+def generate_recommendations(df, profile=None):
     """
     Generate data quality recommendations based on the dataset
+    
+    Args:
+        df: The dataset's DataFrame (only needed when no profile is given)
+        profile: Output of profile_frame(df) or ProfileAccumulator.profile()
     """
+    if profile is None:
+        profile = profile_frame(df)
+    
     recommendations = []
+    columns = profile['columns']
     
     # Check for missing values
-    missing_cols = df.columns[df.isnull().any()].tolist()
+    missing_cols = [name for name, stats in columns.items() if stats['null_count'] > 0]
     if missing_cols:
         recommendations.append({
             'type': 'missing_values',
@@ -203,8 +320,8 @@ def generate_recommendations(df):
         })
     
     # Check for duplicates
-    if df.duplicated().any():
-        dup_count = df.duplicated().sum()
+    dup_count = profile['duplicate_rows']
+    if dup_count:
         recommendations.append({
             'type': 'duplicates',
             'severity': 'high',
@@ -213,16 +330,29 @@ def generate_recommendations(df):
         })
     
     # Check for data type inconsistencies
-    for column in df.columns:
-        if df[column].dtype == 'object':
-            # Check if numeric values are stored as strings
-            numeric_like = df[column].str.isnumeric().sum()
-            if numeric_like > 0 and numeric_like / len(df) > 0.5:
+    row_count = profile['row_count']
+    for column, stats in columns.items():
+        # Check if numeric values are stored as strings
+        numeric_like = stats.get('numeric_like_count', 0)
+        if numeric_like > 0 and numeric_like / row_count > 0.5:
+            recommendations.append({
+                'type': 'data_type',
+                'severity': 'medium',
+                'message': f'Column "{column}" may contain numeric data stored as strings',
+                'description': 'Consider converting to appropriate numeric data type.'
+            })
+        
+        # Flag extreme tails: values far outside the p0.1-p99.9 band
+        bounds = range_bounds(stats)
+        if bounds and stats.get('min') is not None and stats.get('max') is not None:
+            low, high = bounds
+            spread = stats['percentiles']['p75'] - stats['percentiles']['p25'] or (high - low)
+            if spread > 0 and (low - stats['min'] > 3 * spread or stats['max'] - high > 3 * spread):
                 recommendations.append({
-                    'type': 'data_type',
-                    'severity': 'medium',
-                    'message': f'Column "{column}" may contain numeric data stored as strings',
-                    'description': 'Consider converting to appropriate numeric data type.'
+                    'type': 'outliers',
+                    'severity': 'low',
+                    'message': f'Column "{column}" has extreme values outside {low:g} to {high:g}',
+                    'description': f'99.8% of values fall between {low:g} and {high:g}; consider an IN_RANGE rule with these bounds.'
                 })
     
-    return recommendations
\ No newline at end of file
+    return recommendations
@@ -1,17 +1,20 @@
 import logging
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.core.paginator import Paginator
 from django.utils import timezone
-from .models import Dataset
+from .models import Dataset, DatasetIngestion
 from .forms import DatasetForm
 from .utils import analyze_dataset_for_rules
+from .utils_profiling import stored_column_stats
+from .compression import read_csv
+from .ingestion import start_ingestion
 from apps.rules.models import Rule, RuleRun
 from apps.incidents.models import Incident
 from apps.audit.utils import log_dataset_upload
-import pandas as pd
 import json
 import uuid
 
@@ -53,62 +56,17 @@ def dataset_create(request):
             # Log dataset upload activity
             log_dataset_upload(request.user, dataset, request.META.get('REMOTE_ADDR'))
             
-            # Process CSV file if provided
+            # Parse, profile and recommend rules in the background
             if dataset.source_type == 'CSV' and dataset.file:
-                try:
-                    # Read CSV file to get stats
-                    # Try multiple encodings to handle different file types
-                    encodings = ['utf-8', 'latin1', 'cp1252']
-                    df = None
-                    for encoding in encodings:
-                        try:
-                            df = pd.read_csv(dataset.file.path, encoding=encoding)
-                            break
-                        except UnicodeDecodeError:
-                            continue
-                    
-                    if df is None:
-                        raise Exception('Unable to read CSV file with supported encodings')
-                    
-                    dataset.row_count = len(df)
-                    dataset.column_count = len(df.columns)
-                    dataset.schema = {col: str(dtype) for col, dtype in df.dtypes.items()}
-                    
-                    # Get sample statistics for the first few rows
-                    sample_df = df.head()
-                    
-                    # Handle special float values that can't be serialized to JSON
-                    from numpy import nan, inf
-                    cleaned_data = []
-                    for row in sample_df.to_dict('records'):
-                        cleaned_row = {}
-                        for k, v in row.items():
-                            if pd.isna(v):
-                                cleaned_row[k] = None
-                            elif isinstance(v, float) and (v == float('inf') or v == float('-inf')):
-                                cleaned_row[k] = str(v)
-                            else:
-                                cleaned_row[k] = v
-                        cleaned_data.append(cleaned_row)
-                    
-                    dataset.sample_stats = cleaned_data
-                    
-                    # Save dataset with updated fields
-                    dataset.save(update_fields=['row_count', 'column_count', 'schema', 'sample_stats'])
-                    
-                    # Generate rule recommendations
-                    recommendations = analyze_dataset_for_rules(df)
-                    
-                    # Automatically create rules based on recommendations
-                    created_rules = _create_rules_from_recommendations(dataset, recommendations, request.user)
-                    
-                    messages.success(request, f'Dataset "{dataset.name}" created successfully with {len(created_rules)} auto-generated rules!')
-                    return redirect('datasets:dataset_list')
-                except Exception as e:
-                    messages.error(request, f'Error processing CSV file: {str(e)}')
-                    # Delete the dataset if processing failed
-                    dataset.delete()
-                    return redirect('datasets:dataset_create')
+                ingestion = start_ingestion(dataset, request.user)
+                if 'application/json' in request.headers.get('Accept', ''):
+                    return JsonResponse({
+                        'ingestion_id': str(ingestion.id),
+                        'dataset_id': dataset.id,
+                        'progress_url': reverse('datasets:ingestion_progress', args=[ingestion.id]),
+                    }, status=202)
+                messages.info(request, f'Dataset "{dataset.name}" uploaded. Processing has started.')
+                return redirect('datasets:ingestion_detail', ingestion_id=ingestion.id)
             else:
                 messages.success(request, f'Dataset "{dataset.name}" created successfully!')
                 return redirect('datasets:dataset_list')
@@ -118,74 +76,19 @@ def dataset_create(request):
     return render(request, 'datasets/create.html', {'form': form})
 
 
-def _create_rules_from_recommendations(dataset, recommendations, user):
+@login_required
+def ingestion_detail(request, ingestion_id):
+    ingestion = get_object_or_404(DatasetIngestion, pk=ingestion_id, owner=request.user)
+    return render(request, 'datasets/ingestion.html', {'ingestion': ingestion})
+
+
+@login_required
+def ingestion_progress(request, ingestion_id):
     """
-    Create rules automatically from recommendations
+    Stage and percentage of a dataset ingestion, for polling
     """
-    created_rules = []
-    
-    try:
-        for rec in recommendations:
-            rule_type = rec.get('type')
-            column = rec.get('column')
-            
-            if not rule_type or not column:
-                continue
-                
-            # Generate rule name and DSL expression based on type
-            if rule_type == 'NOT_NULL':
-                rule_name = f'{column} Not Null Check'
-                dsl_expression = f'NOT_NULL("{column}")'
-                description = f'Check that {column} values are not null'
-            elif rule_type == 'UNIQUE':
-                rule_name = f'{column} Unique Check'
-                dsl_expression = f'UNIQUE("{column}")'
-                description = f'Check that {column} values are unique'
-            elif rule_type == 'IN_RANGE':
-                rule_name = f'{column} Range Check'
-                # Use default range values, can be adjusted later
-                dsl_expression = f'IN_RANGE("{column}", 0, 1000000)'
-                description = f'Check that {column} values are within range'
-            elif rule_type == 'REGEX':
-                rule_name = f'{column} Email Format Check'
-                dsl_expression = f'REGEX("{column}", "^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\\.[a-zA-Z]{{2,}}$")'
-                description = f'Check that {column} values match email format'
-            else:
-                rule_name = f'{column} {rule_type} Check'
-                dsl_expression = f'{rule_type}("{column}")'
-                description = f'Auto-generated {rule_type} rule for {column}'
-            
-            # Create the rule
-            rule = Rule.objects.create(
-                name=rule_name,
-                description=description,
-                dataset=dataset,
-                rule_type=rule_type,
-                dsl_expression=dsl_expression,
-                owner=user,
-                is_active=True
-            )
-            
-            created_rules.append(rule)
-            
-            # Create initial rule run for dashboard visualization
-            rule_run = RuleRun.objects.create(
-                rule=rule,
-                dataset=dataset,
-                run_id=f"initial_run_{rule.id}_{timezone.now().strftime('%Y%m%d%H%M%S')}",
-                started_at=timezone.now(),
-                finished_at=timezone.now(),
-                status='COMPLETED',
-                total_rows=dataset.row_count or 0,
-                passed_count=dataset.row_count or 0,  # Initially assume all pass
-                failed_count=0,
-                sample_evidence=[]
-            )
-            
-    except Exception as e:
-        logger.error(f"Error creating rules from recommendations: {str(e)}")
-    
-    return created_rules
+    ingestion = get_object_or_404(DatasetIngestion, pk=ingestion_id, owner=request.user)
+    return JsonResponse(ingestion.to_dict())
 
 
 @login_required
@@ -322,20 +225,13 @@ def get_rule_recommendations(request, pk):
     
     try:
         # Try multiple encodings
-        encodings = ['utf-8', 'latin1', 'cp1252']
-        df = None
-        for encoding in encodings:
-            try:
-                df = pd.read_csv(dataset.file.path, encoding=encoding)
-                break
-            except UnicodeDecodeError:
-                continue
-        
-        if df is None:
-            return JsonResponse({'error': 'Unable to read CSV file with supported encodings'}, status=400)
+        try:
+            df = read_csv(dataset.file.path)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
         
         # Analyze dataset for rule recommendations
-        recommendations = analyze_dataset_for_rules(df)
+        recommendations = analyze_dataset_for_rules(df, stored_column_stats(dataset))
         
         return JsonResponse({
             'status': 'completed',
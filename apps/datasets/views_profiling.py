@@ -2,7 +2,7 @@ from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from .models import Dataset
-from .utils_profiling import profile_dataset, generate_quality_report
+from .utils_profiling import profile_dataset, generate_quality_report, stored_column_stats, column_distributions
 
 
 @login_required
@@ -18,6 +18,7 @@ def dataset_profile(request, dataset_id):
         'dataset': dataset,
         'column_stats': dataset.sample_stats or {},
         'schema_info': dataset.schema or {},
+        'distributions': column_distributions(stored_column_stats(dataset)),
     }
     
     return render(request, 'datasets/profile.html', context)
@@ -40,6 +41,10 @@ def dataset_profile_api(request, dataset_id):
         'column_count': dataset.column_count,
         'column_stats': dataset.sample_stats or {},
         'schema_info': dataset.schema or {},
+        'summary': {
+            'missing_values': (dataset.schema or {}).get('missing_values'),
+            'duplicate_rows': (dataset.schema or {}).get('duplicate_rows'),
+        },
     })
 
 
@@ -0,0 +1,74 @@
+import hashlib
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Incident
+from .evidence import store_evidence
+
+# Statuses covered by the partial unique index on fingerprint
+UNRESOLVED_STATUSES = ['OPEN', 'ACKNOWLEDGED', 'MUTED']
+
+
+def failure_signature(rule_type, dsl_expression):
+    """
+    What failed, independent of when: the rule type and its whitespace-normalized DSL.
+    Editing a rule's expression starts a new incident rather than reopening the old one.
+    """
+    return f"{rule_type}|{' '.join((dsl_expression or '').split())}"
+
+
+def compute_fingerprint(rule_id, dataset_id, signature):
+    return hashlib.sha256(f'{rule_id}:{dataset_id}:{signature}'.encode('utf-8')).hexdigest()
+
+
+def rule_fingerprint(rule, dataset):
+    return compute_fingerprint(rule.id, dataset.id, failure_signature(rule.rule_type, rule.dsl_expression))
+
+
+def _record_occurrence(fingerprint, seen_at):
+    # One UPDATE; the partial unique index guarantees at most one row matches
+    return Incident.objects.filter(fingerprint=fingerprint, status__in=UNRESOLVED_STATUSES).update(
+        occurrence_count=F('occurrence_count') + 1,
+        last_seen_at=seen_at,
+        updated_at=seen_at,
+    )
+
+
+def upsert_incident(fingerprint, evidence_data=None, **fields):
+    """
+    Record a failure against the unresolved incident with this fingerprint,
+    creating the incident if there isn't one.
+
+    Repeat failures are a single UPDATE (no lookup, no post_save). A new
+    incident is created with objects.create() so notification and search
+    signals still fire. If a concurrent worker inserts the same fingerprint
+    first, the unique index rejects ours and the occurrence is counted on
+    theirs instead. evidence_data is stored with a new incident only.
+
+    Returns True if a new incident was created.
+    """
+    now = timezone.now()
+    if _record_occurrence(fingerprint, now):
+        return False
+
+    try:
+        with transaction.atomic():
+            incident = Incident.objects.create(fingerprint=fingerprint, last_seen_at=now, **fields)
+            if evidence_data:
+                store_evidence(incident, evidence_data)
+        return True
+    except IntegrityError:
+        _record_occurrence(fingerprint, now)
+        return False
+
+
+def unresolved_duplicate(incident, status):
+    """
+    The other unresolved incident that would clash with moving `incident` to `status`, if any.
+    Reopening a resolved incident is blocked while a newer one tracks the same failure.
+    """
+    if not incident.fingerprint or status not in UNRESOLVED_STATUSES or incident.status in UNRESOLVED_STATUSES:
+        return None
+    return Incident.objects.filter(
+        fingerprint=incident.fingerprint, status__in=UNRESOLVED_STATUSES
+    ).exclude(pk=incident.pk).first()
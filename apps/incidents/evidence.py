@@ -0,0 +1,107 @@
+import ast
+import datetime
+import json
+import math
+import zlib
+from django.core.serializers.json import DjangoJSONEncoder
+
+EVIDENCE_ENCODING = 'zlib+json'
+
+
+def _jsonable(value):
+    """
+    Plain JSON value for a DataFrame cell (numpy scalars, NaN/NaT, timestamps)
+    """
+    if value is None:
+        return None
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        try:
+            value = value.item()
+        except (ValueError, TypeError):
+            pass
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        # pandas NaT is a datetime subclass whose isoformat() is 'NaT'
+        iso = value.isoformat()
+        return None if iso == 'NaT' else iso
+    return value
+
+
+def compact_evidence(evidence_data):
+    """
+    Columnar form of RuleExecutor._generate_evidence() output.
+
+    Rows become lists in column order, so column names are stored once
+    instead of once per row.
+    """
+    columns = list(evidence_data.get('columns') or [])
+    sample_rows = evidence_data.get('sample_rows') or []
+    if not columns and sample_rows:
+        columns = list(sample_rows[0].keys())
+    return {
+        'columns': columns,
+        'rows': [[_jsonable(row.get(column)) for column in columns] for row in sample_rows],
+        'total_failed': evidence_data.get('total_failed'),
+        'rule_type': evidence_data.get('rule_type'),
+        'timestamp': evidence_data.get('timestamp'),
+    }
+
+
+def pack_evidence(evidence):
+    """
+    Compress a compact evidence dict; returns (payload bytes, uncompressed size)
+    """
+    raw = json.dumps(evidence, cls=DjangoJSONEncoder, separators=(',', ':'), default=str).encode('utf-8')
+    return zlib.compress(raw, 6), len(raw)
+
+
+def unpack_evidence(payload):
+    return json.loads(zlib.decompress(bytes(payload)).decode('utf-8'))
+
+
+def parse_legacy_evidence(text):
+    """
+    Best-effort conversion of the old TextField value (a JSON string or a
+    Python repr of the evidence dict) into compact evidence
+    """
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            value = parse(text)
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            continue
+        if isinstance(value, dict):
+            return compact_evidence(value)
+        if isinstance(value, list) and all(isinstance(row, dict) for row in value):
+            return compact_evidence({'sample_rows': value})
+    # e.g. reprs containing Timestamp(...) or nan; keep the text so nothing is lost
+    return {'columns': [], 'rows': [], 'raw': text}
+
+
+def store_evidence(incident, evidence_data):
+    """
+    Save rule-run evidence for an incident in the compressed side table
+    """
+    from .models import IncidentEvidence
+
+    evidence = compact_evidence(evidence_data)
+    payload, size_bytes = pack_evidence(evidence)
+    return IncidentEvidence.objects.create(
+        incident=incident,
+        payload=payload,
+        encoding=EVIDENCE_ENCODING,
+        row_count=len(evidence['rows']),
+        size_bytes=size_bytes,
+    )
+
+
+def load_evidence(incident):
+    """
+    Decompressed evidence dict for an incident, or None if it has none
+    """
+    from .models import IncidentEvidence
+
+    record = IncidentEvidence.objects.filter(incident=incident).only('payload').first()
+    if record is None:
+        return None
+    return unpack_evidence(record.payload)
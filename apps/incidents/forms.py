@@ -1,5 +1,6 @@
 from django import forms
 from .models import Incident, IncidentComment
+from .dedup import unresolved_duplicate
 
 
 class IncidentUpdateForm(forms.ModelForm):
@@ -11,6 +12,17 @@ class IncidentUpdateForm(forms.ModelForm):
             'assigned_to': forms.Select(attrs={'class': 'form-select'}),
             'severity': forms.Select(attrs={'class': 'form-select'}),
         }
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        # Runs before the submitted values are copied onto self.instance
+        if self.instance.pk:
+            duplicate = unresolved_duplicate(self.instance, cleaned_data.get('status'))
+            if duplicate:
+                raise forms.ValidationError(
+                    f"Incident #{duplicate.pk} is already open for this failure. Resolve it before reopening this one."
+                )
+        return cleaned_data
 
 
 class IncidentCommentForm(forms.ModelForm):
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0002_alter_incident_severity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='incident',
+            index=models.Index(fields=['created_at', 'id'], name='incident_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:31
+
+import hashlib
+from django.db import migrations, models
+from django.db.models import F
+
+# Frozen copies of apps.incidents.dedup as of this migration
+UNRESOLVED_STATUSES = ['OPEN', 'ACKNOWLEDGED', 'MUTED']
+
+
+def failure_signature(rule_type, dsl_expression):
+    return f"{rule_type}|{' '.join((dsl_expression or '').split())}"
+
+
+def compute_fingerprint(rule_id, dataset_id, signature):
+    return hashlib.sha256(f'{rule_id}:{dataset_id}:{signature}'.encode('utf-8')).hexdigest()
+
+
+def backfill_fingerprints(apps, schema_editor):
+    Incident = apps.get_model('incidents', 'Incident')
+    Incident.objects.update(last_seen_at=F('updated_at'))
+
+    # Only the newest unresolved incident per fingerprint gets one, so existing
+    # duplicates don't violate the unique index; the older ones keep ''
+    seen = set()
+    unresolved = Incident.objects.filter(status__in=UNRESOLVED_STATUSES).select_related('rule').order_by('-created_at', '-id')
+    for incident in unresolved.iterator():
+        fingerprint = compute_fingerprint(
+            incident.rule_id, incident.dataset_id,
+            failure_signature(incident.rule.rule_type, incident.rule.dsl_expression)
+        )
+        if fingerprint not in seen:
+            seen.add(fingerprint)
+            Incident.objects.filter(id=incident.id).update(fingerprint=fingerprint)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0004_incident_sla_evaluation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='incident',
+            name='fingerprint',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='last_seen_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='incident',
+            name='occurrence_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='incident',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['OPEN', 'ACKNOWLEDGED', 'MUTED']), models.Q(('fingerprint', ''), _negated=True)), fields=('fingerprint',), name='incident_open_fingerprint_uniq'),
+        ),
+    ]
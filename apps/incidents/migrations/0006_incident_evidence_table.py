@@ -0,0 +1,106 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:32
+
+import ast
+import datetime
+import json
+import math
+import zlib
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copies of apps.incidents.evidence as of this migration
+EVIDENCE_ENCODING = 'zlib+json'
+
+
+def _jsonable(value):
+    if value is None:
+        return None
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        try:
+            value = value.item()
+        except (ValueError, TypeError):
+            pass
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        iso = value.isoformat()
+        return None if iso == 'NaT' else iso
+    return value
+
+
+def compact_evidence(evidence_data):
+    columns = list(evidence_data.get('columns') or [])
+    sample_rows = evidence_data.get('sample_rows') or []
+    if not columns and sample_rows:
+        columns = list(sample_rows[0].keys())
+    return {
+        'columns': columns,
+        'rows': [[_jsonable(row.get(column)) for column in columns] for row in sample_rows],
+        'total_failed': evidence_data.get('total_failed'),
+        'rule_type': evidence_data.get('rule_type'),
+        'timestamp': evidence_data.get('timestamp'),
+    }
+
+
+def pack_evidence(evidence):
+    raw = json.dumps(evidence, cls=DjangoJSONEncoder, separators=(',', ':'), default=str).encode('utf-8')
+    return zlib.compress(raw, 6), len(raw)
+
+
+def parse_legacy_evidence(text):
+    for parse in (json.loads, ast.literal_eval):
+        try:
+            value = parse(text)
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            continue
+        if isinstance(value, dict):
+            return compact_evidence(value)
+        if isinstance(value, list) and all(isinstance(row, dict) for row in value):
+            return compact_evidence({'sample_rows': value})
+    return {'columns': [], 'rows': [], 'raw': text}
+
+
+def move_evidence(apps, schema_editor):
+    Incident = apps.get_model('incidents', 'Incident')
+    IncidentEvidence = apps.get_model('incidents', 'IncidentEvidence')
+
+    batch = []
+    for incident_id, text in Incident.objects.exclude(evidence='').values_list('id', 'evidence').iterator():
+        evidence = parse_legacy_evidence(text)
+        payload, size_bytes = pack_evidence(evidence)
+        batch.append(IncidentEvidence(
+            incident_id=incident_id, payload=payload, encoding=EVIDENCE_ENCODING,
+            row_count=len(evidence['rows']), size_bytes=size_bytes,
+        ))
+        if len(batch) >= 500:
+            IncidentEvidence.objects.bulk_create(batch)
+            batch = []
+    IncidentEvidence.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('incidents', '0005_incident_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidentEvidence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.BinaryField()),
+                ('encoding', models.CharField(default='zlib+json', max_length=20)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('size_bytes', models.PositiveIntegerField(default=0, help_text='Uncompressed JSON size')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('incident', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='evidence_record', to='incidents.incident')),
+            ],
+        ),
+        migrations.RunPython(move_evidence, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='incident',
+            name='evidence',
+        ),
+    ]
@@ -35,8 +35,13 @@ class Incident(models.Model):
     severity = models.CharField(max_length=10, choices=SEVERITY_CHOICES)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='OPEN')
     sla_status = models.CharField(max_length=10, choices=SLA_STATUS_CHOICES, default='OK')
+    sla_status_changed_at = models.DateTimeField(blank=True, null=True)
+    
+    # Deduplication: hash of (rule, dataset, failure signature); see apps.incidents.dedup
+    fingerprint = models.CharField(max_length=64, blank=True, default='')
+    occurrence_count = models.PositiveIntegerField(default=1)
+    last_seen_at = models.DateTimeField(blank=True, null=True)
     
-    evidence = models.TextField(blank=True, help_text="JSON formatted evidence data")
     evidence_file = models.FileField(upload_to='incident_evidence/', blank=True, null=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -52,9 +57,39 @@ class Incident(models.Model):
         indexes = [
             models.Index(fields=['status', 'severity']),
             models.Index(fields=['assigned_to']),
+            models.Index(fields=['created_at', 'id'], name='incident_created_id_idx'),
+            # SLA evaluation: range scan on created_at within (status, severity, sla_status)
+            models.Index(fields=['status', 'severity', 'sla_status', 'created_at'], name='incident_sla_eval_idx'),
+            models.Index(fields=['sla_status_changed_at'], name='incident_sla_changed_idx'),
+        ]
+        constraints = [
+            # At most one unresolved incident per fingerprint
+            models.UniqueConstraint(
+                fields=['fingerprint'],
+                condition=models.Q(status__in=['OPEN', 'ACKNOWLEDGED', 'MUTED']) & ~models.Q(fingerprint=''),
+                name='incident_open_fingerprint_uniq',
+            ),
         ]
 
 
+class IncidentEvidence(models.Model):
+    """
+    Failed-row sample for an incident, kept out of the incidents table.
+
+    payload is zlib-compressed columnar JSON (see apps.incidents.evidence) and
+    is only read by the evidence view.
+    """
+    incident = models.OneToOneField(Incident, on_delete=models.CASCADE, related_name='evidence_record')
+    payload = models.BinaryField()
+    encoding = models.CharField(max_length=20, default='zlib+json')
+    row_count = models.PositiveIntegerField(default=0)
+    size_bytes = models.PositiveIntegerField(default=0, help_text="Uncompressed JSON size")
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Evidence for incident {self.incident_id} ({self.row_count} rows)"
+
+
 class IncidentComment(models.Model):
     incident = models.ForeignKey(Incident, on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -0,0 +1,47 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Incident
+
+DEFAULT_SLA_HOURS = {'CRITICAL': 1, 'HIGH': 2, 'MEDIUM': 24, 'LOW': 72}
+
+
+def get_sla_hours():
+    return getattr(settings, 'INCIDENT_SLA_HOURS', DEFAULT_SLA_HOURS)
+
+
+def evaluate_sla(now=None):
+    """
+    Move open incidents to WARNING or BREACHED with one UPDATE per severity and tier.
+
+    Each UPDATE only matches incidents whose sla_status is about to change,
+    and stamps them with the same sla_status_changed_at, so the caller can
+    fetch exactly the changed rows afterwards without looking at the rest.
+
+    Returns (now, counts) where counts maps 'BREACHED'/'WARNING' to rows updated.
+    """
+    now = now or timezone.now()
+    warning_ratio = getattr(settings, 'INCIDENT_SLA_WARNING_RATIO', 0.75)
+    counts = {'BREACHED': 0, 'WARNING': 0}
+    open_incidents = Incident.objects.filter(status='OPEN')
+
+    with transaction.atomic():
+        for severity, hours in get_sla_hours().items():
+            sla = timedelta(hours=hours)
+            # Breach first so the warning pass never touches an incident that's already over
+            counts['BREACHED'] += open_incidents.filter(
+                severity=severity, sla_status__in=['OK', 'WARNING'], created_at__lte=now - sla,
+            ).update(sla_status='BREACHED', sla_status_changed_at=now, updated_at=now)
+            counts['WARNING'] += open_incidents.filter(
+                severity=severity, sla_status='OK', created_at__lte=now - sla * warning_ratio,
+            ).update(sla_status='WARNING', sla_status_changed_at=now, updated_at=now)
+
+    return now, counts
+
+
+def changed_incidents(changed_at):
+    """
+    Incidents whose SLA status was changed by the evaluate_sla() run stamped changed_at
+    """
+    return Incident.objects.filter(sla_status_changed_at=changed_at).select_related('assigned_to')
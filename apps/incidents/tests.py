@@ -1,3 +1,158 @@
+from datetime import timedelta
+from unittest import mock
+import pandas as pd
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from apps.datasets.models import Dataset
+from apps.rules.models import Rule
+from apps.notifications.models import Notification
+from apps.rules.tasks import check_sla_breaches
+from .models import Incident
+from .sla import evaluate_sla, changed_incidents
+from .dedup import rule_fingerprint, upsert_incident
+from .evidence import load_evidence, parse_legacy_evidence
 
-# Create your tests here.
+User = get_user_model()
+
+
+class SLAEvaluationTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='oncall', password='testpass123', role='admin')
+        self.dataset = Dataset.objects.create(name='orders', source_type='CSV', owner=self.admin)
+        self.rule = Rule.objects.create(
+            name='order id present', dataset=self.dataset, rule_type='NOT_NULL',
+            dsl_expression='NOT_NULL(id)', owner=self.admin
+        )
+    
+    def _incident(self, severity, age_hours, status='OPEN'):
+        incident = Incident.objects.create(
+            rule=self.rule, dataset=self.dataset, title=f'{severity} {age_hours}h',
+            description='Null ids', severity=severity, status=status
+        )
+        Incident.objects.filter(id=incident.id).update(created_at=timezone.now() - timedelta(hours=age_hours))
+        return incident
+    
+    def test_breach_and_warning_tiers(self):
+        """Test that incidents past their SLA breach and those past the warning ratio warn"""
+        breached = self._incident('HIGH', 3)
+        warning = self._incident('HIGH', 1.75)
+        fresh = self._incident('HIGH', 0.5)
+        resolved = self._incident('HIGH', 5, status='RESOLVED')
+        low_warning = self._incident('LOW', 60)
+        
+        changed_at, counts = evaluate_sla()
+        
+        self.assertEqual(counts, {'BREACHED': 1, 'WARNING': 2})
+        statuses = dict(Incident.objects.values_list('id', 'sla_status'))
+        self.assertEqual(statuses[breached.id], 'BREACHED')
+        self.assertEqual(statuses[warning.id], 'WARNING')
+        self.assertEqual(statuses[fresh.id], 'OK')
+        self.assertEqual(statuses[resolved.id], 'OK')
+        self.assertEqual(statuses[low_warning.id], 'WARNING')
+        self.assertEqual(
+            set(changed_incidents(changed_at).values_list('id', flat=True)),
+            {breached.id, warning.id, low_warning.id}
+        )
+    
+    def test_unchanged_incidents_are_not_renotified(self):
+        """Test that a second run only notifies incidents whose status moved since the first"""
+        self._incident('HIGH', 3)
+        with mock.patch('apps.rules.tasks.is_weekday', return_value=True):
+            check_sla_breaches()
+            self.assertEqual(Notification.objects.filter(notification_type='SLA_BREACHED').count(), 1)
+            
+            check_sla_breaches()
+            self.assertEqual(Notification.objects.filter(notification_type='SLA_BREACHED').count(), 1)
+
+
+class IncidentFingerprintTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='worker', password='testpass123')
+        self.dataset = Dataset.objects.create(name='orders', source_type='CSV', owner=self.user)
+        self.rule = Rule.objects.create(
+            name='order id present', dataset=self.dataset, rule_type='NOT_NULL',
+            dsl_expression='NOT_NULL(id)', owner=self.user
+        )
+        self.fingerprint = rule_fingerprint(self.rule, self.dataset)
+    
+    def _upsert(self):
+        return upsert_incident(
+            self.fingerprint, rule=self.rule, dataset=self.dataset, severity='HIGH',
+            title='Rule failed', description='Null ids', status='OPEN'
+        )
+    
+    def test_repeat_failures_bump_the_counter(self):
+        """Test that repeated failures update one incident instead of creating new ones"""
+        self.assertTrue(self._upsert())
+        self.assertFalse(self._upsert())
+        self.assertFalse(self._upsert())
+        incident = Incident.objects.get()
+        self.assertEqual(incident.occurrence_count, 3)
+        self.assertIsNotNone(incident.last_seen_at)
+    
+    def test_resolved_incident_is_not_reused(self):
+        """Test that a failure after resolution opens a new incident"""
+        self._upsert()
+        Incident.objects.update(status='RESOLVED')
+        self.assertTrue(self._upsert())
+        self.assertEqual(Incident.objects.count(), 2)
+    
+    def test_unique_index_rejects_a_second_open_incident(self):
+        """Test that the partial unique index blocks a concurrent duplicate insert"""
+        self._upsert()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Incident.objects.create(
+                fingerprint=self.fingerprint, rule=self.rule, dataset=self.dataset,
+                severity='HIGH', title='Duplicate', description='Null ids', status='OPEN'
+            )
+    
+    def test_changed_expression_changes_fingerprint(self):
+        """Test that editing the rule's DSL starts a new fingerprint but whitespace does not"""
+        self.rule.dsl_expression = 'NOT_NULL( id )'
+        self.assertNotEqual(rule_fingerprint(self.rule, self.dataset), self.fingerprint)
+        self.rule.dsl_expression = 'NOT_NULL(id)  '
+        self.assertEqual(rule_fingerprint(self.rule, self.dataset), self.fingerprint)
+
+
+class IncidentEvidenceTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='analyst', password='testpass123')
+        self.dataset = Dataset.objects.create(name='orders', source_type='CSV', owner=self.user)
+        self.rule = Rule.objects.create(
+            name='order id present', dataset=self.dataset, rule_type='NOT_NULL',
+            dsl_expression='NOT_NULL(id)', owner=self.user
+        )
+        df = pd.DataFrame({'id': [None, 2.0], 'placed': pd.to_datetime(['2026-01-02', None])})
+        self.evidence_data = {
+            'total_failed': 2, 'sample_rows': df.to_dict('records'), 'columns': list(df.columns),
+            'rule_type': 'NOT_NULL', 'timestamp': timezone.now().isoformat(),
+        }
+        upsert_incident(
+            rule_fingerprint(self.rule, self.dataset), evidence_data=self.evidence_data,
+            rule=self.rule, dataset=self.dataset, severity='HIGH',
+            title='Rule failed', description='Null ids', status='OPEN'
+        )
+        self.incident = Incident.objects.get()
+        self.client.login(username='analyst', password='testpass123')
+    
+    def test_evidence_is_stored_compressed_and_columnar(self):
+        """Test that evidence rows are stored once per column with NaN/NaT as null"""
+        evidence = load_evidence(self.incident)
+        self.assertEqual(evidence['columns'], ['id', 'placed'])
+        self.assertEqual(evidence['rows'], [[None, '2026-01-02T00:00:00'], [2.0, None]])
+        self.assertEqual(self.incident.evidence_record.row_count, 2)
+    
+    def test_legacy_repr_is_converted(self):
+        """Test that the old str(evidence) text is parsed into the compact form"""
+        legacy = str({'total_failed': 1, 'sample_rows': [{'id': None, 'name': 'x'}], 'columns': ['id', 'name']})
+        self.assertEqual(parse_legacy_evidence(legacy)['rows'], [[None, 'x']])
+        self.assertEqual(parse_legacy_evidence("{'ts': Timestamp('2026-01-01')}")['raw'], "{'ts': Timestamp('2026-01-01')}")
+    
+    def test_evidence_view_renders_rows(self):
+        """Test that the evidence page shows the stored columns and the failed row count"""
+        response = self.client.get(reverse('incidents:incident_evidence', args=[self.incident.pk]))
+        self.assertContains(response, '<th>placed</th>', html=True)
+        self.assertContains(response, 'Showing 2 of 2 failed rows')
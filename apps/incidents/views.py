@@ -4,10 +4,12 @@ from django.contrib.auth import get_user_model
 from django.contrib import messages
 from django.http import JsonResponse
 from django.db.models import Count, Q
-from django.core.paginator import Paginator
 from .models import Incident
+from .dedup import unresolved_duplicate
+from .evidence import load_evidence
 from apps.rules.models import Rule
 from apps.datasets.models import Dataset
+from data_quality_watchtower.pagination import paginate_queryset, cursor_query_string
 
 User = get_user_model()
 
@@ -35,13 +37,13 @@ def incident_list(request):
             Q(rule__name__icontains=search_query)
         )
     
-    # Pagination
-    paginator = Paginator(incidents, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination (offset by default, keyset with ?pagination=cursor)
+    page_obj, cursor_mode = paginate_queryset(request, incidents, 10, 'created_at')
     
     return render(request, 'incidents/list.html', {
         'page_obj': page_obj,
+        'cursor_mode': cursor_mode,
+        'cursor_query': cursor_query_string(request),
         'status_filter': status_filter,
         'severity_filter': severity_filter,
         'search_query': search_query,
@@ -134,6 +136,10 @@ def incident_bulk_update(request):
                 }
                 
                 if status:
+                    duplicate = unresolved_duplicate(incident, status)
+                    if duplicate:
+                        messages.warning(request, f'Incident #{incident.pk} was not reopened: #{duplicate.pk} is already open for the same failure.')
+                        continue
                     incident.status = status
                 
                 if assigned_to_id:
@@ -166,16 +172,12 @@ def incident_bulk_update(request):
 def incident_evidence(request, pk):
     incident = get_object_or_404(Incident, pk=pk)
     
-    # Parse evidence JSON
-    import json
-    evidence_data = []
-    if incident.evidence:
-        try:
-            evidence_data = json.loads(incident.evidence)
-        except json.JSONDecodeError:
-            pass
+    # Evidence lives in its own compressed table and is only read here
+    evidence = load_evidence(incident) or {}
     
     return render(request, 'incidents/evidence.html', {
         'incident': incident,
-        'evidence_data': evidence_data,
+        'evidence': evidence,
+        'evidence_columns': evidence.get('columns', []),
+        'evidence_rows': evidence.get('rows', []),
     })
\ No newline at end of file
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('RULE_FAILED', 'Rule Failed'), ('INCIDENT_CREATED', 'Incident Created'), ('INCIDENT_RESOLVED', 'Incident Resolved'), ('DATASET_UPLOADED', 'Dataset Uploaded'), ('RULE_COMPLETED', 'Rule Completed'), ('SLA_WARNING', 'SLA Warning'), ('SLA_BREACHED', 'SLA Breached')], max_length=20),
+        ),
+    ]
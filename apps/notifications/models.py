@@ -11,6 +11,8 @@ class NotificationType(models.TextChoices):
     INCIDENT_RESOLVED = 'INCIDENT_RESOLVED', 'Incident Resolved'
     DATASET_UPLOADED = 'DATASET_UPLOADED', 'Dataset Uploaded'
     RULE_COMPLETED = 'RULE_COMPLETED', 'Rule Completed'
+    SLA_WARNING = 'SLA_WARNING', 'SLA Warning'
+    SLA_BREACHED = 'SLA_BREACHED', 'SLA Breached'
 
 
 class Notification(models.Model):
@@ -42,6 +44,7 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=['recipient', 'is_read']),
             models.Index(fields=['notification_type']),
+            models.Index(fields=['recipient', 'created_at', 'id'], name='notif_recipient_created_idx'),
         ]
 
 
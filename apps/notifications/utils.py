@@ -86,6 +86,51 @@ def send_email_notification(notification):
         print(f"Failed to send email notification: {e}")
 
 
+def notify_sla_changes(incidents):
+    """
+    Bulk-create in-app notifications for incidents whose SLA status just changed
+    
+    Args:
+        incidents: Iterable of Incident objects in WARNING or BREACHED state
+        
+    Returns:
+        Number of notifications created
+    """
+    admins = None
+    notifications = []
+    for incident in incidents:
+        # Same recipients as a new incident: the assignee, otherwise all admins
+        if incident.assigned_to:
+            recipients = [incident.assigned_to]
+        else:
+            if admins is None:
+                admins = list(User.objects.filter(role='admin'))
+            recipients = admins
+        
+        if incident.sla_status == 'BREACHED':
+            notification_type = 'SLA_BREACHED'
+            title = f"SLA Breached: {incident.title}"
+            message = f"The {incident.severity} incident '{incident.title}' has breached its SLA."
+        else:
+            notification_type = 'SLA_WARNING'
+            title = f"SLA Warning: {incident.title}"
+            message = f"The {incident.severity} incident '{incident.title}' is approaching its SLA."
+        
+        for recipient in recipients:
+            notifications.append(Notification(
+                recipient=recipient,
+                notification_type=notification_type,
+                title=title,
+                message=message,
+                incident=incident,
+                rule_id=incident.rule_id,
+                dataset_id=incident.dataset_id,
+            ))
+    
+    Notification.objects.bulk_create(notifications, batch_size=500)
+    return len(notifications)
+
+
 def get_unread_notifications_count(user):
     """
     Get count of unread notifications for a user
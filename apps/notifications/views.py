@@ -4,7 +4,7 @@ from django.http import JsonResponse
 from django.contrib import messages
 from .models import Notification, NotificationPreference
 from .forms import NotificationPreferencesForm
-from django.core.paginator import Paginator
+from data_quality_watchtower.pagination import paginate_queryset, cursor_query_string
 
 
 @login_required
@@ -19,13 +19,13 @@ def notification_list(request):
     elif read_filter == 'read':
         notifications = notifications.filter(is_read=True)
     
-    # Pagination
-    paginator = Paginator(notifications, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination (offset by default, keyset with ?pagination=cursor)
+    page_obj, cursor_mode = paginate_queryset(request, notifications, 10, 'created_at')
     
     return render(request, 'notifications/list.html', {
         'page_obj': page_obj,
+        'cursor_mode': cursor_mode,
+        'cursor_query': cursor_query_string(request),
         'read_filter': read_filter
     })
 
@@ -0,0 +1,155 @@
+import logging
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import Rule, RuleBatch
+
+logger = logging.getLogger(__name__)
+
+
+def _lease_expiry():
+    return timezone.now() + timedelta(seconds=getattr(settings, 'RULE_BATCH_LEASE_SECONDS', 900))
+
+
+def _queue(batch):
+    from .tasks import run_rule_batch_task
+
+    def send():
+        try:
+            run_rule_batch_task.apply_async(args=[str(batch.id)], task_id=str(batch.id))
+        except Exception as e:
+            logger.error(f"Failed to queue rule batch {batch.id}: {str(e)}")
+            RuleBatch.objects.filter(pk=batch.pk).update(status='FAILED', error=str(e), finished_at=timezone.now())
+    transaction.on_commit(send)
+
+
+def _join_or_create(dataset_id, rule_ids):
+    with transaction.atomic():
+        batch = (
+            RuleBatch.objects.select_for_update()
+            .filter(dataset_id=dataset_id, status__in=RuleBatch.ACTIVE_STATUSES).first()
+        )
+        if batch is not None and batch.lease_expires_at <= timezone.now():
+            # The worker holding it died; let a new batch take over
+            logger.warning(f"Rule batch {batch.id} lease expired, releasing it")
+            batch.status = 'FAILED'
+            batch.error = 'Lease expired before the batch finished'
+            batch.finished_at = timezone.now()
+            batch.save(update_fields=['status', 'error', 'finished_at'])
+            batch = None
+
+        if batch is not None:
+            # Rules the batch hasn't reached yet are picked up before it finishes,
+            # and rules it already finished are run again for this request
+            batch.rule_ids += [rule_id for rule_id in rule_ids if rule_id not in batch.rule_ids]
+            batch.completed_rule_ids = [rule_id for rule_id in batch.completed_rule_ids if rule_id not in rule_ids]
+            batch.requests += 1
+            batch.save(update_fields=['rule_ids', 'completed_rule_ids', 'requests'])
+            return batch, True
+
+        batch = RuleBatch.objects.create(dataset_id=dataset_id, rule_ids=list(rule_ids), lease_expires_at=_lease_expiry())
+        _queue(batch)
+        return batch, False
+
+
+def request_rule_batches(rule_ids):
+    """
+    Group rules by dataset and queue one batch task per dataset, merging into
+    a batch that is already queued or running for that dataset.
+
+    Returns (batches, errors): a list of (batch, rule_ids, coalesced) and a
+    dict of rule id -> error for rules that can't be run.
+    """
+    ids = {}
+    for requested in rule_ids:
+        try:
+            ids[requested] = int(requested)
+        except (TypeError, ValueError):
+            ids[requested] = None
+    rules = Rule.objects.in_bulk([rule_id for rule_id in ids.values() if rule_id is not None])
+    by_dataset = {}
+    errors = {}
+    for requested, rule_id in ids.items():
+        rule = rules.get(rule_id)
+        if rule is None:
+            errors[requested] = 'Rule not found'
+        elif not rule.is_active:
+            errors[requested] = 'Rule is inactive'
+        elif rule_id not in by_dataset.setdefault(rule.dataset_id, []):
+            by_dataset[rule.dataset_id].append(rule_id)
+
+    batches = []
+    for dataset_id, dataset_rule_ids in by_dataset.items():
+        try:
+            batch, coalesced = _join_or_create(dataset_id, dataset_rule_ids)
+        except IntegrityError:
+            # A concurrent request created the dataset's batch first
+            batch, coalesced = _join_or_create(dataset_id, dataset_rule_ids)
+        batches.append((batch, dataset_rule_ids, coalesced))
+    return batches, errors
+
+
+def _held(batch_id, token):
+    # The batch while this worker still holds it: RUNNING under its token
+    return RuleBatch.objects.filter(pk=batch_id, status='RUNNING', lease_token=token)
+
+
+def _lease_lost(batch_id, results):
+    logger.warning(f"Rule batch {batch_id} lease lost, stopping after {len(results)} rules")
+    return results
+
+
+def run_rule_batch(batch_id, run_rule):
+    """
+    Run a batch's rules with `run_rule(rule_id, frames)`, sharing loaded
+    DataFrames between them. Rules merged in while it runs are run before
+    it completes; the lease is renewed after each rule.
+
+    The worker claims the batch with a lease token and checks it at every
+    step, stopping as soon as the batch was failed (e.g. its lease expired)
+    or claimed by another worker. Returns None if the batch couldn't be
+    claimed, else the results of the rules run.
+    """
+    token = uuid.uuid4()
+    with transaction.atomic():
+        batch = RuleBatch.objects.select_for_update().filter(pk=batch_id, status__in=RuleBatch.ACTIVE_STATUSES).first()
+        if batch is None or (batch.status == 'RUNNING' and batch.lease_expires_at > timezone.now()):
+            # Finished, or still held by another worker (e.g. a redelivered task)
+            return None
+        batch.status = 'RUNNING'
+        batch.started_at = timezone.now()
+        batch.lease_expires_at = _lease_expiry()
+        batch.lease_token = token
+        batch.save(update_fields=['status', 'started_at', 'lease_expires_at', 'lease_token'])
+
+    frames = {}
+    results = []
+    try:
+        while True:
+            with transaction.atomic():
+                batch = _held(batch_id, token).select_for_update().first()
+                if batch is None:
+                    return _lease_lost(batch_id, results)
+                pending = [rule_id for rule_id in batch.rule_ids if rule_id not in batch.completed_rule_ids]
+                if not pending:
+                    # Checked and closed under the lock, so no merge can land after it
+                    batch.status = 'COMPLETED'
+                    batch.finished_at = timezone.now()
+                    batch.save(update_fields=['status', 'finished_at'])
+                    return results
+
+            for rule_id in pending:
+                results.append(run_rule(rule_id, frames))
+                if not _held(batch_id, token).update(lease_expires_at=_lease_expiry()):
+                    return _lease_lost(batch_id, results)
+            with transaction.atomic():
+                batch = _held(batch_id, token).select_for_update().first()
+                if batch is None:
+                    return _lease_lost(batch_id, results)
+                batch.completed_rule_ids += [rule_id for rule_id in pending if rule_id not in batch.completed_rule_ids]
+                batch.save(update_fields=['completed_rule_ids'])
+    except Exception as e:
+        _held(batch_id, token).update(status='FAILED', error=str(e), finished_at=timezone.now())
+        raise
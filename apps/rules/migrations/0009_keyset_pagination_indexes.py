@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 05:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rules', '0008_ruletemplate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rulerun',
+            index=models.Index(fields=['started_at', 'id'], name='rulerun_started_id_idx'),
+        ),
+    ]
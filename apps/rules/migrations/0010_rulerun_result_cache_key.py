@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rules', '0009_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rulerun',
+            name='result_cache_key',
+            field=models.CharField(blank=True, help_text='Hash of the stored content and DSL expression checked', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='rulerun',
+            index=models.Index(fields=['result_cache_key', 'status'], name='rulerun_result_cache_idx'),
+        ),
+    ]
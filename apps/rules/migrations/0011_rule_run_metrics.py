@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rules', '0010_rulerun_result_cache_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RuleRunMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('load_seconds', models.FloatField(default=0, help_text='Reading and parsing the dataset file')),
+                ('parse_seconds', models.FloatField(default=0, help_text='Parsing the DSL expression')),
+                ('evaluate_seconds', models.FloatField(default=0, help_text='Applying the rule to the rows')),
+                ('evidence_seconds', models.FloatField(default=0, help_text='Collecting failed-row evidence')),
+                ('persist_seconds', models.FloatField(default=0, help_text='Saving the run, trend data and incident')),
+                ('total_seconds', models.FloatField(db_index=True, default=0)),
+                ('bytes_read', models.BigIntegerField(default=0, help_text='Dataset file bytes read (compressed size for compressed files)')),
+                ('frame_bytes', models.BigIntegerField(default=0, help_text='Memory held by the loaded DataFrame')),
+                ('peak_memory_bytes', models.BigIntegerField(blank=True, help_text='Peak resident memory of the executing process', null=True)),
+                ('rows_per_second', models.FloatField(default=0)),
+                ('cached', models.BooleanField(default=False, help_text='Result reused from a run over the same stored content')),
+                ('rule_run', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='metrics', to='rules.rulerun')),
+            ],
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0010_dataset_content'),
+        ('rules', '0011_rule_run_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RuleBatch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('rule_ids', models.JSONField(default=list, help_text='Rules to run, including those merged in by later requests')),
+                ('completed_rule_ids', models.JSONField(default=list)),
+                ('requests', models.IntegerField(default=1, help_text='Trigger requests coalesced into this batch')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('lease_expires_at', models.DateTimeField(help_text='Renewed as rules finish; a batch past it is treated as abandoned')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rule_batches', to='datasets.dataset')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='rulebatch',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING', 'RUNNING'])), fields=('dataset',), name='rulebatch_one_active_per_dataset'),
+        ),
+    ]
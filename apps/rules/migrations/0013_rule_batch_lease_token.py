@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rules', '0012_rule_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rulebatch',
+            name='lease_token',
+            field=models.UUIDField(blank=True, editable=False, help_text='Set by the worker running the batch; it stops once this changes', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rules', '0013_rule_batch_lease_token'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rulerunmetrics',
+            name='peak_memory_bytes',
+            field=models.BigIntegerField(blank=True, help_text='Peak memory allocated while the run executed (shared by runs overlapping in one process)', null=True),
+        ),
+    ]
@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.conf import settings
 from apps.datasets.models import Dataset
@@ -83,15 +84,108 @@ class RuleRun(models.Model):
     failed_count = models.IntegerField(default=0)
     evidence_file = models.FileField(upload_to='evidence/', blank=True, null=True)
     sample_evidence = models.JSONField(blank=True, null=True, help_text="Sample evidence rows that failed")
+    result_cache_key = models.CharField(max_length=64, blank=True, help_text="Hash of the stored content and DSL expression checked")
     
     def __str__(self):
         return f"{self.rule.name} run {self.run_id}"
     
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            # Backs keyset pagination ordered by (started_at, id)
+            models.Index(fields=['started_at', 'id'], name='rulerun_started_id_idx'),
+            models.Index(fields=['result_cache_key', 'status'], name='rulerun_result_cache_idx'),
+        ]
         
     def save(self, *args, **kwargs):
         # Ensure dataset is set if not already
         if not self.dataset and self.rule:
             self.dataset = self.rule.dataset
         super().save(*args, **kwargs)
+
+
+class RuleRunMetrics(models.Model):
+    """
+    Where a rule run spent its time (seconds per executor stage) and what it
+    consumed, so slow runs can be told apart as I/O-bound or evaluation-bound
+    """
+    STAGES = ['load', 'parse', 'evaluate', 'evidence', 'persist']
+    
+    rule_run = models.OneToOneField(RuleRun, on_delete=models.CASCADE, related_name='metrics')
+    load_seconds = models.FloatField(default=0, help_text="Reading and parsing the dataset file")
+    parse_seconds = models.FloatField(default=0, help_text="Parsing the DSL expression")
+    evaluate_seconds = models.FloatField(default=0, help_text="Applying the rule to the rows")
+    evidence_seconds = models.FloatField(default=0, help_text="Collecting failed-row evidence")
+    persist_seconds = models.FloatField(default=0, help_text="Saving the run, trend data and incident")
+    total_seconds = models.FloatField(default=0, db_index=True)
+    bytes_read = models.BigIntegerField(default=0, help_text="Dataset file bytes read (compressed size for compressed files)")
+    frame_bytes = models.BigIntegerField(default=0, help_text="Memory held by the loaded DataFrame")
+    peak_memory_bytes = models.BigIntegerField(null=True, blank=True, help_text="Peak memory allocated while the run executed (shared by runs overlapping in one process)")
+    rows_per_second = models.FloatField(default=0)
+    cached = models.BooleanField(default=False, help_text="Result reused from a run over the same stored content")
+    
+    def __str__(self):
+        return f"Metrics for run {self.rule_run_id} ({self.total_seconds:.3f}s)"
+    
+    def stage_breakdown(self):
+        """
+        (stage, seconds, percent of the run) for each executor stage
+        """
+        return [
+            (stage, getattr(self, f'{stage}_seconds'),
+             round(getattr(self, f'{stage}_seconds') / self.total_seconds * 100, 1) if self.total_seconds else 0.0)
+            for stage in self.STAGES
+        ]
+    
+    def to_dict(self):
+        return {
+            'stages': {stage: round(seconds, 6) for stage, seconds, _ in self.stage_breakdown()},
+            'total_seconds': round(self.total_seconds, 6),
+            'bytes_read': self.bytes_read,
+            'frame_bytes': self.frame_bytes,
+            'peak_memory_bytes': self.peak_memory_bytes,
+            'rows_per_second': round(self.rows_per_second, 1),
+            'cached': self.cached,
+        }
+
+
+class RuleBatch(models.Model):
+    """
+    One Celery task running a set of rules over one dataset, loading the
+    file once. While it holds the lease (status PENDING or RUNNING, lease
+    not expired) new trigger requests for the dataset merge into it instead
+    of queueing another task. Its id is the Celery task id.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+    ACTIVE_STATUSES = ['PENDING', 'RUNNING']
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='rule_batches')
+    rule_ids = models.JSONField(default=list, help_text="Rules to run, including those merged in by later requests")
+    completed_rule_ids = models.JSONField(default=list)
+    requests = models.IntegerField(default=1, help_text="Trigger requests coalesced into this batch")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    error = models.TextField(blank=True)
+    lease_expires_at = models.DateTimeField(help_text="Renewed as rules finish; a batch past it is treated as abandoned")
+    lease_token = models.UUIDField(null=True, blank=True, editable=False, help_text="Set by the worker running the batch; it stops once this changes")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # At most one batch in flight per dataset
+            models.UniqueConstraint(
+                fields=['dataset'], condition=models.Q(status__in=['PENDING', 'RUNNING']),
+                name='rulebatch_one_active_per_dataset',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Batch of {len(self.rule_ids)} rules for dataset {self.dataset_id} ({self.status})"
@@ -3,7 +3,8 @@ import pandas as pd
 from celery import shared_task
 from django.utils import timezone
 from django.db import transaction
-from .models import Rule, RuleRun
+from .models import Rule, RuleBatch, RuleRun
+from .batches import run_rule_batch
 from .utils.rule_executor import RuleExecutor
 from .utils.weekday_checker import is_weekday
 from apps.datasets.models import Dataset
@@ -21,6 +22,10 @@ def run_single_rule_task(rule_id):
     if not is_weekday():
         return f"Rule execution skipped - Weekend detected. Rule {rule_id} will run on next weekday."
     
+    return _run_rule(rule_id)
+
+
+def _run_rule(rule_id, frames=None):
     try:
         rule = Rule.objects.select_related('dataset').get(id=rule_id)
         
@@ -39,7 +44,7 @@ def run_single_rule_task(rule_id):
         
         # Execute rule using RuleExecutor
         executor = RuleExecutor(rule, dataset)
-        rule_run = executor.execute()
+        rule_run = executor.execute(frames=frames)
         
         return f"Rule {rule.name} executed successfully. Passed: {rule_run.passed_count}, Failed: {rule_run.failed_count}"
     
@@ -49,6 +54,23 @@ def run_single_rule_task(rule_id):
         return error_msg
 
 
+@shared_task
+def run_rule_batch_task(batch_id):
+    """
+    Run a RuleBatch: every rule requested for its dataset, reading the file once.
+    """
+    if not is_weekday():
+        RuleBatch.objects.filter(pk=batch_id, status__in=RuleBatch.ACTIVE_STATUSES).update(
+            status='FAILED', error='Skipped - Weekend detected', finished_at=timezone.now()
+        )
+        return f"Rule batch {batch_id} skipped - Weekend detected. Rules will run on next weekday."
+    
+    results = run_rule_batch(batch_id, _run_rule)
+    if results is None:
+        return f"Rule batch {batch_id} is not pending, skipping execution."
+    return f"Executed {len(results)} rules in batch {batch_id}: {'; '.join(results)}"
+
+
 @shared_task
 def run_dataset_rules_task(dataset_id):
     """
@@ -102,42 +124,26 @@ def run_all_rules_task():
 def check_sla_breaches():
     """
     Check for SLA breaches in open incidents.
+    
+    Set-based: one UPDATE per severity for BREACHED and one for WARNING
+    (INCIDENT_SLA_HOURS, INCIDENT_SLA_WARNING_RATIO), then notifications
+    for just the incidents whose status changed.
     """
     # Check if it's a weekday before running
     if not is_weekday():
         return "SLA breach check skipped - Weekend detected. Check will run on next weekday."
     
     try:
-        # Define SLA thresholds (in hours)
-        HIGH_SEVERITY_SLA = 2  # 2 hours
-        MEDIUM_SEVERITY_SLA = 24  # 24 hours
-        LOW_SEVERITY_SLA = 72  # 72 hours
-        
-        # Get open incidents
-        open_incidents = Incident.objects.filter(status='OPEN')
-        
-        now = timezone.now()
-        breached_incidents = []
+        from apps.incidents.sla import evaluate_sla, changed_incidents
+        from apps.notifications.utils import notify_sla_changes
         
-        for incident in open_incidents:
-            # Calculate age of incident
-            age_hours = (now - incident.created_at).total_seconds() / 3600
-            
-            # Check if SLA is breached
-            sla_breached = False
-            if incident.severity == 'HIGH' and age_hours > HIGH_SEVERITY_SLA:
-                sla_breached = True
-            elif incident.severity == 'MEDIUM' and age_hours > MEDIUM_SEVERITY_SLA:
-                sla_breached = True
-            elif incident.severity == 'LOW' and age_hours > LOW_SEVERITY_SLA:
-                sla_breached = True
-            
-            if sla_breached:
-                incident.sla_status = 'BREACHED'
-                incident.save()
-                breached_incidents.append(incident.id)
+        changed_at, counts = evaluate_sla()
+        notified = notify_sla_changes(changed_incidents(changed_at)) if any(counts.values()) else 0
         
-        return f"Checked {open_incidents.count()} open incidents. SLA breached for {len(breached_incidents)} incidents."
+        return (
+            f"SLA breached for {counts['BREACHED']} incidents, warning for {counts['WARNING']} incidents. "
+            f"Sent {notified} notifications."
+        )
     
     except Exception as e:
-        return f"Error checking SLA breaches: {str(e)}"
\ No newline at end of file
+        return f"Error checking SLA breaches: {str(e)}"
@@ -1,6 +1,25 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+import json
+import shutil
+import tempfile
+import tracemalloc
+import uuid
+from unittest.mock import patch
 import pandas as pd
+from .batches import request_rule_batches, run_rule_batch
+from .models import Rule, RuleBatch, RuleRun, RuleRunMetrics
+from .tasks import _run_rule, run_rule_batch_task
+from .utils.rule_executor import RuleExecutor as DatasetRuleExecutor
 from .utils.dsl_parser import DSLParser, RuleExecutor as DSLRuleExecutor
+from apps.datasets.models import Dataset
+from data_quality_watchtower.pagination import CursorPaginator, decode_cursor
+
+User = get_user_model()
 
 
 class DSLParserTest(TestCase):
@@ -99,4 +118,244 @@ class RuleExecutorTest(TestCase):
         
         # Check results
         self.assertEqual(result['passed'], 3)  # 'abc', 'abcd', 'abcdefghijk' are within range
-        self.assertEqual(result['failed'], 2)  # 'a' is too short, 'toolongusernameexceedinglimit' is too long
\ No newline at end of file
+        self.assertEqual(result['failed'], 2)  # 'a' is too short, 'toolongusernameexceedinglimit' is too long
+
+
+class CursorPaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='pager', password='testpass123')
+        self.dataset = Dataset.objects.create(name='pager_ds', source_type='CSV', owner=self.user)
+        self.rule = Rule.objects.create(
+            name='pager rule', dataset=self.dataset, rule_type='NOT_NULL',
+            dsl_expression='NOT_NULL(id)', owner=self.user
+        )
+        base = timezone.now()
+        # Two runs share each timestamp so the id tie-breaker is exercised
+        for i in range(7):
+            RuleRun.objects.create(
+                rule=self.rule, dataset=self.dataset, run_id=f'run_{i}',
+                started_at=base - timedelta(minutes=i // 2)
+            )
+        self.expected = list(RuleRun.objects.order_by('-started_at', '-id').values_list('id', flat=True))
+    
+    def test_walks_forward_and_back_without_gaps(self):
+        """Test that next/previous cursors cover every row exactly once"""
+        paginator = CursorPaginator(RuleRun.objects.all(), 3, 'started_at')
+        
+        first = paginator.get_page()
+        self.assertFalse(first.has_previous())
+        second = paginator.get_page(first.next_cursor)
+        third = paginator.get_page(second.next_cursor)
+        self.assertFalse(third.has_next())
+        
+        seen = [run.id for page in (first, second, third) for run in page]
+        self.assertEqual(seen, self.expected)
+        
+        back = paginator.get_page(third.previous_cursor)
+        self.assertEqual([run.id for run in back], [run.id for run in second])
+    
+    def test_invalid_cursor_returns_first_page(self):
+        """Test that a tampered cursor falls back to the first page"""
+        self.assertIsNone(decode_cursor('not-a-cursor'))
+        page = CursorPaginator(RuleRun.objects.all(), 3, 'started_at').get_page('not-a-cursor')
+        self.assertEqual([run.id for run in page], self.expected[:3])
+
+
+class RuleRunMetricsTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        
+        self.user = User.objects.create_user(username='timer', password='testpass123')
+        self.dataset = Dataset.objects.create(name='orders', source_type='CSV', owner=self.user)
+        self.dataset.file.save('orders.csv', ContentFile(b'id,email\n' + b''.join(
+            f'{i},user{i % 900}@example.com\n'.encode() for i in range(1000)
+        )))
+    
+    def run_rule(self, name, expression):
+        rule = Rule.objects.create(name=name, dataset=self.dataset, rule_type='UNIQUE', dsl_expression=expression, owner=self.user)
+        return DatasetRuleExecutor(rule, self.dataset).execute()
+    
+    def test_run_records_stage_breakdown_and_resources(self):
+        """Test that an executed run stores per-stage timings, bytes read and throughput"""
+        rule_run = self.run_rule('email', "UNIQUE('email')")
+        metrics = rule_run.metrics
+        
+        self.assertEqual(rule_run.failed_count, 200)
+        self.assertGreater(metrics.load_seconds, 0)
+        self.assertGreater(metrics.evidence_seconds, 0)
+        self.assertGreaterEqual(metrics.total_seconds, sum(seconds for _, seconds, _ in metrics.stage_breakdown()))
+        self.assertEqual(metrics.bytes_read, self.dataset.file.size)
+        self.assertGreater(metrics.frame_bytes, 0)
+        self.assertGreater(metrics.rows_per_second, 0)
+        self.assertFalse(metrics.cached)
+        self.assertEqual(set(metrics.to_dict()['stages']), set(RuleRunMetrics.STAGES))
+        
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(reverse('rules:rule_detail', args=[rule_run.rule_id])), 'rows/s')
+    
+    def test_peak_memory_is_measured_per_run(self):
+        """Test that a run's peak memory excludes allocations made before it started"""
+        blob = b'x' * (64 * 1024 * 1024)
+        del blob
+        rule_run = self.run_rule('email', "UNIQUE('email')")
+        
+        self.assertGreater(rule_run.metrics.peak_memory_bytes, 0)
+        self.assertLess(rule_run.metrics.peak_memory_bytes, 64 * 1024 * 1024)
+        self.assertFalse(tracemalloc.is_tracing())
+    
+    def test_slowest_api_ranks_rules_and_datasets(self):
+        """Test that the slowest-rules and slowest-datasets endpoints rank by recorded run time"""
+        fast, slow = self.run_rule('id', "UNIQUE('id')"), self.run_rule('email', "UNIQUE('email')")
+        RuleRunMetrics.objects.filter(rule_run=fast).update(total_seconds=0.5, evaluate_seconds=0.25)
+        RuleRunMetrics.objects.filter(rule_run=slow).update(total_seconds=3.0, load_seconds=2.0)
+        self.client.force_login(self.user)
+        
+        rules = self.client.get(reverse('api:slowest_rules')).json()['rules']
+        self.assertEqual([entry['rule_name'] for entry in rules], ['email', 'id'])
+        self.assertEqual((rules[0]['avg_seconds'], rules[0]['avg_stage_seconds']['load']), (3.0, 2.0))
+        
+        datasets = self.client.get(reverse('api:slowest_datasets'), {'sort': 'total'}).json()['datasets']
+        self.assertEqual((datasets[0]['dataset_name'], datasets[0]['runs'], datasets[0]['total_seconds']), ('orders', 2, 3.5))
+        self.assertEqual(self.client.get(reverse('api:slowest_rules'), {'sort': 'median'}).status_code, 400)
+
+
+@patch('apps.rules.tasks.is_weekday', return_value=True)
+class RuleBatchTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        
+        self.user = User.objects.create_user(username='trigger', password='testpass123')
+        self.client.force_login(self.user)
+        self.orders = self.create_dataset('orders')
+        self.customers = self.create_dataset('customers')
+        self.rules = [
+            Rule.objects.create(name=f'{column} unique', dataset=self.orders, rule_type='UNIQUE',
+                                dsl_expression=f"UNIQUE('{column}')", owner=self.user)
+            for column in ('id', 'email', 'amount')
+        ]
+        self.customer_rule = Rule.objects.create(name='customer id unique', dataset=self.customers, rule_type='UNIQUE',
+                                                 dsl_expression="UNIQUE('id')", owner=self.user)
+    
+    def create_dataset(self, name):
+        dataset = Dataset.objects.create(name=name, source_type='CSV', owner=self.user)
+        dataset.file.save(f'{name}.csv', ContentFile(b'id,email,amount\n' + b''.join(
+            f'{i},user{i % 90}@example.com,{i % 7}\n'.encode() for i in range(100)
+        )))
+        return dataset
+    
+    def trigger(self, rule_ids):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('api:run_rules'), json.dumps({'rule_ids': rule_ids}), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+    
+    @patch('apps.rules.tasks.run_rule_batch_task.apply_async')
+    def test_trigger_queues_one_task_per_dataset(self, apply_async, _):
+        """Test that requested rules are grouped into one batch task per dataset"""
+        data = self.trigger([self.rules[0].id, self.customer_rule.id, self.rules[1].id, 9999])
+        
+        self.assertEqual(apply_async.call_count, 2)
+        batches = {batch['dataset_id']: batch for batch in data['batches']}
+        self.assertEqual(batches[self.orders.id]['rule_ids'], [self.rules[0].id, self.rules[1].id])
+        self.assertEqual(batches[self.customers.id]['rule_ids'], [self.customer_rule.id])
+        queued_task_ids = {call.kwargs['task_id'] for call in apply_async.call_args_list}
+        self.assertEqual(queued_task_ids, {batch['task_id'] for batch in data['batches']})
+        self.assertIn({'rule_id': 9999, 'error': 'Rule not found'}, data['results'])
+    
+    @patch('apps.rules.tasks.run_rule_batch_task.apply_async')
+    def test_overlapping_triggers_join_the_batch_in_flight(self, apply_async, _):
+        """Test that a second trigger for a dataset with a pending batch returns its task id"""
+        first = self.trigger([self.rules[0].id])['batches'][0]
+        second = self.trigger([self.rules[0].id, self.rules[2].id])['batches'][0]
+        
+        self.assertEqual(apply_async.call_count, 1)
+        self.assertEqual(second['task_id'], first['task_id'])
+        self.assertTrue(second['coalesced'])
+        batch = RuleBatch.objects.get()
+        self.assertEqual(batch.rule_ids, [self.rules[0].id, self.rules[2].id])
+        self.assertEqual(batch.requests, 2)
+        
+        # An abandoned batch's lease lapses and the next trigger starts a new one
+        RuleBatch.objects.update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        third = self.trigger([self.rules[1].id])['batches'][0]
+        self.assertFalse(third['coalesced'])
+        self.assertNotEqual(third['task_id'], first['task_id'])
+        self.assertEqual(RuleBatch.objects.get(pk=first['task_id']).status, 'FAILED')
+    
+    def test_batch_reads_the_dataset_once(self, _):
+        """Test that a batch runs every rule, including ones merged in mid-run, from one read of the file"""
+        batches, _ = request_rule_batches([rule.id for rule in self.rules[:2]])
+        batch = batches[0][0]
+        
+        def run_rule(rule_id, frames):
+            if rule_id == self.rules[0].id:
+                # Another user asks for the third rule while the batch is running
+                (merged, _, coalesced), = request_rule_batches([self.rules[2].id])[0]
+                self.assertTrue(coalesced)
+                self.assertEqual(merged.pk, batch.pk)
+            return _run_rule(rule_id, frames)
+        
+        with patch.object(DatasetRuleExecutor, '_load_dataset', autospec=True, side_effect=DatasetRuleExecutor._load_dataset) as load:
+            results = run_rule_batch(batch.pk, run_rule)
+        
+        self.assertEqual(load.call_count, 1)
+        self.assertEqual(len(results), 3)
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, 'COMPLETED')
+        self.assertEqual(sorted(batch.completed_rule_ids), sorted(rule.id for rule in self.rules))
+        self.assertEqual(RuleRun.objects.filter(dataset=self.orders, status='COMPLETED').count(), 3)
+        self.assertEqual(RuleRunMetrics.objects.filter(bytes_read__gt=0).count(), 1)
+        self.assertEqual(run_rule_batch_task(str(batch.pk)), f"Rule batch {batch.pk} is not pending, skipping execution.")
+    
+    def test_rerequested_finished_rule_runs_again(self, _):
+        """Test that a rule asked for again after the batch finished it is run a second time"""
+        batches, _ = request_rule_batches([self.rules[0].id])
+        batch = batches[0][0]
+        ran = []
+        
+        def run_rule(rule_id, frames):
+            if not ran:
+                request_rule_batches([self.rules[1].id])
+            elif rule_id == self.rules[1].id:
+                request_rule_batches([self.rules[0].id])
+            ran.append(rule_id)
+            return f'ran {rule_id}'
+        
+        run_rule_batch(batch.pk, run_rule)
+        self.assertEqual(ran, [self.rules[0].id, self.rules[1].id, self.rules[0].id])
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, 'COMPLETED')
+    
+    def test_batch_stops_once_its_lease_is_lost(self, _):
+        """Test that a worker stops when its batch is failed or claimed by another worker, and doesn't claim a held batch"""
+        for take_lease in (
+            lambda batch: RuleBatch.objects.filter(pk=batch.pk).update(status='FAILED'),
+            lambda batch: RuleBatch.objects.filter(pk=batch.pk).update(lease_token=uuid.uuid4()),
+        ):
+            RuleBatch.objects.all().delete()
+            batch = request_rule_batches([rule.id for rule in self.rules[:2]])[0][0][0]
+            ran = []
+            
+            def run_rule(rule_id, frames):
+                ran.append(rule_id)
+                take_lease(batch)
+                return f'ran {rule_id}'
+            
+            self.assertEqual(run_rule_batch(batch.pk, run_rule), [f'ran {self.rules[0].id}'])
+            self.assertEqual(ran, [self.rules[0].id])
+            batch.refresh_from_db()
+            self.assertNotEqual(batch.status, 'COMPLETED')
+            self.assertEqual(batch.completed_rule_ids, [])
+        
+        RuleBatch.objects.all().delete()
+        batch = request_rule_batches([self.rules[0].id])[0][0][0]
+        RuleBatch.objects.filter(pk=batch.pk).update(status='RUNNING', lease_token=uuid.uuid4())
+        self.assertIsNone(run_rule_batch(batch.pk, lambda rule_id, frames: self.fail('ran a held batch')))
@@ -14,6 +14,7 @@ urlpatterns = [
     path('<int:pk>/toggle-active/', views.rule_toggle_active, name='rule_toggle_active'),
     path('<int:pk>/run/', views.rule_run, name='rule_run'),
     path('runs/', views.rule_run_list, name='rule_run_list'),
+    path('runs/export/', views.rule_run_export, name='rule_run_export'),
     path('timeline/', views_timeline.rule_run_timeline, name='rule_run_timeline'),
     path('timeline/api/', views_timeline.rule_run_timeline_api, name='rule_run_timeline_api'),
     path('create-from-recommendation/', views.create_rule_from_recommendation, name='create_rule_from_recommendation'),
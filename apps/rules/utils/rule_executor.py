@@ -1,3 +1,4 @@
+import logging
 import pandas as pd
 import os
 import hashlib
@@ -7,8 +8,26 @@ from django.utils import timezone
 from django.db.models import Q, Count
 from django.db.models.functions import TruncDate
 from .dsl_parser import DSLParser, compile_to_sql, execute_custom_python_rule, compute_run_id
+from .run_metrics import RunMetrics
 from apps.rules.models import Rule, RuleRun
-from apps.incidents.models import Incident
+from apps.datasets.compression import read_csv
+from apps.datasets.content_store import stored_content_hash
+from apps.incidents.dedup import rule_fingerprint, upsert_incident
+
+logger = logging.getLogger(__name__)
+
+
+def result_cache_key(dataset, dsl_expression):
+    """
+    Key under which a completed run's result can be reused: the same DSL
+    expression over the same stored content always gives the same counts.
+    Empty for datasets whose file isn't content-addressed.
+    """
+    sha256 = stored_content_hash(dataset)
+    if not sha256:
+        return ''
+    return hashlib.sha256(f'{sha256}\0{dsl_expression.strip()}'.encode('utf-8')).hexdigest()
+
 
 class RuleExecutor:
     """
@@ -20,9 +39,12 @@ class RuleExecutor:
         self.dataset = dataset
         self.parser = DSLParser()
     
-    def execute(self, run_timestamp=None):
+    def execute(self, run_timestamp=None, frames=None):
         """
         Execute a rule and return results
+        
+        `frames` is an optional dict of DataFrames by dataset id shared by the
+        rules of one batch, so the file is read once rather than per rule.
         """
         if run_timestamp is None:
             run_timestamp = timezone.now()
@@ -44,49 +66,68 @@ class RuleExecutor:
             status='RUNNING'
         )
         
+        metrics = RunMetrics()
         try:
+            # Datasets sharing stored content reuse each other's results
+            cache_key = result_cache_key(self.dataset, self.rule.dsl_expression)
+            if cache_key:
+                cached_run = (
+                    RuleRun.objects.filter(result_cache_key=cache_key, status='COMPLETED')
+                    .exclude(pk=rule_run.pk).order_by('-finished_at').first()
+                )
+                if cached_run is not None:
+                    return self._complete_from_cache(rule_run, cached_run, metrics)
+            rule_run.result_cache_key = cache_key
+            
             # Load dataset
-            df = self._load_dataset()
+            shared = frames is not None and self.dataset.pk in frames
+            with metrics.stage('load'):
+                df = frames[self.dataset.pk] if shared else self._load_dataset()
             if df is None:
                 rule_run.status = 'FAILED'
                 rule_run.finished_at = timezone.now()
                 rule_run.save()
+                metrics.save(rule_run)
                 return rule_run
+            if not shared:
+                metrics.bytes_read = os.path.getsize(self.dataset.file.path)
+                if frames is not None:
+                    frames[self.dataset.pk] = df
+            metrics.frame_bytes = int(df.memory_usage(index=True, deep=False).sum())
             
             total_rows = len(df)
             
             # Parse DSL expression
             try:
-                func_name, args = self.parser.parse(self.rule.dsl_expression)
-                # Convert tuple to dictionary for compatibility
-                parsed_rule = {'type': func_name}
-                if func_name == 'NOT_NULL':
-                    parsed_rule['column'] = args[0]
-                elif func_name == 'UNIQUE':
-                    parsed_rule['column'] = args[0]
-                elif func_name == 'IN_RANGE':
-                    parsed_rule['column'] = args[0]
-                    parsed_rule['min'] = args[1]
-                    parsed_rule['max'] = args[2]
-                elif func_name == 'FOREIGN_KEY':
-                    parsed_rule['column'] = args[0]
-                    parsed_rule['ref_table'] = args[1]
-                    parsed_rule['ref_column'] = args[2]
-                elif func_name == 'REGEX':
-                    parsed_rule['column'] = args[0]
-                    parsed_rule['pattern'] = args[1]
-                elif func_name == 'LENGTH_RANGE':
-                    parsed_rule['column'] = args[0]
-                    parsed_rule['min_length'] = args[1]
-                    parsed_rule['max_length'] = args[2]
+                with metrics.stage('parse'):
+                    func_name, args = self.parser.parse(self.rule.dsl_expression)
+                    # Convert tuple to dictionary for compatibility
+                    parsed_rule = {'type': func_name}
+                    if func_name == 'NOT_NULL':
+                        parsed_rule['column'] = args[0]
+                    elif func_name == 'UNIQUE':
+                        parsed_rule['column'] = args[0]
+                    elif func_name == 'IN_RANGE':
+                        parsed_rule['column'] = args[0]
+                        parsed_rule['min'] = args[1]
+                        parsed_rule['max'] = args[2]
+                    elif func_name == 'FOREIGN_KEY':
+                        parsed_rule['column'] = args[0]
+                        parsed_rule['ref_table'] = args[1]
+                        parsed_rule['ref_column'] = args[2]
+                    elif func_name == 'REGEX':
+                        parsed_rule['column'] = args[0]
+                        parsed_rule['pattern'] = args[1]
+                    elif func_name == 'LENGTH_RANGE':
+                        parsed_rule['column'] = args[0]
+                        parsed_rule['min_length'] = args[1]
+                        parsed_rule['max_length'] = args[2]
             except Exception as e:
-                rule_run.status = 'FAILED'
-                rule_run.finished_at = timezone.now()
-                rule_run.save()
                 raise ValueError(f"Failed to parse DSL expression: {str(e)}")
             
             # Apply rule
-            failed_mask, failed_rows, passed_rows = self._apply_rule(df, parsed_rule)
+            with metrics.stage('evaluate'):
+                failed_mask, failed_rows, passed_rows = self._apply_rule(df, parsed_rule)
             
             # Update RuleRun
             rule_run.total_rows = total_rows
@@ -95,35 +136,38 @@ class RuleExecutor:
             rule_run.finished_at = timezone.now()
             rule_run.status = 'COMPLETED'
             
-            print(f"Updating rule run {rule_run.id}: passed={passed_rows}, failed={failed_rows}, total={total_rows}")  # Debug log
+            logger.debug(f"Updating rule run {rule_run.id}: passed={passed_rows}, failed={failed_rows}, total={total_rows}")
             
             # Save evidence if there are failures
             if failed_rows > 0:
-                evidence_data = self._generate_evidence(df, failed_mask, parsed_rule)
-                rule_run.sample_evidence = evidence_data
-                
-                # Save evidence to file if needed
-                if len(str(evidence_data)) > 10000:  # If evidence is large, save to file
-                    evidence_filename = f'evidence_{run_id}.csv'
-                    evidence_path = os.path.join(settings.MEDIA_ROOT, 'evidences', evidence_filename)
+                with metrics.stage('evidence'):
+                    evidence_data = self._generate_evidence(df, failed_mask, parsed_rule)
+                    rule_run.sample_evidence = evidence_data
                     
-                    # Ensure evidences directory exists
-                    os.makedirs(os.path.dirname(evidence_path), exist_ok=True)
-                    
-                    # Save evidence
-                    evidence_df = df[failed_mask].head(50)  # Limit to 50 rows
-                    evidence_df.to_csv(evidence_path, index=False)
-                    rule_run.evidence_file = f'evidences/{evidence_filename}'
-            
-            rule_run.save()
+                    # Save evidence to file if needed
+                    if len(str(evidence_data)) > 10000:  # If evidence is large, save to file
+                        evidence_filename = f'evidence_{run_id}.csv'
+                        evidence_path = os.path.join(settings.MEDIA_ROOT, 'evidences', evidence_filename)
+                        
+                        # Ensure evidences directory exists
+                        os.makedirs(os.path.dirname(evidence_path), exist_ok=True)
+                        
+                        # Save evidence
+                        evidence_df = df[failed_mask].head(50)  # Limit to 50 rows
+                        evidence_df.to_csv(evidence_path, index=False)
+                        rule_run.evidence_file = f'evidences/{evidence_filename}'
             
-            # Update dataset quality trend data
-            self._update_dataset_quality_trend()
-            
-            # Create or update incidents
-            if failed_rows > 0:
-                self._create_or_update_incident(rule_run, failed_rows, total_rows, evidence_data)
+            with metrics.stage('persist'):
+                rule_run.save()
+                
+                # Update dataset quality trend data
+                self._update_dataset_quality_trend()
+                
+                # Create or update incidents
+                if failed_rows > 0:
+                    self._create_or_update_incident(rule_run, failed_rows, total_rows, evidence_data)
             
+            metrics.save(rule_run)
             return rule_run
             
         except Exception as e:
@@ -131,7 +175,28 @@ class RuleExecutor:
             rule_run.status = 'FAILED'
             rule_run.finished_at = timezone.now()
             rule_run.save()
+            metrics.save(rule_run)
             raise e
+        finally:
+            metrics.finish()
+    
+    def _complete_from_cache(self, rule_run, cached_run, metrics):
+        """
+        Complete a run with the counts and evidence of an earlier run over the same content
+        """
+        for field in ('total_rows', 'passed_count', 'failed_count', 'sample_evidence', 'evidence_file', 'result_cache_key'):
+            setattr(rule_run, field, getattr(cached_run, field))
+        rule_run.finished_at = timezone.now()
+        rule_run.status = 'COMPLETED'
+        metrics.cached = True
+        
+        with metrics.stage('persist'):
+            rule_run.save()
+            self._update_dataset_quality_trend()
+            if rule_run.failed_count > 0:
+                self._create_or_update_incident(rule_run, rule_run.failed_count, rule_run.total_rows, rule_run.sample_evidence)
+        metrics.save(rule_run)
+        return rule_run
     
     def _load_dataset(self):
         """
@@ -141,16 +206,10 @@ class RuleExecutor:
             file_path = self.dataset.file.path
             if os.path.exists(file_path):
                 try:
-                    # Try to read CSV with different encodings
-                    try:
-                        return pd.read_csv(file_path, encoding='utf-8')
-                    except UnicodeDecodeError:
-                        try:
-                            return pd.read_csv(file_path, encoding='latin1')
-                        except UnicodeDecodeError:
-                            return pd.read_csv(file_path, encoding='cp1252')
+                    # Try each encoding; compressed files are decompressed as they are parsed
+                    return read_csv(file_path)
                 except Exception as e:
-                    print(f"Error reading CSV file: {e}")
+                    logger.error(f"Error reading CSV file: {e}")
                     raise FileNotFoundError(f"Could not read CSV file: {file_path}")
             else:
                 raise FileNotFoundError(f"Dataset file not found: {file_path}")
@@ -321,32 +380,21 @@ class RuleExecutor:
             self.dataset.save(update_fields=['quality_trend_data', 'rule_pass_rates'])
             
         except Exception as e:
-            print(f"Error updating dataset quality trend: {e}")
+            logger.warning(f"Error updating dataset quality trend: {e}")
 
     def _create_or_update_incident(self, rule_run, failed_rows, total_rows, evidence_data):
         """
-        Create or update an incident based on rule run results
+        Create an incident for this failure, or count it against the unresolved
+        incident with the same (rule, dataset, failure signature) fingerprint
         """
-        # Check if an incident already exists for this rule and dataset
-        existing_incident = Incident.objects.filter(
+        return upsert_incident(
+            rule_fingerprint(self.rule, self.dataset),
             rule=self.rule,
+            rule_run=rule_run,
             dataset=self.dataset,
-            status__in=['OPEN', 'ACKNOWLEDGED', 'MUTED']  # Not resolved
-        ).order_by('-created_at').first()
-        
-        if existing_incident:
-            # Update existing incident
-            existing_incident.updated_at = timezone.now()
-            existing_incident.save()
-        else:
-            # Create new incident
-            Incident.objects.create(
-                rule=self.rule,
-                rule_run=rule_run,
-                dataset=self.dataset,
-                severity=self.rule.severity,
-                title=f'Rule failed: {self.rule.name}',
-                description=f'Rule {self.rule.name} failed on {failed_rows} out of {total_rows} rows',
-                evidence=str(evidence_data),
-                status='OPEN'
-            )
\ No newline at end of file
+            severity=self.rule.severity,
+            title=f'Rule failed: {self.rule.name}',
+            description=f'Rule {self.rule.name} failed on {failed_rows} out of {total_rows} rows',
+            evidence_data=evidence_data,
+            status='OPEN'
+        )
@@ -0,0 +1,100 @@
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from apps.api import metrics
+from apps.rules.models import RuleRunMetrics
+
+logger = logging.getLogger(__name__)
+
+_tracing_lock = threading.Lock()
+_tracing_runs = 0
+_tracing_owned = False
+
+
+def _start_tracing():
+    """
+    Trace allocations while at least one run is measuring, resetting the peak for this run
+    """
+    global _tracing_runs, _tracing_owned
+    with _tracing_lock:
+        if _tracing_runs == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        _tracing_runs += 1
+        tracemalloc.reset_peak()
+
+
+def _stop_tracing():
+    """
+    Return the peak traced memory since the run started and stop tracing once no run needs it
+    """
+    global _tracing_runs, _tracing_owned
+    with _tracing_lock:
+        peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+        _tracing_runs -= 1
+        if _tracing_runs == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+        return peak
+
+
+class RunMetrics:
+    """
+    Collects per-stage wall-clock time and resource use for one rule run
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.seconds = dict.fromkeys(RuleRunMetrics.STAGES, 0.0)
+        self.bytes_read = 0
+        self.frame_bytes = 0
+        self.cached = False
+        self.peak_memory_bytes = None
+        self._tracing = True
+        _start_tracing()
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - started
+
+    def finish(self):
+        """
+        Stop measuring memory for this run; safe to call more than once
+        """
+        if self._tracing:
+            self._tracing = False
+            self.peak_memory_bytes = _stop_tracing()
+        return self.peak_memory_bytes
+    
+    def save(self, rule_run):
+        """
+        Store the metrics on the run; a failure here never fails the run itself
+        """
+        total = time.perf_counter() - self.started
+        peak_memory = self.finish()
+        metrics.inc('dqw_rule_runs_total', status=rule_run.status)
+        metrics.observe('dqw_rule_run_duration_seconds', total, rule_type=rule_run.rule.rule_type)
+        if self.bytes_read:
+            metrics.inc('dqw_dataset_load_bytes_total', self.bytes_read)
+        try:
+            return RuleRunMetrics.objects.update_or_create(
+                rule_run=rule_run,
+                defaults={
+                    **{f'{stage}_seconds': seconds for stage, seconds in self.seconds.items()},
+                    'total_seconds': total,
+                    'bytes_read': self.bytes_read,
+                    'frame_bytes': self.frame_bytes,
+                    'peak_memory_bytes': peak_memory,
+                    'rows_per_second': rule_run.total_rows / total if total > 0 else 0.0,
+                    'cached': self.cached,
+                },
+            )[0]
+        except Exception as e:
+            logger.warning(f"Failed to record metrics for rule run {rule_run.pk}: {e}")
+            return None
@@ -6,7 +6,11 @@ from django.core.paginator import Paginator
 from .models import Rule, RuleRun
 from .forms import RuleForm
 from apps.datasets.models import Dataset
-from apps.audit.utils import log_rule_update
+from apps.datasets.profiler import range_bounds, dsl_number
+from apps.datasets.utils_profiling import stored_column_stats
+from apps.audit.utils import log_rule_update, create_audit_log
+from data_quality_watchtower.pagination import paginate_queryset, cursor_query_string
+from data_quality_watchtower.exports import get_export_options, streaming_export_response, export_query_string
 
 
 @login_required
@@ -47,11 +51,8 @@ def rule_list(request):
     })
 
 
-@login_required
-def rule_run_list(request):
-    # Get all rule runs with related rule and dataset info
-    rule_runs = RuleRun.objects.select_related('rule', 'rule__dataset').all()
-    
+def _filter_rule_runs(request, rule_runs):
+    """Apply the run list/export filters from the query string"""
     # Filter by rule name
     rule_name_filter = request.GET.get('rule_name')
     if rule_name_filter:
@@ -73,13 +74,27 @@ def rule_run_list(request):
     if date_to:
         rule_runs = rule_runs.filter(started_at__date__lte=date_to)
     
-    # Pagination
-    paginator = Paginator(rule_runs, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    return rule_runs
+
+
+@login_required
+def rule_run_list(request):
+    # Get all rule runs with related rule and dataset info
+    rule_runs = _filter_rule_runs(request, RuleRun.objects.select_related('rule', 'rule__dataset').all())
+    
+    rule_name_filter = request.GET.get('rule_name')
+    status_filter = request.GET.get('status')
+    date_from = request.GET.get('date_from')
+    date_to = request.GET.get('date_to')
+    
+    # Pagination (offset by default, keyset with ?pagination=cursor)
+    page_obj, cursor_mode = paginate_queryset(request, rule_runs, 10, 'started_at')
     
     return render(request, 'rules/runs_list.html', {
         'page_obj': page_obj,
+        'cursor_mode': cursor_mode,
+        'cursor_query': cursor_query_string(request),
+        'export_query': export_query_string(request),
         'rule_name_filter': rule_name_filter,
         'status_filter': status_filter,
         'date_from': date_from,
@@ -87,6 +102,79 @@ def rule_run_list(request):
     })
 
 
+RULE_RUN_EXPORT_HEADER = [
+    'Run ID',
+    'Rule',
+    'Rule Type',
+    'Dataset',
+    'Status',
+    'Started At',
+    'Finished At',
+    'Total Rows',
+    'Passed',
+    'Failed',
+]
+
+
+def _rule_run_row(run):
+    return [
+        run.run_id,
+        run.rule.name,
+        run.rule.rule_type,
+        run.rule.dataset.name,
+        run.status,
+        run.started_at.strftime('%Y-%m-%d %H:%M:%S'),
+        run.finished_at.strftime('%Y-%m-%d %H:%M:%S') if run.finished_at else '',
+        run.total_rows,
+        run.passed_count,
+        run.failed_count,
+    ]
+
+
+def _rule_run_record(run):
+    return {
+        'id': run.id,
+        'run_id': run.run_id,
+        'rule_id': run.rule_id,
+        'rule': run.rule.name,
+        'rule_type': run.rule.rule_type,
+        'dataset_id': run.rule.dataset_id,
+        'dataset': run.rule.dataset.name,
+        'status': run.status,
+        'started_at': run.started_at.isoformat(),
+        'finished_at': run.finished_at.isoformat() if run.finished_at else None,
+        'total_rows': run.total_rows,
+        'passed_count': run.passed_count,
+        'failed_count': run.failed_count,
+    }
+
+
+@login_required
+def rule_run_export(request):
+    """Stream rule run history as CSV or NDJSON (?format=csv|ndjson, ?gzip=1)"""
+    export_format, use_gzip = get_export_options(request)
+    
+    create_audit_log(
+        actor=request.user,
+        action_type='EXPORT',
+        target_type='RuleRuns',
+        target_id=0,
+        after={
+            'format': export_format.upper(),
+            'gzip': use_gzip
+        },
+        ip_address=request.META.get('REMOTE_ADDR')
+    )
+    
+    # Evidence payloads are not exported, so don't fetch them
+    rule_runs = RuleRun.objects.select_related('rule', 'rule__dataset').defer('sample_evidence')
+    rule_runs = _filter_rule_runs(request, rule_runs).order_by('-started_at', '-id')
+    
+    return streaming_export_response(
+        request, rule_runs, 'rule_runs', RULE_RUN_EXPORT_HEADER, _rule_run_row, _rule_run_record
+    )
+
+
 @login_required
 def rule_create(request):
     if request.method == 'POST':
@@ -108,7 +196,7 @@ def rule_detail(request, pk):
     rule = get_object_or_404(Rule, pk=pk, owner=request.user)
     
     # Get recent rule runs
-    rule_runs = rule.runs.all()[:10]
+    rule_runs = rule.runs.select_related('metrics')[:10]
     
     return render(request, 'rules/detail.html', {
         'rule': rule,
@@ -240,7 +328,9 @@ def create_rule_from_recommendation(request):
             description = f'Check that {column} values are unique'
         elif rule_type == 'IN_RANGE':
             rule_name = f'{column} Range Check'
-            dsl_expression = f'IN_RANGE("{column}", 0, 1000000)'  # Default range
+            # p0.1-p99.9 from the stored profile, or the default range before profiling
+            low, high = range_bounds(stored_column_stats(dataset).get(column)) or (0, 1000000)
+            dsl_expression = f'IN_RANGE("{column}", {dsl_number(low)}, {dsl_number(high)})'
             description = f'Check that {column} values are within range'
         elif rule_type == 'REGEX':
             rule_name = f'{column} Email Format Check'
@@ -1,11 +1,11 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.http import JsonResponse
 from .models import RuleRun
 from apps.rules.models import Rule
 from apps.datasets.models import Dataset
 from django.db.models import Q
+from data_quality_watchtower.pagination import CursorPaginator, paginate_queryset, cursor_query_string
 import json
 
 @login_required
@@ -17,10 +17,8 @@ def rule_run_timeline(request):
     dataset_filter = request.GET.get('dataset', '')
     rule_filter = request.GET.get('rule', '')
     status_filter = request.GET.get('status', '')
-    page = request.GET.get('page', 1)
-    
     # Start with all rule runs
-    rule_runs = RuleRun.objects.select_related('rule', 'dataset').order_by('-started_at')
+    rule_runs = RuleRun.objects.select_related('rule', 'dataset', 'metrics').order_by('-started_at')
     
     # Apply filters
     if search_query:
@@ -38,9 +36,8 @@ def rule_run_timeline(request):
     if status_filter:
         rule_runs = rule_runs.filter(status=status_filter)
     
-    # Paginate results
-    paginator = Paginator(rule_runs, 20)  # Show 20 runs per page
-    page_obj = paginator.get_page(page)
+    # Paginate results (20 runs per page; keyset with ?pagination=cursor)
+    page_obj, cursor_mode = paginate_queryset(request, rule_runs, 20, 'started_at')
     
     # Get filter options
     datasets = Dataset.objects.filter(is_active=True).order_by('name')
@@ -49,6 +46,8 @@ def rule_run_timeline(request):
     
     return render(request, 'rules/timeline.html', {
         'page_obj': page_obj,
+        'cursor_mode': cursor_mode,
+        'cursor_query': cursor_query_string(request),
         'datasets': datasets,
         'rules': rules,
         'statuses': statuses,
@@ -70,7 +69,7 @@ def rule_run_timeline_api(request):
     limit = int(request.GET.get('limit', 50))
     
     # Start with all rule runs
-    rule_runs = RuleRun.objects.select_related('rule', 'dataset').order_by('-started_at')
+    rule_runs = RuleRun.objects.select_related('rule', 'dataset', 'metrics').order_by('-started_at')
     
     # Apply filters
     if search_query:
@@ -88,8 +87,9 @@ def rule_run_timeline_api(request):
     if status_filter:
         rule_runs = rule_runs.filter(status=status_filter)
     
-    # Limit results
-    rule_runs = rule_runs[:limit]
+    # Limit results; a cursor continues from the last run of the previous batch
+    page = CursorPaginator(rule_runs, limit, 'started_at').get_page(request.GET.get('cursor'))
+    rule_runs = page.object_list
     
     # Format data for timeline
     timeline_data = []
@@ -124,10 +124,13 @@ def rule_run_timeline_api(request):
             'total_rows': run.total_rows,
             'passed_count': run.passed_count,
             'failed_count': run.failed_count,
+            'metrics': run.metrics.to_dict() if hasattr(run, 'metrics') else None,
             'incident': incident,
         })
     
     return JsonResponse({
         'timeline_data': timeline_data,
         'count': len(timeline_data),
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
     })
\ No newline at end of file
@@ -0,0 +1,159 @@
+import base64
+import json
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(timestamp, pk, direction='next'):
+    """
+    Encode a (timestamp, id) position into an opaque URL-safe cursor
+    """
+    payload = json.dumps({'ts': timestamp.isoformat(), 'id': pk, 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns a (timestamp, id, direction) tuple, or None if the cursor is
+    missing or malformed so callers can fall back to the first page.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        timestamp = parse_datetime(payload['ts'])
+        pk = int(payload['id'])
+        direction = payload.get('d', 'next')
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        return None
+    if timestamp is None or direction not in ('next', 'prev'):
+        return None
+    return timestamp, pk, direction
+
+
+class CursorPage:
+    """
+    A single page of results from CursorPaginator.
+
+    Mirrors the parts of django.core.paginator.Page that the list templates
+    use (iteration, has_next, has_previous, has_other_pages), but exposes
+    next_cursor / previous_cursor instead of page numbers.
+    """
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset paginator ordered by (timestamp_field DESC, id DESC).
+
+    Unlike Paginator it never issues COUNT(*) or OFFSET: each page is a
+    range scan starting at the cursor position, so deep pages cost the same
+    as the first one when a matching (timestamp_field, id) index exists.
+    """
+
+    def __init__(self, queryset, per_page, timestamp_field):
+        self.per_page = per_page
+        self.timestamp_field = timestamp_field
+        self.queryset = queryset.order_by(f'-{timestamp_field}', '-id')
+
+    def _after(self, timestamp, pk):
+        field = self.timestamp_field
+        return Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': pk})
+
+    def _before(self, timestamp, pk):
+        field = self.timestamp_field
+        return Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'id__gt': pk})
+
+    def _cursor_for(self, obj, direction):
+        # Rows may be model instances or .values() dicts
+        if isinstance(obj, dict):
+            return encode_cursor(obj[self.timestamp_field], obj['id'], direction)
+        return encode_cursor(getattr(obj, self.timestamp_field), obj.id, direction)
+
+    def get_page(self, cursor=None):
+        position = decode_cursor(cursor)
+
+        if position is None:
+            rows = list(self.queryset[:self.per_page + 1])
+            has_more_after = len(rows) > self.per_page
+            has_more_before = False
+            rows = rows[:self.per_page]
+        elif position[2] == 'next':
+            timestamp, pk, _ = position
+            rows = list(self.queryset.filter(self._after(timestamp, pk))[:self.per_page + 1])
+            has_more_after = len(rows) > self.per_page
+            has_more_before = True
+            rows = rows[:self.per_page]
+        else:
+            # Walk backwards in ascending order, then flip back to display order
+            timestamp, pk, _ = position
+            ascending = self.queryset.filter(self._before(timestamp, pk)).order_by(self.timestamp_field, 'id')
+            rows = list(ascending[:self.per_page + 1])
+            has_more_before = len(rows) > self.per_page
+            has_more_after = True
+            rows = rows[:self.per_page]
+            rows.reverse()
+
+        next_cursor = self._cursor_for(rows[-1], 'next') if rows and has_more_after else None
+        previous_cursor = self._cursor_for(rows[0], 'prev') if rows and has_more_before else None
+
+        return CursorPage(rows, next_cursor, previous_cursor)
+
+
+def is_cursor_request(request):
+    """
+    Cursor mode is opted into with ?pagination=cursor or by following a cursor link
+    """
+    return request.GET.get('pagination') == 'cursor' or 'cursor' in request.GET
+
+
+def paginate_queryset(request, queryset, per_page, timestamp_field):
+    """
+    Paginate a queryset with either Paginator or CursorPaginator.
+
+    Returns (page_obj, cursor_mode). Offset pagination remains the default
+    so existing ?page= links keep working.
+    """
+    if is_cursor_request(request):
+        paginator = CursorPaginator(queryset, per_page, timestamp_field)
+        return paginator.get_page(request.GET.get('cursor')), True
+
+    paginator = Paginator(queryset, per_page)
+    return paginator.get_page(request.GET.get('page')), False
+
+
+def cursor_query_string(request):
+    """
+    The current query string without page/cursor parameters, for building cursor links
+    """
+    params = request.GET.copy()
+    params.pop('page', None)
+    params.pop('cursor', None)
+    params['pagination'] = 'cursor'
+    return params.urlencode()
@@ -74,6 +74,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.api.middleware.RequestMetricsMiddleware',
+    'apps.api.middleware.APIRequestLogMiddleware',
+    'apps.api.middleware.APIKeyAuthMiddleware',
 ]
 
 ROOT_URLCONF = 'data_quality_watchtower.urls'
@@ -177,6 +180,9 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# The suite runs with these settings; see the runner for the one exception
+TEST_RUNNER = 'data_quality_watchtower.test_runner.TestRunner'
+
 # Celery Configuration
 CELERY_BROKER_URL = 'memory://'
 CELERY_RESULT_BACKEND = 'cache+memory://'
@@ -185,15 +191,114 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
+# Audit log writer: 'celery' queues entries in process memory and a
+# background thread sends each batch (every AUDIT_LOG_BATCH_SIZE entries or
+# AUDIT_LOG_FLUSH_INTERVAL seconds) to one worker task, inserting it inline if
+# the broker is down. 'buffered' bulk-inserts the batches from that thread
+# instead, and 'sync' inserts inside the request.
+AUDIT_LOG_WRITER = os.environ.get('AUDIT_LOG_WRITER', 'celery')
+AUDIT_LOG_BATCH_SIZE = int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 100))
+AUDIT_LOG_FLUSH_INTERVAL = float(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', 2.0))  # seconds
+
+# Prometheus metrics (/metrics): each process adds its counters to the shared
+# MetricSeries rows every METRICS_FLUSH_INTERVAL seconds. 0 disables the
+# background flush, leaving it to the scrape.
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 10.0))  # seconds
+
+# APILog rows for /api/ requests: 'buffered' batches inserts on a background
+# thread, 'sync' inserts inside the request, 'off' disables request logging
+API_LOG_WRITER = os.environ.get('API_LOG_WRITER', 'buffered')
+API_LOG_BATCH_SIZE = int(os.environ.get('API_LOG_BATCH_SIZE', 200))
+API_LOG_FLUSH_INTERVAL = float(os.environ.get('API_LOG_FLUSH_INTERVAL', 5.0))  # seconds
+API_LOG_RETENTION_DAYS = int(os.environ.get('API_LOG_RETENTION_DAYS', 30))
+
+# /api/ access: an X-API-Key (or "Authorization: Api-Key <key>") header or a
+# signed-in session. Key lookups are kept in the default cache for
+# API_KEY_CACHE_SECONDS (never past the key's expiry); changing a key or its
+# owner drops the entry, for every process when the cache is shared.
+API_REQUIRE_AUTH = os.environ.get('API_REQUIRE_AUTH', 'True') == 'True'
+API_KEY_CACHE_SECONDS = int(os.environ.get('API_KEY_CACHE_SECONDS', 10))
+
+# Token bucket per API key / user: API_RATE_LIMIT_BURST requests at once,
+# refilled at API_RATE_LIMIT_PER_SECOND (0 disables the limit). Buckets live
+# in the default cache, so set REDIS_CACHE_URL to share them across processes;
+# on Redis each update runs as one atomic script.
+API_RATE_LIMIT_PER_SECOND = float(os.environ.get('API_RATE_LIMIT_PER_SECOND', 1.0))
+API_RATE_LIMIT_BURST = int(os.environ.get('API_RATE_LIMIT_BURST', 60))
+
+if os.environ.get('REDIS_CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_CACHE_URL'],
+        }
+    }
+
+# Uploaded CSVs are parsed, profiled and analyzed by a Celery task ('async')
+# or inside the request ('sync')
+DATASET_INGESTION = os.environ.get('DATASET_INGESTION', 'async')
+
+# Audit retention: entries older than this many days move to daily
+# gzip NDJSON partitions under AUDIT_ARCHIVE_ROOT (the cold tier)
+AUDIT_RETENTION_DAYS = int(os.environ.get('AUDIT_RETENTION_DAYS', 90))
+AUDIT_ARCHIVE_ROOT = os.environ.get('AUDIT_ARCHIVE_ROOT', str(BASE_DIR / 'audit_archive'))
+# The audit list reads the archive only for a date_from on or before an
+# archived day or with ?archive=1; filtered per-partition counts are cached
+AUDIT_ARCHIVE_COUNT_CACHE_SECONDS = int(os.environ.get('AUDIT_ARCHIVE_COUNT_CACHE_SECONDS', 3600))
+
+# Dataset profiling: 'exact' loads the whole file and counts distinct values
+# exactly; 'hll' streams it in PROFILE_CHUNK_ROWS chunks and uses mergeable
+# HyperLogLog sketches (relative error PROFILE_HLL_ERROR), in bounded memory.
+# Numeric percentiles then come from KLL sketches of size PROFILE_QUANTILE_K
+# (rank error about 1.7 / K)
+PROFILE_DISTINCT_MODE = os.environ.get('PROFILE_DISTINCT_MODE', 'exact')
+PROFILE_HLL_ERROR = float(os.environ.get('PROFILE_HLL_ERROR', 0.01))
+PROFILE_QUANTILE_K = int(os.environ.get('PROFILE_QUANTILE_K', 400))
+
+# Column groups of frames with at least PROFILE_PARALLEL_MIN_CELLS cells are
+# profiled and analyzed across PROFILE_WORKERS forked processes (0 = all
+# CPUs); each worker's group is kept within its share of PROFILE_MEMORY_BUDGET_MB
+PROFILE_WORKERS = int(os.environ.get('PROFILE_WORKERS', 0))
+PROFILE_MEMORY_BUDGET_MB = int(os.environ.get('PROFILE_MEMORY_BUDGET_MB', 4096))
+PROFILE_PARALLEL_MIN_CELLS = int(os.environ.get('PROFILE_PARALLEL_MIN_CELLS', 5000000))
+
+# Rule recommendations for larger frames are estimated from a stratified
+# sample of RULE_SAMPLE_ROWS rows, reported at RULE_SAMPLE_CONFIDENCE
+RULE_SAMPLE_ROWS = int(os.environ.get('RULE_SAMPLE_ROWS', 10000))
+RULE_SAMPLE_CONFIDENCE = float(os.environ.get('RULE_SAMPLE_CONFIDENCE', 0.95))
+PROFILE_CHUNK_ROWS = int(os.environ.get('PROFILE_CHUNK_ROWS', 100000))
+
+# Rule triggers run as one batch task per dataset. A batch holds its dataset's
+# lease while queued or running, renewed after each rule; requests in that
+# window join it, and a batch whose lease lapses is treated as abandoned.
+RULE_BATCH_LEASE_SECONDS = int(os.environ.get('RULE_BATCH_LEASE_SECONDS', 900))
+
+# Incident SLAs in hours per severity; an open incident goes to WARNING once
+# INCIDENT_SLA_WARNING_RATIO of its SLA has elapsed and to BREACHED after it
+INCIDENT_SLA_HOURS = {'CRITICAL': 1, 'HIGH': 2, 'MEDIUM': 24, 'LOW': 72}
+INCIDENT_SLA_WARNING_RATIO = float(os.environ.get('INCIDENT_SLA_WARNING_RATIO', 0.75))
+
 # Celery Beat Schedule
 CELERY_BEAT_SCHEDULE = {
     'run-all-rules-every-hour': {
         'task': 'apps.rules.tasks.run_all_rules_task',
         'schedule': 3600.0,  # Run every hour (3600 seconds)
     },
-    'check-sla-breaches-every-day': {
+    'check-sla-breaches-every-5-minutes': {
         'task': 'apps.rules.tasks.check_sla_breaches',
-        'schedule': 86400.0,  # Run every day (86400 seconds)
+        'schedule': 300.0,  # Well inside the 1-2h CRITICAL/HIGH SLAs
+    },
+    'archive-audit-logs-every-day': {
+        'task': 'apps.audit.tasks.archive_audit_logs_task',
+        'schedule': 86400.0,
+    },
+    'collect-dataset-content-every-day': {
+        'task': 'apps.datasets.tasks.collect_dataset_content_task',
+        'schedule': 86400.0,
+    },
+    'prune-api-logs-every-day': {
+        'task': 'apps.api.tasks.prune_api_logs_task',
+        'schedule': 86400.0,
     },
 }
 
@@ -0,0 +1,23 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the suite with the shipped settings, except that the writers that
+    flush from background threads write inline instead. Their threads
+    open their own database connections, which would commit outside each
+    test's transaction. Tests of the buffered paths opt back in with
+    override_settings.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._inline_writers = override_settings(
+            METRICS_FLUSH_INTERVAL=0, API_LOG_WRITER='sync', AUDIT_LOG_WRITER='sync',
+        )
+        self._inline_writers.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._inline_writers.disable()
+        super().teardown_test_environment(**kwargs)
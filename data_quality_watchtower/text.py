@@ -0,0 +1,10 @@
+import re
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """
+    Split a free-text query into lowercase search terms
+    """
+    return [token.lower() for token in TOKEN_PATTERN.findall(query or '')]
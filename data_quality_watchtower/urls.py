@@ -17,6 +17,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from apps.api.views import MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -28,6 +29,7 @@ urlpatterns = [
     path('users/', include('apps.users.urls')),
     path('audit/', include('apps.audit.urls')),
     path('notifications/', include('apps.notifications.urls')),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
 
 # Serve media files during development